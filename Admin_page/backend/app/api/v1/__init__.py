@@ -2,4 +2,5 @@ from .login import router as login_router
 from .website import router as website_router
 from .manage_user import router as manage_user_router
 from .first_users import router as first_users_router
-from .get_my_users import router as get_my_users_router 
\ No newline at end of file
+from .get_my_users import router as get_my_users_router
+from .site_config import router as site_config_router
@@ -32,7 +32,7 @@ async def get_first_users(
     This endpoint:
     1. Gets user ID from bearer token
     2. Queries websites table for user's domains with status 'processing' or 'published'
-    3. Takes the first domain and checks if database {domain}_{owner_id} exists
+    3. Takes the first domain and its tenant database (websites.tenant_db_name)
     4. If database doesn't exist, returns empty response
     5. If database exists, returns all user records from the users table (excluding sensitive data)
     """
@@ -75,40 +75,29 @@ async def get_first_users(
         
         logger.info(f"Checking database for domain: {domain} with owner: {owner_id}")
         
-        # Step 4: Check if database exists
-        db_exists = client_db_manager.database_exists(domain, owner_id)
+        # Step 4: Route to the tenant database recorded on the website (set when provisioned)
+        db_name = first_website.tenant_db_name
         
-        if not db_exists:
-            logger.info(f"Database {domain}_{owner_id} does not exist, returning empty response")
+        if not db_name:
+            logger.info(f"No tenant database provisioned for domain {domain}, returning empty response")
             return FirstUsersResponse(
                 status="success",
                 message=f"Database for domain {domain} does not exist",
                 data={"users": []}
             ).__dict__
         
-        # Step 5: Check if users table exists in the database
-        users_table_exists = client_db_manager.table_exists(domain, "users", owner_id)
-        
-        if not users_table_exists:
-            logger.info(f"Users table does not exist in database {domain}_{owner_id}")
-            return FirstUsersResponse(
-                status="success",
-                message=f"Users table not found in database for domain {domain}",
-                data={"users": []}
-            ).__dict__
-        
-        # Step 6: Get all user records from the users table
-        users_data = client_db_manager.get_users_data(domain, owner_id)
+        # Step 5: Get all user records from the users table
+        users_data = client_db_manager.get_users_data(db_name)
         
         if users_data is None:
-            logger.error(f"Failed to retrieve users data from {domain}_{owner_id}")
+            logger.error(f"Failed to retrieve users data from {db_name}")
             return FirstUsersResponse(
                 status="success",
                 message="Failed to retrieve users data",
                 data={"users": []}
             ).__dict__
         
-        # Step 7: Return user records
+        # Step 6: Return user records
         return FirstUsersResponse(
             status="success",
             message=f"Users retrieved from domain {domain}",
@@ -6,7 +6,7 @@ import logging
 from app.db.session import get_db
 from app.api.deps import get_current_user
 from app.core.security import TokenData
-from app.models.website import Website
+from app.crud.website import get_tenant_by_domain
 from app.models.user import User
 from app.db.client_db_manager import client_db_manager
 
@@ -33,8 +33,8 @@ async def get_my_users(
     This endpoint:
     1. Gets user ID from bearer token
     2. Validates that the domain belongs to the authenticated user with status 'published'
-    3. Checks if database {domain}_{owner_id} exists
-    4. If database exists, returns all user records from the users table (excluding sensitive data)
+    3. Looks up the tenant database recorded on the website (websites.tenant_db_name)
+    4. If it is provisioned, returns all user records from the users table (excluding sensitive data)
     5. If database doesn't exist, returns empty response
     """
     
@@ -48,14 +48,10 @@ async def get_my_users(
                 detail="User not found"
             )
         
-        # Step 2: Get website by domain name and validate ownership and status
-        website = db.query(Website).filter(
-            Website.owner_id == user.id,
-            Website.domain == domain,
-            Website.status == 'published'
-        ).first()
+        # Step 2: Resolve the domain to its website and validate ownership and status
+        website = get_tenant_by_domain(db, domain)
         
-        if not website:
+        if not website or website.owner_id != user.id or website.status != 'published':
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Website not found with the specified domain, or you don't have access to it, or status is not published"
@@ -63,49 +59,38 @@ async def get_my_users(
         
         owner_id = website.owner_id
         
-        logger.info(f"Checking database for domain: {domain} with owner: {owner_id} (website_id: {website.id})")
+        logger.info(f"Checking database for domain: {domain} with owner: {owner_id} (website_id: {website.website_id})")
         
-        # Step 3: Check if database exists
-        db_exists = client_db_manager.database_exists(domain, owner_id)
+        # Step 3: Route to the tenant database recorded on the website (set when provisioned)
+        db_name = website.tenant_db_name
         
-        if not db_exists:
-            logger.info(f"Database {domain}_{owner_id} does not exist, returning empty response")
+        if not db_name:
+            logger.info(f"No tenant database provisioned for domain {domain}, returning empty response")
             return GetMyUsersResponse(
                 status="success",
                 message=f"Database for domain {domain} does not exist",
                 data={"users": []}
             ).__dict__
         
-        # Step 4: Check if users table exists in the database
-        users_table_exists = client_db_manager.table_exists(domain, "users", owner_id)
-        
-        if not users_table_exists:
-            logger.info(f"Users table does not exist in database {domain}_{owner_id}")
-            return GetMyUsersResponse(
-                status="success",
-                message=f"Users table not found in database for domain {domain}",
-                data={"users": []}
-            ).__dict__
-        
-        # Step 5: Get all user records from the users table
-        users_data = client_db_manager.get_users_data(domain, owner_id)
+        # Step 4: Get all user records from the users table
+        users_data = client_db_manager.get_users_data(db_name)
         
         if users_data is None:
-            logger.error(f"Failed to retrieve users data from {domain}_{owner_id}")
+            logger.error(f"Failed to retrieve users data from {db_name}")
             return GetMyUsersResponse(
                 status="success",
                 message="Failed to retrieve users data",
                 data={"users": []}
             ).__dict__
         
-        # Step 6: Return user records
+        # Step 5: Return user records
         return GetMyUsersResponse(
             status="success",
             message=f"Users retrieved from domain {domain}",
             data={
                 "users": users_data,
                 "website_info": {
-                    "id": website.id,
+                    "id": website.website_id,
                     "name": website.name,
                     "domain": website.domain,
                     "status": website.status
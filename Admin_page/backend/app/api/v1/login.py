@@ -3,13 +3,12 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.core.security import (
-    verify_password,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     Token,
-    TokenData,
-    get_password_hash
+    TokenData
 )
+from app.core.password_executor import get_client_ip, password_executor, PasswordQueueFull
 from app.db.session import get_db
 from app.crud import user as user_crud
 from app.api.deps import get_current_user
@@ -19,6 +18,7 @@ router = APIRouter()
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -35,8 +35,18 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verify password
-    if not verify_password(form_data.password, user.passwordHash):
+    # Verify password (in the hashing pool, off the event loop)
+    try:
+        password_ok, new_hash = await password_executor.verify_and_update(
+            form_data.password, user.passwordHash, client=get_client_ip(request)
+        )
+    except PasswordQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login requests in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -50,6 +60,11 @@ async def login(
             detail="Inactive user"
         )
     
+    # Upgrade a hash that is out of policy (old scheme or cost) now that we know the password
+    if new_hash:
+        user.passwordHash = new_hash
+        db.commit()
+    
     # Create access token with role information
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -92,6 +107,7 @@ class UpdateMeRequest(BaseModel):
 
 @router.patch("/me")
 async def update_me(
+    request: Request,
     payload: UpdateMeRequest = Body(...),
     current_user: TokenData = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -110,7 +126,12 @@ async def update_me(
         user.lastName = payload.lastName
         updated = True
     if payload.password:
-        user.passwordHash = get_password_hash(payload.password)
+        try:
+            user.passwordHash = await password_executor.hash(
+                payload.password, client=get_client_ip(request)
+            )
+        except PasswordQueueFull:
+            raise HTTPException(status_code=503, detail="Server busy, please retry shortly", headers={"Retry-After": "1"})
         updated = True
     if updated:
         db.commit()
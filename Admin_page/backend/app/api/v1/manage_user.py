@@ -9,6 +9,7 @@ from app.core.security import TokenData
 from app.models.website import Website
 from app.models.user import User
 from app.db.client_db_manager import client_db_manager
+from app.crud.website import set_tenant_db_name
 
 logger = logging.getLogger(__name__)
 
@@ -38,9 +39,9 @@ async def manage_user(
     This endpoint:
     1. Validates the user has access to the website
     2. Checks if website status is 'processing' or 'published'
-    3. Creates client database if it doesn't exist
-    4. Creates necessary tables in the client database
-    5. Returns user table column information (excluding password hashes)
+    3. Provisions the client database and its tables on first use and records
+       the database name on the website (websites.tenant_db_name)
+    4. Returns user table column information (excluding password hashes)
     """
     
     try:
@@ -90,30 +91,33 @@ async def manage_user(
                 detail="Website domain is required for user management"
             )
         
-        # Step 5: Check if database exists, create if not (using old naming convention for backward compatibility)
-        domain = website.domain
-        db_exists = client_db_manager.database_exists(domain)  # Old naming convention
+        # Step 5: Provision the client database on first use and record its name on the website
+        db_name = website.tenant_db_name
+        database_created = False
         
-        if not db_exists:
-            logger.info(f"Creating database for domain: {domain}")
-            if not client_db_manager.create_database(domain):  # Old naming convention
+        if not db_name:
+            db_name = client_db_manager.new_tenant_db_name(website.domain, website.owner_id)
+            logger.info(f"Provisioning database {db_name} for domain: {website.domain}")
+            if not client_db_manager.create_database(db_name):
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to create client database"
                 )
-        
-        # Step 6: Create tables if they don't exist
-        if not client_db_manager.table_exists(domain, "users"):  # Old naming convention
-            logger.info(f"Creating tables for domain: {domain}")
-            if not client_db_manager.create_tables(domain):  # Old naming convention
+            
+            # Step 6: Create tables (CREATE TABLE IF NOT EXISTS, safe to repeat)
+            if not client_db_manager.create_tables(db_name):
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Failed to create client database tables"
                 )
+            db_name = set_tenant_db_name(db, website, db_name)
+            database_created = True
+        
+        domain = website.domain
         
         # Step 7: Get user table column information (excluding password-related columns)
         excluded_columns = ['password_hash', 'salt', 'reset_token', 'verification_token']
-        columns = client_db_manager.get_table_columns(domain, "users", excluded_columns)  # Old naming convention
+        columns = client_db_manager.get_table_columns(db_name, "users", excluded_columns)
         
         if columns is None:
             raise HTTPException(
@@ -126,12 +130,12 @@ async def manage_user(
         essential_tables = ['users', 'sessions', 'user_profiles', 'website_settings']
         
         for table_name in essential_tables:
-            if client_db_manager.table_exists(domain, table_name):  # Old naming convention
+            if client_db_manager.table_exists(db_name, table_name):
                 table_columns = client_db_manager.get_table_columns(
-                    domain, 
+                    db_name, 
                     table_name, 
                     excluded_columns if table_name == 'users' else []
-                )  # Old naming convention
+                )
                 if table_columns:
                     tables_info[table_name] = table_columns
         
@@ -141,7 +145,7 @@ async def manage_user(
             "website_name": website.name,
             "domain": domain,
             "status": website.status,
-            "database_created": not db_exists,  # True if we just created it
+            "database_created": database_created,  # True if we just created it
             "user_table_columns": columns,
             "available_tables": list(tables_info.keys()),
             "tables_info": tables_info,
@@ -212,11 +216,11 @@ async def get_user_management_status(
         }
         
         if website.domain and website.status in ['processing', 'published']:
-            status_info["database_exists"] = client_db_manager.database_exists(website.domain)  # Old naming convention
-            status_info["tables_exist"] = client_db_manager.table_exists(website.domain, "users")  # Old naming convention
-            status_info["ready_for_management"] = (
-                status_info["database_exists"] and status_info["tables_exist"]
-            )
+            # A tenant database is recorded only after it and its tables were created
+            provisioned = bool(website.tenant_db_name)
+            status_info["database_exists"] = provisioned
+            status_info["tables_exist"] = provisioned
+            status_info["ready_for_management"] = provisioned
         
         return ManageUserResponse(
             status="success",
@@ -273,15 +277,15 @@ async def get_available_tables(
                 detail="Website domain is required"
             )
         
-        # Check if database exists (using old naming convention)
-        if not client_db_manager.database_exists(website.domain):
+        # The tenant database is recorded on the website once user management is initialized
+        if not website.tenant_db_name:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Client database not found. Please initialize user management first."
             )
         
         # Get all tables and their column information
-        session = client_db_manager.get_client_session(website.domain)  # Old naming convention
+        session = client_db_manager.get_client_session(website.tenant_db_name)
         if not session:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -298,10 +302,10 @@ async def get_available_tables(
             
             for table_name in table_names:
                 columns = client_db_manager.get_table_columns(
-                    website.domain, 
+                    website.tenant_db_name, 
                     table_name, 
                     excluded_columns if table_name == 'users' else []
-                )  # Old naming convention
+                )
                 if columns:
                     tables_info[table_name] = columns
             
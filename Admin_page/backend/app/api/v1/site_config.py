@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, status, Request, Response
+from fastapi.responses import FileResponse
+import logging
+
+from app.crud.website import get_published_config
+from app.core.site_publisher import site_publisher
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Bundles are content-addressed, so their URLs can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+POINTER_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+def _host_domain(request: Request) -> str:
+    """Domain of the website the request's Host header resolved to (see TenantResolverMiddleware)."""
+    tenant = getattr(request.state, "tenant", None)
+    if tenant is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No website found for this host"
+        )
+    return tenant.domain
+
+@router.get("/site_config")
+def host_site_config(request: Request, response: Response):
+    """Published configuration of the website served on the request's Host."""
+    return site_config(_host_domain(request), response)
+
+@router.get("/site_config/{domain}")
+def site_config(domain: str, response: Response):
+    """
+    Public, unauthenticated read of a published website's configuration
+    (colors, font, logo, hero image, texts, social links) for page rendering.
+
+    Served from a read-through cache (in-process LRU, then the shared store);
+    MySQL is only queried on a full miss and concurrent misses are coalesced.
+    Defined as a sync endpoint so a cache miss never blocks the event loop.
+    """
+    config = get_published_config(domain)
+    if config is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No published website found for this domain"
+        )
+    response.headers["Cache-Control"] = "public, max-age=30"
+    return config
+
+def _bundle_response(request: Request, domain: str, digest: str, cache_control: str):
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    found = site_publisher.bundle_file(domain, digest, request.headers.get("accept-encoding", ""))
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bundle not found")
+    path, encoding = found
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+@router.get("/site/bundle")
+async def host_bundle(request: Request):
+    """Live published bundle of the website served on the request's Host."""
+    return await current_bundle(_host_domain(request), request)
+
+@router.get("/sites/{domain}/bundle")
+async def current_bundle(domain: str, request: Request):
+    """
+    Live published bundle for a domain. Clients revalidate with If-None-Match;
+    the ETag is the bundle's content hash and changes when the published content does.
+    """
+    digest = site_publisher.current_digest(domain)
+    if digest is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No published bundle found for this domain"
+        )
+    return _bundle_response(request, domain, digest, POINTER_CACHE_CONTROL)
+
+@router.get("/sites/{domain}/bundle/{digest}.json")
+async def immutable_bundle(domain: str, digest: str, request: Request):
+    """A specific, immutable bundle version, cacheable for a year (kept PUBLISH_RETENTION_SECONDS after it is replaced)."""
+    return _bundle_response(request, domain, digest, IMMUTABLE_CACHE_CONTROL)
@@ -1,16 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.api.deps import get_current_user
 from app.models.website import WebsiteCreate, WebsiteOut
-from app.crud.website import upsert_website_for_user, get_websites_for_user, create_website_with_defaults, update_website_by_id, delete_website_by_id
+from app.crud.website import upsert_website_for_user, get_websites_for_user, create_website_with_defaults, update_website_by_id, delete_website_by_id, patch_website_json_columns, publish_website, get_tenant_by_domain
+from app.core.json_patch import JsonPatchError, JsonPatchTestFailed
 from app.models.user import User
 from app.crud.user import get_user_by_username
-from app.core.security import TokenData, get_password_hash
+from app.core.security import TokenData
+from app.core.password_executor import get_client_ip, password_executor, PasswordQueueFull
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Dict, Any
 import logging
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from app.db.client_db_manager import client_db_manager
 
 # Set up logging
@@ -51,6 +54,9 @@ class WebsiteRequest(BaseModel):
 class DeleteWebsiteRequest(BaseModel):
     id: int
 
+class PublishWebsiteRequest(BaseModel):
+    id: int
+
 class AddUserRequest(BaseModel):
     domain: str
     first_name: str
@@ -76,6 +82,20 @@ class DeleteUserRequest(BaseModel):
     user_id: int
     domain: str
 
+def _get_tenant_session(db: Session, domain: str, owner_id: int):
+    """Session on the client database recorded for the owner's website with this domain, or None."""
+    tenant = get_tenant_by_domain(db, domain)
+    if tenant is None or tenant.owner_id != owner_id:
+        return None
+    return client_db_manager.get_client_session(tenant.tenant_db_name)
+
+async def _hash_password(request: Request, password: str) -> str:
+    """Hash in the password pool; 503 when too many hashes are already queued."""
+    try:
+        return await password_executor.hash(password, client=get_client_ip(request))
+    except PasswordQueueFull:
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly", headers={"Retry-After": "1"})
+
 @router.post("/my_website")
 async def create_or_update_website(
     payload: WebsiteRequest,
@@ -105,10 +125,49 @@ async def create_or_update_website(
             if not website:
                 raise HTTPException(status_code=404, detail="Website not found or you don't have permission to update it")
             return {"success": True, "website_id": website.id, "message": "Website updated successfully"}
+    except IntegrityError:
+        db.rollback()
+        logger.warning(f"Domain {payload.domain} is already used by another website")
+        raise HTTPException(status_code=409, detail="Domain is already used by another website")
     except Exception as e:
         logger.error(f"Error processing website request: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.patch("/my_website/{website_id}")
+async def patch_website(
+    website_id: int,
+    operations: List[Dict[str, Any]] = Body(..., description="JSON Patch (RFC 6902) operations"),
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Partially update the JSON columns of a website with JSON Patch operations.
+    Paths are rooted at the column name, e.g.
+    [{"op": "replace", "path": "/team_members/2/name", "value": "Priya"},
+     {"op": "add", "path": "/photo_gallery_urls/-", "value": "https://..."}]
+    Patchable columns: photo_gallery_urls, services_offerings, team_members, social_media_links.
+    """
+    logger.info(f"Website patch request for user: {current_user.username}, ID: {website_id}, ops: {len(operations)}")
+
+    user = get_user_by_username(db, current_user.username)
+    if not user:
+        logger.error(f"User not found: {current_user.username}")
+        raise HTTPException(status_code=404, detail="User not found")
+
+    try:
+        patched = patch_website_json_columns(db, website_id, user.id, operations)
+    except JsonPatchTestFailed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error patching website {website_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if not patched:
+        raise HTTPException(status_code=404, detail="Website not found or you don't have permission to update it")
+    return {"success": True, "website_id": website_id, "message": "Website updated successfully"}
+
 @router.post("/add_mysite", response_model=WebsiteOut)
 async def add_mysite(
     payload: WebsiteCreate,
@@ -118,7 +177,11 @@ async def add_mysite(
     user = get_user_by_username(db, current_user.username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    website = upsert_website_for_user(db, user.id, payload.page_no, payload.dict(exclude_unset=True))
+    try:
+        website = upsert_website_for_user(db, user.id, payload.page_no, payload.dict(exclude_unset=True))
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Domain is already used by another website")
     return website
 
 @router.get("/my_website")
@@ -126,26 +189,18 @@ async def my_website(
     current_user: TokenData = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    logger.info(f"Getting websites for user: {current_user.username}")
-    
     user = get_user_by_username(db, current_user.username)
     if not user:
-        logger.error(f"User not found: {current_user.username}")
+        logger.error("User not found: %s", current_user.username)
         raise HTTPException(status_code=404, detail="User not found")
     
-    logger.info(f"Found user with ID: {user.id}")
-    
     websites = get_websites_for_user(db, user.id)
-    logger.info(f"Found {len(websites)} websites for user {user.id}")
     
     if not websites:
-        logger.info("No websites found, returning empty list")
         return []
     
     result = []
     for w in websites:
-        logger.info(f"Processing website: {w.id}, domain: {w.domain}, status: {w.status}")
-        
         # Return all website data except excluded fields (owner_id, id, last_updated, created_at)
         website_data = {
             "name": w.name or "",
@@ -180,7 +235,7 @@ async def my_website(
         }
         result.append(website_data)
     
-    logger.info(f"Returning {len(result)} websites with full data")
+    logger.info("Returning %d websites for user %s", len(result), user.id)
     return result
 
 @router.post("/delete_mysite")
@@ -208,6 +263,42 @@ async def delete_mysite(
         logger.error(f"Error deleting website: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/publish_mysite")
+async def publish_mysite(
+    payload: PublishWebsiteRequest,
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Publish a website: set its status to 'published' and compile an immutable,
+    content-hashed JSON bundle that public sites read from /api/v1/sites/{domain}/bundle.
+    """
+    logger.info(f"Publish website request for user: {current_user.username}, Website ID: {payload.id}")
+
+    user = get_user_by_username(db, current_user.username)
+    if not user:
+        logger.error(f"User not found: {current_user.username}")
+        raise HTTPException(status_code=404, detail="User not found")
+
+    try:
+        result = publish_website(db, payload.id, user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error publishing website: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if not result:
+        raise HTTPException(status_code=404, detail="Website not found or you don't have permission to publish it")
+    website, digest = result
+    return {
+        "success": True,
+        "website_id": website.id,
+        "bundle": digest,
+        "url": f"/api/v1/sites/{website.domain.strip().lower()}/bundle/{digest}.json",
+        "message": "Website published successfully"
+    }
+
 @router.get('/get_roles')
 async def get_roles(
     current_user: TokenData = Depends(get_current_user),
@@ -227,6 +318,7 @@ async def get_roles(
 
 @router.post('/add_user')
 async def add_user(
+    request: Request,
     payload: AddUserRequest,
     current_user: TokenData = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -238,13 +330,12 @@ async def add_user(
     owner = db.query(User).filter(User.username == current_user.username).first()
     if not owner:
         raise HTTPException(status_code=404, detail="User not found")
-    owner_id = owner.id
-    # Get client DB session
-    session = client_db_manager.get_client_session(payload.domain, owner_id)
+    # Hash before taking a client DB session so a busy pool never holds a connection
+    hashed_pw = await _hash_password(request, payload.password) if payload.password else None
+    session = _get_tenant_session(db, payload.domain, owner.id)
     if not session:
         raise HTTPException(status_code=500, detail="Client database not found")
     try:
-        hashed_pw = get_password_hash(payload.password)
         # Convert is_active to boolean if it's an integer (0/1)
         is_active_bool = bool(payload.is_active) if isinstance(payload.is_active, int) else payload.is_active
         
@@ -271,6 +362,7 @@ async def add_user(
 
 @router.post('/modify_user')
 async def modify_user(
+    request: Request,
     payload: ModifyUserRequest,
     current_user: TokenData = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -281,8 +373,8 @@ async def modify_user(
     owner = db.query(User).filter(User.username == current_user.username).first()
     if not owner:
         raise HTTPException(status_code=404, detail="User not found")
-    owner_id = owner.id
-    session = client_db_manager.get_client_session(payload.domain, owner_id)
+    hashed_pw = await _hash_password(request, payload.password) if payload.password else None
+    session = _get_tenant_session(db, payload.domain, owner.id)
     if not session:
         raise HTTPException(status_code=500, detail="Client database not found")
     try:
@@ -307,9 +399,9 @@ async def modify_user(
             'is_active': is_active_bool,
             'user_id': payload.user_id
         }
-        if payload.password:
+        if hashed_pw:
             update_fields.append('password_hash = :password_hash')
-            params['password_hash'] = get_password_hash(payload.password)
+            params['password_hash'] = hashed_pw
         sql = text(f"""
             UPDATE users SET {', '.join(update_fields)} WHERE id = :user_id
         """)
@@ -336,8 +428,7 @@ async def delete_user(
     owner = db.query(User).filter(User.username == current_user.username).first()
     if not owner:
         raise HTTPException(status_code=404, detail="User not found")
-    owner_id = owner.id
-    session = client_db_manager.get_client_session(payload.domain, owner_id)
+    session = _get_tenant_session(db, payload.domain, owner.id)
     if not session:
         raise HTTPException(status_code=500, detail="Client database not found")
     try:
@@ -1,3 +1,4 @@
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,6 +8,38 @@ class Settings(BaseSettings):
     MYSQL_PORT: int = 3306
     MYSQL_DB: str = "admin_page_db"
     CORS_ORIGINS: list[str] = ["*"]  # TODO: Change to your frontend DNS in production
+    CORS_MAX_AGE: int = 600  # Seconds browsers may cache a preflight response
+    # Proxy addresses/CIDRs whose X-Forwarded-For header is used for the client IP
+    TRUSTED_PROXIES: List[str] = []
+    # Logging: records go through a queue to a writer thread
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" (one object per line) or "text"
+    LOG_SAMPLE_RATE: float = 1.0  # Fraction of requests whose INFO/DEBUG records are kept
+    LOG_QUEUE_SIZE: int = 10000
+    # Shared cache for published site configuration (optional; in-process LRU only when unset)
+    REDIS_URL: Optional[str] = None
+    SITE_CONFIG_LOCAL_MAX_ENTRIES: int = 2048
+    SITE_CONFIG_LOCAL_TTL_SECONDS: int = 30
+    SITE_CONFIG_SHARED_TTL_SECONDS: int = 3600
+    SITE_CONFIG_NEGATIVE_TTL_SECONDS: int = 10
+    # Static JSON bundles written when a website is published
+    PUBLISH_DIR: str = "published_sites"
+    PUBLISH_RETENTION_SECONDS: int = 86400  # Keep replaced bundles this long for clients still using them
+    # In-memory domain -> website map used for Host-based tenant routing
+    DOMAIN_RESOLVER_REFRESH_SECONDS: int = 15
+    DOMAIN_RESOLVER_FULL_RELOAD_SECONDS: int = 600
+    # Password hashing policy: first scheme hashes new passwords, the others are rehashed on login.
+    # Costs are minimums (passlib rounds); a target verify time (ms) raises the cost at startup.
+    PASSWORD_HASH_SCHEMES: List[str] = ["bcrypt"]
+    PASSWORD_HASH_COSTS: Dict[str, int] = {"bcrypt": 12}
+    PASSWORD_HASH_TARGET_VERIFY_MS: int = 0
+    # Password hashing process pool (0 workers = one per CPU core)
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_QUEUE: int = 256
+    PASSWORD_HASH_MAX_QUEUE_PER_CLIENT: int = 8  # Only enforced when TRUSTED_PROXIES is set
+    # Verified JWT cache (decoded claims reused until the token expires)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    TOKEN_CACHE_MAX_TOKEN_LIFETIME_SECONDS: int = 1800  # Longest access token lifetime; bounds revocation bookkeeping
 
     @property
     def database_url(self):
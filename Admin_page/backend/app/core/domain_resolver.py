@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.website import Website
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_domain(value: Optional[str]) -> Optional[str]:
+    """
+    Canonical form of a domain or Host header: lowercase, no scheme, path, port,
+    trailing dot or leading 'www.'. Returns None for empty input.
+    """
+    if not value:
+        return None
+    domain = value.strip().lower()
+    if '://' in domain:
+        domain = domain.split('://', 1)[1]
+    domain = domain.split('/', 1)[0].split('?', 1)[0].rsplit('@', 1)[-1]
+    if domain.startswith('['):
+        domain = domain.split(']', 1)[0] + ']'
+    else:
+        domain = domain.split(':', 1)[0]
+    domain = domain.rstrip('.')
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain or None
+
+
+@dataclass(frozen=True)
+class TenantDescriptor:
+    """What request routing needs to know about the website behind a domain."""
+    website_id: int
+    owner_id: int
+    domain: str
+    normalized_domain: str
+    name: Optional[str]
+    status: Optional[str]
+    tenant_db_name: Optional[str]
+
+
+class DomainResolver:
+    """
+    In-memory map from normalized domain to tenant descriptor.
+
+    The map is loaded once at startup and then refreshed incrementally from
+    `websites.last_updated`, with a periodic full reload to pick up anything the
+    incremental pass could miss (clock skew between app and database timestamps).
+    Writes made by this process are applied immediately via `apply()`.
+    Readers never take a lock: updates build new dicts and swap them in. Writers
+    (apply() on the event loop, refresh() in a worker thread) are serialized by
+    a lock, and writes applied while a refresh was querying are replayed on top
+    of its result, so a refresh that read a row before its commit cannot undo it.
+    """
+
+    # Re-read rows slightly older than the watermark; DATETIME has second precision
+    WATERMARK_OVERLAP = timedelta(seconds=2)
+
+    def __init__(self, refresh_interval: int = 15, full_reload_interval: int = 600):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self._by_domain: Dict[str, TenantDescriptor] = {}
+        self._domain_by_id: Dict[int, str] = {}
+        self._watermark: Optional[datetime] = None
+        self._last_full_reload = 0.0
+        self._lock = threading.Lock()
+        self._applied: List[Tuple[int, SimpleNamespace]] = []  # (sequence, row) of recent apply() calls
+        self._apply_seq = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def resolve(self, host: Optional[str]) -> Optional[TenantDescriptor]:
+        """O(1) lookup of a domain or Host header value."""
+        key = normalize_domain(host)
+        if key is None:
+            return None
+        return self._by_domain.get(key)
+
+    def __len__(self) -> int:
+        return len(self._by_domain)
+
+    @staticmethod
+    def _descriptor(row) -> Optional[TenantDescriptor]:
+        if row.is_active is False or not row.normalized_domain:
+            return None
+        return TenantDescriptor(
+            website_id=row.id,
+            owner_id=row.owner_id,
+            domain=row.domain,
+            normalized_domain=row.normalized_domain,
+            name=row.name,
+            status=row.status,
+            tenant_db_name=row.tenant_db_name,
+        )
+
+    def _merge(self, rows, full: bool) -> None:
+        """Merge rows into new dicts and swap them in (caller holds the lock)."""
+        by_domain = {} if full else dict(self._by_domain)
+        domain_by_id = {} if full else dict(self._domain_by_id)
+        for row in rows:
+            previous = domain_by_id.pop(row.id, None)
+            existing = by_domain.get(previous) if previous is not None else None
+            if existing is not None and existing.website_id == row.id:
+                del by_domain[previous]
+            descriptor = self._descriptor(row)
+            if descriptor is not None:
+                by_domain[descriptor.normalized_domain] = descriptor
+                domain_by_id[row.id] = descriptor.normalized_domain
+        self._by_domain = by_domain
+        self._domain_by_id = domain_by_id
+
+    def apply(self, website: Website) -> None:
+        """Reflect a committed write from this process without waiting for the next refresh."""
+        row = SimpleNamespace(
+            id=website.id, owner_id=website.owner_id, domain=website.domain,
+            normalized_domain=website.normalized_domain, name=website.name, status=website.status,
+            tenant_db_name=website.tenant_db_name, is_active=website.is_active
+        )
+        with self._lock:
+            self._apply_seq += 1
+            self._applied.append((self._apply_seq, row))
+            self._merge([row], full=False)
+
+    def refresh(self, db: Session, full: bool = False) -> int:
+        """Load rows changed since the last refresh (or everything when `full`)."""
+        query = db.query(
+            Website.id, Website.owner_id, Website.domain, Website.normalized_domain,
+            Website.name, Website.status, Website.tenant_db_name, Website.is_active,
+            Website.last_updated
+        )
+        full = full or self._watermark is None
+        if not full:
+            query = query.filter(Website.last_updated >= self._watermark - self.WATERMARK_OVERLAP)
+        with self._lock:
+            started = self._apply_seq
+        rows = query.all()
+
+        with self._lock:
+            self._merge(rows, full=full)
+            # Replay writes applied while the query ran; older ones are in the rows
+            replay = [row for seq, row in self._applied if seq > started]
+            if replay:
+                self._merge(replay, full=False)
+            self._applied = [(seq, row) for seq, row in self._applied if seq > started]
+            stamps = [row.last_updated for row in rows if row.last_updated is not None]
+            if stamps:
+                self._watermark = max([self._watermark] + stamps if self._watermark else stamps)
+        if full:
+            self._last_full_reload = time.monotonic()
+            logger.info(f"Domain resolver loaded {len(self._by_domain)} domains")
+        return len(rows)
+
+    def _refresh_with_session(self) -> None:
+        from app.db.session import SessionLocal
+        db = SessionLocal()
+        try:
+            full = time.monotonic() - self._last_full_reload >= self.full_reload_interval
+            self.refresh(db, full=full)
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self._refresh_with_session)
+            except Exception as e:
+                logger.error(f"Domain resolver refresh failed: {e}")
+
+    def start(self) -> None:
+        """Initial full load followed by a background refresh task (call from startup)."""
+        try:
+            self._refresh_with_session()
+        except Exception as e:
+            logger.error(f"Domain resolver initial load failed: {e}")
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class TenantResolverMiddleware:
+    """
+    Pure ASGI middleware that resolves the Host header to a tenant and exposes it
+    as `request.state.tenant` (None when the host is not a known website domain).
+    """
+
+    def __init__(self, app, resolver: DomainResolver):
+        self.app = app
+        self.resolver = resolver
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            host = None
+            for name, value in scope["headers"]:
+                if name == b"host":
+                    host = value.decode("latin-1")
+                    break
+            scope.setdefault("state", {})["tenant"] = self.resolver.resolve(host)
+        await self.app(scope, receive, send)
+
+
+# Global instance
+domain_resolver = DomainResolver(
+    refresh_interval=settings.DOMAIN_RESOLVER_REFRESH_SECONDS,
+    full_reload_interval=settings.DOMAIN_RESOLVER_FULL_RELOAD_SECONDS,
+)
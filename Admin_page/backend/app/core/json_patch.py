@@ -0,0 +1,314 @@
+import copy
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# JSON columns on the websites table that can be edited with JSON Patch (RFC 6902)
+PATCHABLE_COLUMNS = {
+    'photo_gallery_urls': 'array',
+    'services_offerings': 'array',
+    'team_members': 'array',
+    'social_media_links': 'object',
+}
+
+SUPPORTED_OPS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+# Operations MySQL can apply in place with JSON_SET / JSON_ARRAY_APPEND / etc.
+SQL_OPS = ('add', 'remove', 'replace')
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch document is malformed or cannot be applied."""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """Raised when a 'test' operation does not match the current value."""
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer (RFC 6901) into unescaped reference tokens."""
+    if pointer == '':
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith('/'):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _is_index(token: str) -> bool:
+    return token.isdigit() and (token == '0' or not token.startswith('0'))
+
+
+def split_column_path(path: str) -> Tuple[str, List[str]]:
+    """Return (column, tokens inside the column) for a patch path like /team_members/2/name."""
+    tokens = parse_pointer(path)
+    if not tokens or tokens[0] not in PATCHABLE_COLUMNS:
+        raise JsonPatchError(
+            f"Path {path!r} must start with one of: {', '.join(sorted(PATCHABLE_COLUMNS))}"
+        )
+    return tokens[0], tokens[1:]
+
+
+def validate_operations(operations: List[Dict[str, Any]]) -> None:
+    """Check the shape of every operation before anything touches the database."""
+    if not isinstance(operations, list) or not operations:
+        raise JsonPatchError("Patch document must be a non-empty array of operations")
+    for op in operations:
+        if not isinstance(op, dict) or op.get('op') not in SUPPORTED_OPS:
+            raise JsonPatchError(f"Unsupported patch operation: {op!r}")
+        if 'path' not in op:
+            raise JsonPatchError(f"Operation {op['op']!r} is missing 'path'")
+        split_column_path(op['path'])
+        if op['op'] in ('add', 'replace', 'test') and 'value' not in op:
+            raise JsonPatchError(f"Operation {op['op']!r} on {op['path']!r} is missing 'value'")
+        if op['op'] in ('move', 'copy'):
+            if 'from' not in op:
+                raise JsonPatchError(f"Operation {op['op']!r} on {op['path']!r} is missing 'from'")
+            from_column, _ = split_column_path(op['from'])
+            if from_column != split_column_path(op['path'])[0]:
+                raise JsonPatchError("'move' and 'copy' must stay within a single column")
+
+
+# ---------------------------------------------------------------------------
+# In-process application (used when the patch cannot be expressed in SQL)
+# ---------------------------------------------------------------------------
+
+def _resolve_parent(document: Any, tokens: List[str], path: str):
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, list):
+            if not _is_index(token) or int(token) >= len(target):
+                raise JsonPatchError(f"Path not found: {path}")
+            target = target[int(token)]
+        elif isinstance(target, dict):
+            if token not in target:
+                raise JsonPatchError(f"Path not found: {path}")
+            target = target[token]
+        else:
+            raise JsonPatchError(f"Path not found: {path}")
+    return target
+
+
+def _get(document: Any, tokens: List[str], path: str) -> Any:
+    if not tokens:
+        return document
+    parent = _resolve_parent(document, tokens, path)
+    last = tokens[-1]
+    if isinstance(parent, list):
+        if not _is_index(last) or int(last) >= len(parent):
+            raise JsonPatchError(f"Path not found: {path}")
+        return parent[int(last)]
+    if isinstance(parent, dict) and last in parent:
+        return parent[last]
+    raise JsonPatchError(f"Path not found: {path}")
+
+
+def _add(document: Any, tokens: List[str], value: Any, path: str) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve_parent(document, tokens, path)
+    last = tokens[-1]
+    if isinstance(parent, list):
+        if last == '-':
+            parent.append(value)
+        elif _is_index(last) and int(last) <= len(parent):
+            parent.insert(int(last), value)
+        else:
+            raise JsonPatchError(f"Invalid array index in path: {path}")
+    elif isinstance(parent, dict):
+        parent[last] = value
+    else:
+        raise JsonPatchError(f"Path not found: {path}")
+    return document
+
+
+def _remove(document: Any, tokens: List[str], path: str) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove a whole column; use 'replace' instead")
+    parent = _resolve_parent(document, tokens, path)
+    last = tokens[-1]
+    if isinstance(parent, list):
+        if not _is_index(last) or int(last) >= len(parent):
+            raise JsonPatchError(f"Path not found: {path}")
+        del parent[int(last)]
+    elif isinstance(parent, dict) and last in parent:
+        del parent[last]
+    else:
+        raise JsonPatchError(f"Path not found: {path}")
+    return document
+
+
+def apply_patch(columns: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply operations to a {column: value} mapping and return the patched copy.
+    Every column touched by the patch must be present in `columns`.
+    """
+    result = copy.deepcopy(columns)
+    for op in operations:
+        column, tokens = split_column_path(op['path'])
+        document = result.get(column)
+        if document is None:
+            document = [] if PATCHABLE_COLUMNS[column] == 'array' else {}
+        name = op['op']
+        if name == 'add':
+            document = _add(document, tokens, copy.deepcopy(op['value']), op['path'])
+        elif name == 'remove':
+            document = _remove(document, tokens, op['path'])
+        elif name == 'replace':
+            _get(document, tokens, op['path'])
+            if tokens:
+                document = _remove(document, tokens, op['path'])
+            document = _add(document, tokens, copy.deepcopy(op['value']), op['path'])
+        elif name == 'move':
+            _, from_tokens = split_column_path(op['from'])
+            if tokens[:len(from_tokens)] == from_tokens and tokens != from_tokens:
+                raise JsonPatchError(f"Cannot move {op['from']!r} into one of its children")
+            value = _get(document, from_tokens, op['from'])
+            document = _remove(document, from_tokens, op['from'])
+            document = _add(document, tokens, value, op['path'])
+        elif name == 'copy':
+            _, from_tokens = split_column_path(op['from'])
+            value = copy.deepcopy(_get(document, from_tokens, op['from']))
+            document = _add(document, tokens, value, op['path'])
+        elif name == 'test':
+            if _get(document, tokens, op['path']) != op['value']:
+                raise JsonPatchTestFailed(f"Test failed at {op['path']}")
+        result[column] = document
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Translation to MySQL JSON functions
+# ---------------------------------------------------------------------------
+
+def to_mysql_path(tokens: List[str]) -> str:
+    """Convert pointer tokens into a MySQL JSON path. Numeric tokens are treated as array indexes."""
+    parts = ['$']
+    for token in tokens:
+        if _is_index(token):
+            parts.append(f'[{token}]')
+        elif token == '-':
+            parts.append('[last]')
+        else:
+            escaped = token.replace('\\', '\\\\').replace('"', '\\"')
+            parts.append(f'."{escaped}"')
+    return ''.join(parts)
+
+
+def _changes_array_length(op: Dict[str, Any], tokens: List[str]) -> bool:
+    if not tokens:
+        return False
+    last = tokens[-1]
+    return (op['op'] == 'add' and (last == '-' or _is_index(last))) or \
+           (op['op'] == 'remove' and _is_index(last))
+
+
+def _overlaps(a: List[str], b: List[str]) -> bool:
+    shortest = min(len(a), len(b))
+    return a[:shortest] == b[:shortest]
+
+
+def _container_type(token: str) -> str:
+    """JSON_TYPE a container must have for `token` to be applied to it in SQL."""
+    return 'ARRAY' if token == '-' or _is_index(token) else 'OBJECT'
+
+
+def _type_conditions(column: str, tokens: List[str], empty: str, typed: Dict[str, str], params: Dict[str, Any]) -> List[str]:
+    """
+    Require every container along `tokens` to be the type the MySQL path assumes.
+
+    MySQL reads `[n]` on a non-array and `."key"` on a non-object leniently and
+    the JSON_* functions then silently do nothing, so a numeric token meant as
+    an object key (or a key under a scalar) must fail the WHERE clause and be
+    handled by apply_patch instead.
+    """
+    conditions = []
+    for i, token in enumerate(tokens):
+        container = to_mysql_path(tokens[:i])
+        if container in typed:
+            continue
+        key = f't{len(params)}'
+        params[key] = container
+        typed[container] = key
+        source = f'COALESCE({column}, {empty})' if not tokens[:i] else column
+        conditions.append(f"JSON_TYPE(JSON_EXTRACT({source}, :{key})) = '{_container_type(token)}'")
+    return conditions
+
+
+def plan_sql_update(operations: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Build the SQL fragments needed to apply the patch in a single UPDATE, or return
+    None when the patch has to be applied in Python.
+
+    The SQL path is only used when operations are independent of each other: no two
+    operations touch overlapping paths within a column, and an operation that changes
+    an array's length (insert/append/remove of an element) is the last one on its
+    column. Under those rules every existence check can be evaluated against the
+    stored document, so one `UPDATE ... WHERE JSON_CONTAINS_PATH(...)` is equivalent
+    to applying the operations in order. The WHERE clause also checks that each
+    container on a path is an array or an object as the MySQL path assumes; when
+    any check fails no row is updated and the caller falls back to apply_patch.
+    """
+    if any(op['op'] not in SQL_OPS for op in operations):
+        return None
+
+    per_column: Dict[str, List[Tuple[Dict[str, Any], List[str]]]] = {}
+    for op in operations:
+        column, tokens = split_column_path(op['path'])
+        per_column.setdefault(column, []).append((op, tokens))
+
+    assignments: Dict[str, str] = {}
+    conditions: List[str] = []
+    params: Dict[str, Any] = {}
+    counter = 0
+
+    for column, column_ops in per_column.items():
+        for i, (op, tokens) in enumerate(column_ops):
+            for _, other in column_ops[i + 1:]:
+                if _overlaps(tokens, other):
+                    return None
+            if _changes_array_length(op, tokens) and i != len(column_ops) - 1:
+                return None
+
+        empty = 'JSON_ARRAY()' if PATCHABLE_COLUMNS[column] == 'array' else 'JSON_OBJECT()'
+        expr = f'COALESCE({column}, {empty})'
+        typed: Dict[str, str] = {}
+        for op, tokens in column_ops:
+            counter += 1
+            path_key, value_key = f'p{counter}', f'v{counter}'
+            if op['op'] != 'remove':
+                params[value_key] = json.dumps(op['value'])
+            value_sql = f'CAST(:{value_key} AS JSON)'
+
+            if not tokens:
+                if op['op'] == 'remove':
+                    return None
+                expr = value_sql
+                continue
+
+            conditions.extend(_type_conditions(column, tokens, empty, typed, params))
+            params[path_key] = to_mysql_path(tokens)
+            last = tokens[-1]
+            if op['op'] == 'remove':
+                conditions.append(f'JSON_CONTAINS_PATH({column}, \'one\', :{path_key})')
+                expr = f'JSON_REMOVE({expr}, :{path_key})'
+            elif op['op'] == 'replace':
+                conditions.append(f'JSON_CONTAINS_PATH({column}, \'one\', :{path_key})')
+                expr = f'JSON_REPLACE({expr}, :{path_key}, {value_sql})'
+            elif last == '-':
+                params[path_key] = to_mysql_path(tokens[:-1])
+                if tokens[:-1]:
+                    conditions.append(f'JSON_CONTAINS_PATH({column}, \'one\', :{path_key})')
+                expr = f'JSON_ARRAY_APPEND({expr}, :{path_key}, {value_sql})'
+            elif _is_index(last):
+                parent_key = f'{path_key}_parent'
+                params[parent_key] = to_mysql_path(tokens[:-1])
+                conditions.append(f'JSON_LENGTH({column}, :{parent_key}) >= {int(last)}')
+                expr = f'JSON_ARRAY_INSERT({expr}, :{path_key}, {value_sql})'
+            else:
+                if tokens[:-1]:
+                    parent_key = f'{path_key}_parent'
+                    params[parent_key] = to_mysql_path(tokens[:-1])
+                    conditions.append(f'JSON_CONTAINS_PATH({column}, \'one\', :{parent_key})')
+                expr = f'JSON_SET({expr}, :{path_key}, {value_sql})'
+        assignments[column] = expr
+
+    return {'assignments': assignments, 'conditions': conditions, 'params': params}
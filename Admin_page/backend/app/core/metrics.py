@@ -0,0 +1,313 @@
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LabelValues = Tuple[str, ...]
+
+# Request latency buckets in seconds (sub-millisecond to the 10s worker timeout range)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    """Base for a metric family: a name, help text, label names and one child per label combination."""
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Any]] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._function = function
+        self._children: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any):
+        """Child metric for one combination of label values."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _values(self) -> Iterable[Tuple[LabelValues, float]]:
+        """(label values, value) pairs, read from the callback when there is one."""
+        if self._function is None:
+            return [(key, child.value) for key, child in list(self._children.items())]
+        result = self._function()
+        if isinstance(result, dict):
+            return [((key,) if not isinstance(key, tuple) else key, value) for key, value in result.items()]
+        return [((), result)]
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values()
+            if value is not None
+        ]
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter. With `function`, the value (or a dict of label values to
+    values) is read from an existing component's counters at collection time.
+    """
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; with `function`, read at collection time."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot: above the largest bound
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, exported as cumulative bucket counts."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        labelnames = self.labelnames + ("le",)
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(labelnames, key + (_format_value(bound),))} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metric families of this process, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], Any]] = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, function))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], Any]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = metric.samples()
+            except Exception as e:  # A failing callback must not break the whole scrape
+                samples = []
+                lines.append(f"# {metric.name} collection failed: {_escape(str(e))}")
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+# Content type of the Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Global registry and the metrics shared by every service
+registry = MetricsRegistry()
+
+_start_time = time.time()
+registry.gauge("process_start_time_seconds", "Start time of the process since the Unix epoch", function=lambda: _start_time)
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ("method", "route", "status"),
+)
+
+_db_checkouts = registry.counter("db_pool_checkouts_total", "Connections checked out of the pool", ("pool",))
+_db_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection (includes the pre-ping)",
+    ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+_db_pools: Dict[str, List[Engine]] = {}
+
+
+def _pool_gauge(method: str) -> Callable[[], Dict[str, float]]:
+    def collect() -> Dict[str, float]:
+        values = {}
+        for label, engines in list(_db_pools.items()):
+            total = 0.0
+            for engine in engines:
+                reader = getattr(engine.pool, method, None)
+                if reader is not None:
+                    total += max(0, reader())  # overflow() is negative until the pool is full
+            values[label] = total
+        return values
+    return collect
+
+
+registry.gauge("db_pool_checked_out", "Connections currently checked out", ("pool",), function=_pool_gauge("checkedout"))
+registry.gauge("db_pool_size", "Configured pool size", ("pool",), function=_pool_gauge("size"))
+registry.gauge("db_pool_overflow", "Connections open beyond the pool size", ("pool",), function=_pool_gauge("overflow"))
+
+
+def instrument_engine(engine: Engine, pool: str = "main") -> None:
+    """
+    Record checkouts and checkout wait time of an engine's connection pool.
+
+    Engines sharing a `pool` label (e.g. one per tenant) are reported together.
+    """
+    checkouts = _db_checkouts.labels(pool)
+    wait = _db_checkout_wait.labels(pool)
+
+    def wrap_connect(target_pool) -> None:
+        connect = target_pool.connect
+
+        def timed_connect():
+            start = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                wait.observe(time.perf_counter() - start)
+
+        target_pool.connect = timed_connect
+
+    wrap_connect(engine.pool)
+    event.listen(engine, "checkout", lambda *args: checkouts.inc())
+    # dispose() replaces the pool object; time the new one as well
+    event.listen(engine, "engine_disposed", lambda eng: wrap_connect(eng.pool))
+    _db_pools.setdefault(pool, []).append(engine)
+
+
+def forget_engine(engine: Engine) -> None:
+    """Stop reporting pool gauges for a disposed engine."""
+    for engines in _db_pools.values():
+        if engine in engines:
+            engines.remove(engine)
+
+
+def route_label(scope) -> str:
+    """Route template of a handled request (e.g. /api/v1/users/{user_id}); bounded label cardinality."""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or getattr(route, "path", "unmatched")
+    return "unmatched"
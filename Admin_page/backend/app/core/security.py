@@ -1,16 +1,17 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
+from app.core.password_policy import password_policy
+from app.core.token_cache import TokenRevoked, verified_token_cache
 
 # JWT Configuration
 SECRET_KEY = "your-secret-key-here"  # In production, use a secure secret key from environment variables
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # Token expires after 30 minutes
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (configured by the hashing policy, see password_policy.py)
+pwd_context = password_policy.context
 
 class Token(BaseModel):
     access_token: str
@@ -38,18 +39,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _decode_token(token: str) -> dict:
+    """Full signature and expiry check; only reached on a token cache miss."""
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 def verify_token(token: str) -> Optional[TokenData]:
     """Verify and decode a JWT token."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = verified_token_cache.decode(token, _decode_token)
         username: str = payload.get("sub")
         role: str = payload.get("role")  # Extract role from token
         if username is None:
             return None
         return TokenData(username=username, role=role)  # Include role in token data
-    except JWTError:
+    except (JWTError, TokenRevoked):
         return None 
\ No newline at end of file
@@ -0,0 +1,243 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.domain_resolver import normalize_domain
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class _Flight:
+    """A load in progress; concurrent callers for the same key wait on it instead of querying MySQL."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class PublishedConfigCache:
+    """
+    Read-through cache for published website configuration, keyed by domain.
+
+    Lookups go through two tiers:
+    1. an in-process LRU with a short TTL (bounds staleness across workers), then
+    2. a shared Redis-compatible store (optional, enabled by REDIS_URL),
+    and only then call the loader. Concurrent misses for the same domain are coalesced
+    so that a single caller runs the loader while the others wait for its result.
+    Unknown domains are cached as None for a short negative TTL.
+
+    Each key also has a generation, bumped by invalidate() both locally and in
+    the shared store. A loaded value is written back only if neither
+    generation moved while it was loading, so a load that raced with an edit
+    (in this process or another) cannot put the old config back.
+    """
+
+    KEY_PREFIX = "site_config:"
+    GENERATION_PREFIX = "site_config_gen:"
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        local_ttl: int = 30,
+        shared_ttl: int = 3600,
+        negative_ttl: int = 10,
+        redis_url: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self.negative_ttl = negative_ttl
+        self.redis_url = redis_url
+        self._redis = None
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(domain: str) -> str:
+        return normalize_domain(domain) or ""
+
+    # -- shared tier -------------------------------------------------------
+
+    def _get_redis(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.1, socket_connect_timeout=0.1
+            )
+        return self._redis
+
+    def _get_shared(self, key: str) -> Any:
+        client = self._get_redis()
+        if client is None:
+            return _MISSING
+        try:
+            raw = client.get(self.KEY_PREFIX + key)
+        except Exception as e:
+            logger.warning(f"Shared site config cache unavailable: {e}")
+            return _MISSING
+        if raw is None:
+            return _MISSING
+        return json.loads(raw)
+
+    def _get_shared_generation(self, key: str) -> Optional[bytes]:
+        """Shared generation of a key, read before loading it (None without a shared store)."""
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            return client.get(self.GENERATION_PREFIX + key) or b"0"
+        except Exception as e:
+            logger.warning(f"Shared site config cache unavailable: {e}")
+            return None
+
+    def _set_shared(self, key: str, value: Any, shared_generation: Optional[bytes]) -> None:
+        client = self._get_redis()
+        if client is None or shared_generation is None:
+            return
+        import redis
+
+        ttl = self.shared_ttl if value is not None else self.negative_ttl
+        generation_key = self.GENERATION_PREFIX + key
+        try:
+            with client.pipeline() as pipe:
+                # Write only if no invalidate() ran since the generation was read
+                pipe.watch(generation_key)
+                if (pipe.get(generation_key) or b"0") != shared_generation:
+                    return
+                pipe.multi()
+                pipe.set(self.KEY_PREFIX + key, json.dumps(value, default=str), ex=ttl)
+                pipe.execute()
+        except redis.WatchError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to write site config for {key} to shared cache: {e}")
+
+    def _delete_shared(self, key: str) -> None:
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            with client.pipeline() as pipe:
+                pipe.incr(self.GENERATION_PREFIX + key)
+                # Outlives any value written under the old generation
+                pipe.expire(self.GENERATION_PREFIX + key, self.shared_ttl)
+                pipe.delete(self.KEY_PREFIX + key)
+                pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to invalidate site config for {key} in shared cache: {e}")
+
+    def _is_current(self, key: str, generation: int) -> bool:
+        with self._lock:
+            return self._generations.get(key, 0) == generation
+
+    # -- local tier --------------------------------------------------------
+
+    def _get_local(self, key: str) -> Any:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: Any, generation: int) -> None:
+        ttl = self.local_ttl if value is not None else self.negative_ttl
+        with self._lock:
+            # Skip the write if the key was invalidated while the value was being loaded
+            if self._generations.get(key, 0) != generation:
+                return
+            self._local[key] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    # -- public API --------------------------------------------------------
+
+    def get(self, domain: str, loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Return the cached config for `domain`, calling `loader(key)` on a full miss."""
+        key = self.make_key(domain)
+        value = self._get_local(key)
+        if value is not _MISSING:
+            self.stats["local_hits"] += 1
+            return value
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+            generation = self._generations.get(key, 0)
+
+        if not leader:
+            self.stats["coalesced"] += 1
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = self._get_shared(key)
+            if value is not _MISSING:
+                self.stats["shared_hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                shared_generation = self._get_shared_generation(key)
+                value = loader(key)
+                # Skip the shared write if this process invalidated the key mid-load
+                if self._is_current(key, generation):
+                    self._set_shared(key, value, shared_generation)
+            self._set_local(key, value, generation)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def invalidate(self, *domains: Optional[str]) -> None:
+        """Drop cached config for the given domains from both tiers."""
+        for domain in domains:
+            if not domain:
+                continue
+            key = self.make_key(domain)
+            with self._lock:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._local.pop(key, None)
+            self._delete_shared(key)
+            self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in self._local:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._local.clear()
+
+
+# Global instance
+published_config_cache = PublishedConfigCache(
+    max_entries=settings.SITE_CONFIG_LOCAL_MAX_ENTRIES,
+    local_ttl=settings.SITE_CONFIG_LOCAL_TTL_SECONDS,
+    shared_ttl=settings.SITE_CONFIG_SHARED_TTL_SECONDS,
+    negative_ttl=settings.SITE_CONFIG_NEGATIVE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL,
+)
@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; bundles are then published with gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_DOMAIN_RE = re.compile(r'^[a-z0-9][a-z0-9.-]{0,252}$')
+_DIGEST_RE = re.compile(r'^[0-9a-f]{20}$')
+
+# Precompressed variants in order of preference: (Content-Encoding, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class SitePublisher:
+    """
+    Compiles published websites into immutable, content-hashed JSON bundles on disk.
+
+    Layout under PUBLISH_DIR:
+        <domain>/<digest>.json      canonical bundle
+        <domain>/<digest>.json.gz   gzip variant
+        <domain>/<digest>.json.br   brotli variant (when brotli is installed)
+        <domain>/current            pointer to the live digest
+
+    Bundles are never rewritten once created. Re-publishing writes a new bundle and
+    swaps the `current` pointer with an atomic rename, so readers always see either the
+    old or the new bundle; identical content maps to the same digest and writes nothing.
+    A bundle that stops being live is stamped with the time it was retired and deleted
+    `retention` seconds later, so clients still holding its URL keep working for a
+    while. The directory can also be served directly by a web server.
+    """
+
+    POINTER = 'current'
+
+    def __init__(self, root: str, retention: int = 86400):
+        self.root = os.path.abspath(root)
+        self.retention = retention
+        self._pointers: Dict[str, Tuple[int, str]] = {}
+
+    def _domain_dir(self, domain: str) -> str:
+        key = (domain or '').strip().lower()
+        if not _DOMAIN_RE.match(key) or '..' in key:
+            raise ValueError(f"Invalid domain for publishing: {domain!r}")
+        return os.path.join(self.root, key)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(data)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def encode_bundle(bundle: Dict[str, Any]) -> Tuple[str, bytes]:
+        """Serialize a bundle deterministically and return (digest, body)."""
+        body = json.dumps(bundle, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+        return hashlib.sha256(body).hexdigest()[:20], body
+
+    def publish(self, domain: str, bundle: Dict[str, Any]) -> str:
+        """Write the bundle (and its compressed variants) and make it the live version."""
+        directory = self._domain_dir(domain)
+        os.makedirs(directory, exist_ok=True)
+        digest, body = self.encode_bundle(bundle)
+        base = os.path.join(directory, f'{digest}.json')
+
+        if not os.path.exists(base):
+            self._write_atomic(base + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self._write_atomic(base + '.br', brotli.compress(body, quality=11))
+            # The canonical file goes last: its presence marks a complete bundle
+            self._write_atomic(base, body)
+
+        previous = self._read_pointer(directory)
+        if previous != digest:
+            self._write_atomic(os.path.join(directory, self.POINTER), digest.encode('ascii'))
+            self._retire(directory, previous)
+            logger.info(f"Published bundle {digest} for domain {domain} ({len(body)} bytes)")
+        self.prune(directory, keep=digest)
+        return digest
+
+    def unpublish(self, domain: str) -> None:
+        """Remove the live pointer; the last bundle is kept for the retention period."""
+        try:
+            directory = self._domain_dir(domain)
+        except ValueError:
+            return
+        previous = self._read_pointer(directory)
+        try:
+            os.unlink(os.path.join(directory, self.POINTER))
+        except FileNotFoundError:
+            pass
+        self._retire(directory, previous)
+        self._pointers.pop((domain or '').strip().lower(), None)
+        self.prune(directory)
+
+    def _read_pointer(self, directory: str) -> Optional[str]:
+        try:
+            with open(os.path.join(directory, self.POINTER), 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _bundle_paths(directory: str, digest: str) -> List[str]:
+        base = os.path.join(directory, f'{digest}.json')
+        return [base] + [base + suffix for _, suffix in ENCODINGS]
+
+    def _retire(self, directory: str, digest: Optional[str]) -> None:
+        """Stamp a bundle that is no longer live; its mtime starts the retention period."""
+        if not digest or not _DIGEST_RE.match(digest):
+            return
+        for path in self._bundle_paths(directory, digest):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+    def prune(self, directory: str, keep: Optional[str] = None) -> int:
+        """Delete bundles other than `keep` that were retired more than `retention` seconds ago."""
+        cutoff = time.time() - self.retention
+        removed = 0
+        for name in os.listdir(directory):
+            digest = name.split('.', 1)[0]
+            if digest == keep or not _DIGEST_RE.match(digest) or not name.startswith(f'{digest}.json'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.unlink(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        if removed:
+            logger.info(f"Removed {removed} expired bundle file(s) from {directory}")
+        return removed
+
+    def current_digest(self, domain: str) -> Optional[str]:
+        """Digest of the live bundle, re-reading the pointer only when its mtime changes."""
+        try:
+            pointer = os.path.join(self._domain_dir(domain), self.POINTER)
+            mtime = os.stat(pointer).st_mtime_ns
+        except (FileNotFoundError, ValueError):
+            return None
+        key = domain.strip().lower()
+        cached = self._pointers.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(pointer, 'r') as f:
+            digest = f.read().strip()
+        self._pointers[key] = (mtime, digest)
+        return digest
+
+    def bundle_file(self, domain: str, digest: str, accept_encoding: str = '') -> Optional[Tuple[str, Optional[str]]]:
+        """Return (path, content_encoding) of the best precompressed variant the client accepts."""
+        if not _DIGEST_RE.match(digest or ''):
+            return None
+        try:
+            base = os.path.join(self._domain_dir(domain), f'{digest}.json')
+        except ValueError:
+            return None
+        if not os.path.exists(base):
+            return None
+        accepted = {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.exists(base + suffix):
+                return base + suffix, encoding
+        return base, None
+
+
+def compile_bundle(domain: str, pages: List[Any], serialize: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+    """Bundle a website's pages (ordered by page_no) into one document.
+
+    `serialize` decides which fields of a page are published; bundles are
+    public, so it must be an allowlist.
+    """
+    ordered = sorted(pages, key=lambda w: (w.page_no is None, w.page_no or 0, w.id))
+    records = [serialize(w) for w in ordered]
+    return {
+        'domain': domain.strip().lower(),
+        'website': records[0] if records else None,
+        'pages': records,
+    }
+
+
+# Global instance
+site_publisher = SitePublisher(settings.PUBLISH_DIR, retention=settings.PUBLISH_RETENTION_SECONDS)
@@ -1,12 +1,23 @@
 from sqlalchemy.orm import Session
 from app.models.website import Website
-from sqlalchemy import and_
+from app.core.json_patch import apply_patch, plan_sql_update, split_column_path, validate_operations
+from app.core.site_cache import published_config_cache
+from app.core.site_publisher import site_publisher, compile_bundle
+from app.core.domain_resolver import domain_resolver, normalize_domain
+from app.db.session import SessionLocal
+from sqlalchemy import and_, text
 from datetime import datetime
 
+def _sync_normalized_domain(website: Website):
+    """Keep the unique routing key in step with domain/is_active (inactive rows release their domain)."""
+    active = website.is_active is not False
+    website.normalized_domain = normalize_domain(website.domain) if active else None
+
 def upsert_website_for_user(db: Session, user_id: int, page_no: int, data: dict):
     # Try to find an existing website for this user and page_no
     website = db.query(Website).filter(and_(Website.owner_id == user_id, Website.page_no == page_no)).first()
     if website:
+        previous_domain = website.domain
         # Update only provided fields
         for key, value in data.items():
             if hasattr(website, key) and value is not None:
@@ -16,8 +27,11 @@ def upsert_website_for_user(db: Session, user_id: int, page_no: int, data: dict)
         if page_no == 1:
             website.created_at = db.func.now()
             website.is_active = True
+        _sync_normalized_domain(website)
         db.commit()
         db.refresh(website)
+        published_config_cache.invalidate(previous_domain, website.domain)
+        domain_resolver.apply(website)
         return website
     else:
         # Insert new website row with only provided fields
@@ -30,9 +44,12 @@ def upsert_website_for_user(db: Session, user_id: int, page_no: int, data: dict)
             fields['created_at'] = db.func.now()
             fields['is_active'] = True
         website = Website(**fields)
+        _sync_normalized_domain(website)
         db.add(website)
         db.commit()
         db.refresh(website)
+        published_config_cache.invalidate(website.domain)
+        domain_resolver.apply(website)
         return website
 
 def create_website_with_defaults(db: Session, user_id: int, data: dict):
@@ -59,9 +76,11 @@ def create_website_with_defaults(db: Session, user_id: int, data: dict):
     fields = {**defaults, **{k: v for k, v in data.items() if hasattr(Website, k) and v is not None}}
     
     website = Website(**fields)
+    _sync_normalized_domain(website)
     db.add(website)
     db.commit()
     db.refresh(website)
+    domain_resolver.apply(website)
     return website
 
 def update_website_by_id(db: Session, website_id: int, user_id: int, data: dict):
@@ -72,16 +91,102 @@ def update_website_by_id(db: Session, website_id: int, user_id: int, data: dict)
     if not website:
         return None
     
+    previous_domain = website.domain
     # Update only provided fields
     for key, value in data.items():
         if hasattr(website, key) and value is not None:
             setattr(website, key, value)
     
     website.last_updated = datetime.utcnow()
+    _sync_normalized_domain(website)
     db.commit()
     db.refresh(website)
+    published_config_cache.invalidate(previous_domain, website.domain)
+    domain_resolver.apply(website)
     return website
 
+def patch_website_json_columns(db: Session, website_id: int, user_id: int, operations: list):
+    """
+    Apply a JSON Patch (RFC 6902) to the JSON columns of a website, ensuring the user owns it.
+    Paths start with the column name, e.g. /team_members/2/name.
+
+    When the operations can be expressed with MySQL JSON functions, only the delta is sent
+    in a single UPDATE. Otherwise (or when a path precondition fails in SQL) the row is locked,
+    patched in Python and the touched columns are written back.
+    Raises JsonPatchError if the patch is invalid; returns None if the website is not found.
+    """
+    validate_operations(operations)
+
+    plan = plan_sql_update(operations)
+    if plan is not None:
+        set_clause = ', '.join(f"{column} = {expr}" for column, expr in plan['assignments'].items())
+        where_clause = ' AND '.join(['id = :website_id', 'owner_id = :owner_id'] + plan['conditions'])
+        params = {**plan['params'], 'website_id': website_id, 'owner_id': user_id}
+        result = db.execute(
+            text(f"UPDATE websites SET {set_clause}, last_updated = NOW() WHERE {where_clause}"),
+            params
+        )
+        if result.rowcount:
+            domain = db.execute(
+                text("SELECT domain FROM websites WHERE id = :website_id"), {'website_id': website_id}
+            ).scalar()
+            db.commit()
+            published_config_cache.invalidate(domain)
+            return True
+        db.rollback()
+
+    website = db.query(Website).filter(
+        and_(Website.id == website_id, Website.owner_id == user_id)
+    ).with_for_update().first()
+    if not website:
+        db.rollback()
+        return None
+
+    touched = {split_column_path(op['path'])[0] for op in operations}
+    try:
+        patched = apply_patch({column: getattr(website, column) for column in touched}, operations)
+    except Exception:
+        db.rollback()
+        raise
+    for column, value in patched.items():
+        setattr(website, column, value)
+    website.last_updated = datetime.utcnow()
+    db.commit()
+    published_config_cache.invalidate(website.domain)
+    return True
+
+def get_tenant_by_domain(db: Session, domain: str):
+    """
+    Resolve a domain to its tenant descriptor from the in-memory map, falling back to
+    the unique normalized_domain index for rows written by another instance since the
+    last refresh. Returns None for unknown or inactive domains.
+    """
+    tenant = domain_resolver.resolve(domain)
+    if tenant is not None:
+        return tenant
+    key = normalize_domain(domain)
+    if key is None:
+        return None
+    website = db.query(Website).filter(Website.normalized_domain == key).first()
+    if website is None:
+        return None
+    domain_resolver.apply(website)
+    return domain_resolver.resolve(key)
+
+def set_tenant_db_name(db: Session, website: Website, db_name: str) -> str:
+    """
+    Record the client database of a freshly provisioned tenant. The first writer wins,
+    so concurrent provisioning of the same website settles on a single name.
+    Returns the stored name.
+    """
+    db.query(Website).filter(
+        and_(Website.id == website.id, Website.tenant_db_name.is_(None))
+    ).update({'tenant_db_name': db_name, 'last_updated': datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    db.refresh(website)
+    domain_resolver.apply(website)
+    return website.tenant_db_name
+
 def get_websites_for_user(db: Session, user_id: int):
     return db.query(Website).filter(and_(Website.owner_id == user_id, Website.is_active == True)).all()
 
@@ -96,6 +201,104 @@ def delete_website_by_id(db: Session, website_id: int, user_id: int):
     # Logically delete the website by setting is_active to False
     website.is_active = False
     website.last_updated = datetime.utcnow()
+    _sync_normalized_domain(website)
     db.commit()
     db.refresh(website)
-    return True 
\ No newline at end of file
+    published_config_cache.invalidate(website.domain)
+    domain_resolver.apply(website)
+    if website.domain:
+        site_publisher.unpublish(website.domain)
+    return True
+
+def publish_website(db: Session, website_id: int, user_id: int):
+    """
+    Mark a website as published and compile its static JSON bundle, ensuring the user owns it.
+    All of the owner's active rows for the same domain are included as pages, ordered by page_no.
+    Returns (website, digest), or None if the website is not found.
+    Raises ValueError if the website has no domain.
+    """
+    website = db.query(Website).filter(and_(Website.id == website_id, Website.owner_id == user_id)).first()
+    if not website:
+        return None
+    if not website.domain:
+        raise ValueError("Website domain is required for publishing")
+
+    pages = db.query(Website).filter(and_(
+        Website.owner_id == user_id,
+        Website.domain == website.domain,
+        Website.is_active == True
+    )).all()
+    if website not in pages:
+        pages.append(website)
+    # Only pages whose status changes are touched: re-publishing unchanged content
+    # yields the same bundle digest
+    now = datetime.utcnow()
+    for page in pages:
+        if page.status != 'published':
+            page.status = 'published'
+            page.last_updated = now
+    db.commit()
+    for page in pages:
+        domain_resolver.apply(page)
+
+    digest = site_publisher.publish(website.domain, compile_bundle(website.domain, pages, serialize_bundle_page))
+    published_config_cache.invalidate(website.domain)
+    return website, digest
+
+def serialize_published_config(website: Website) -> dict:
+    """Public, render-time view of a website (no ownership, billing or bookkeeping fields)."""
+    return {
+        "name": website.name or "",
+        "domain": website.domain or "",
+        "organization_name": website.organization_name or "",
+        "organization_type": website.organization_type or "",
+        "tagline": website.tagline or "",
+        "contact_email": website.contact_email or "",
+        "contact_phone": website.contact_phone or "",
+        "address": website.address or "",
+        "logo_url": website.logo_url or "",
+        "favicon_url": website.favicon_url or "",
+        "primary_color": website.primary_color or "#0ea5e9",
+        "secondary_color": website.secondary_color or "#f0f9ff",
+        "font": website.font or "Inter",
+        "hero_image_url": website.hero_image_url or "",
+        "banner_image_url": website.banner_image_url or "",
+        "intro_text": website.intro_text or "",
+        "photo_gallery_urls": website.photo_gallery_urls or [],
+        "video_youtube_link": website.video_youtube_link or "",
+        "about": website.about or "",
+        "mission": website.mission or "",
+        "history": website.history or "",
+        "services_offerings": website.services_offerings or [],
+        "team_members": website.team_members or [],
+        "social_media_links": website.social_media_links or {},
+        "last_updated": website.last_updated.isoformat() if website.last_updated else None,
+    }
+
+def serialize_bundle_page(website: Website) -> dict:
+    """
+    One page of a published bundle: the public config fields plus the page number.
+    last_updated is left out so the bundle digest depends on content only.
+    """
+    record = serialize_published_config(website)
+    record.pop("last_updated", None)
+    return {**record, "page_no": website.page_no}
+
+def load_published_config(db: Session, domain: str):
+    """Load the published configuration for a domain straight from MySQL (cache loader)."""
+    website = db.query(Website).filter(
+        and_(Website.normalized_domain == normalize_domain(domain), Website.status == 'published')
+    ).first()
+    if not website:
+        return None
+    return serialize_published_config(website)
+
+def get_published_config(domain: str):
+    """Published configuration for a domain, served from the read-through cache."""
+    def loader(key: str):
+        db = SessionLocal()
+        try:
+            return load_published_config(db, key)
+        finally:
+            db.close()
+    return published_config_cache.get(domain, loader) 
\ No newline at end of file
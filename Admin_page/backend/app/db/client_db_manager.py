@@ -1,15 +1,25 @@
 import os
+import re
 import logging
 from typing import Optional, List, Dict, Any
 from sqlalchemy import create_engine, text, inspect, MetaData
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from app.core.config import settings
+from app.core.metrics import instrument_engine, forget_engine
 
 logger = logging.getLogger(__name__)
 
+_DB_NAME_RE = re.compile(r'^[A-Za-z0-9_]{1,64}$')
+
 class ClientDatabaseManager:
-    """Manages client-specific databases"""
+    """
+    Manages client-specific databases.
+
+    Every operation takes the tenant database name stored on the website row
+    (`websites.tenant_db_name`); the naming helpers are only used when a tenant
+    is provisioned and by the one-time backfill.
+    """
     
     def __init__(self):
         self.main_engine = create_engine(settings.database_url, echo=True)
@@ -29,6 +39,20 @@ class ClientDatabaseManager:
             # Backward compatibility for old naming convention
             return f"client_{db_name}"
     
+    def new_tenant_db_name(self, domain: str, owner_id: int) -> str:
+        """Database name for a tenant provisioned now ({domain}_{owner_id})"""
+        return self._get_client_db_name(domain, owner_id)
+    
+    def legacy_tenant_db_name(self, domain: str) -> str:
+        """Database name used by tenants provisioned before owner ids were part of the name"""
+        return self._get_client_db_name(domain)
+    
+    @staticmethod
+    def _check_db_name(db_name: str) -> str:
+        if not db_name or not _DB_NAME_RE.match(db_name):
+            raise ValueError(f"Invalid tenant database name: {db_name!r}")
+        return db_name
+    
     def _get_client_db_url(self, db_name: str) -> str:
         """Generate database URL for client database"""
         # Extract components from main database URL
@@ -40,10 +64,8 @@ class ClientDatabaseManager:
         """Generate server URL without database for creating databases"""
         return f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.MYSQL_HOST}:{settings.MYSQL_PORT}"
     
-    def database_exists(self, domain: str, owner_id: int = None) -> bool:
-        """Check if database exists for given domain and optionally owner_id"""
-        db_name = self._get_client_db_name(domain, owner_id)
-        
+    def database_exists(self, db_name: str) -> bool:
+        """Check if the tenant database exists (only needed by provisioning and maintenance)"""
         try:
             with self.main_engine.connect() as conn:
                 result = conn.execute(text(
@@ -51,14 +73,13 @@ class ClientDatabaseManager:
                 ), {"db_name": db_name})
                 return result.fetchone() is not None
         except Exception as e:
-            logger.error(f"Error checking database existence for {domain}: {e}")
+            logger.error(f"Error checking database existence for {db_name}: {e}")
             return False
     
-    def create_database(self, domain: str, owner_id: int = None) -> bool:
-        """Create database for given domain and optionally owner_id"""
-        db_name = self._get_client_db_name(domain, owner_id)
-        
+    def create_database(self, db_name: str) -> bool:
+        """Create the tenant database if it doesn't exist"""
         try:
+            self._check_db_name(db_name)
             # Create engine connecting to MySQL server (without specific database)
             server_url = self._get_server_url()
             temp_engine = create_engine(server_url, isolation_level="AUTOCOMMIT")
@@ -73,14 +94,16 @@ class ClientDatabaseManager:
             logger.error(f"Error creating database {db_name}: {e}")
             return False
     
-    def get_client_session(self, domain: str, owner_id: int = None):
-        """Get database session for client domain and optionally owner_id"""
-        db_name = self._get_client_db_name(domain, owner_id)
+    def get_client_session(self, db_name: str):
+        """Get database session for the tenant database"""
+        if not db_name:
+            return None
         
         if db_name not in self.client_sessions:
             db_url = self._get_client_db_url(db_name)
             try:
                 engine = create_engine(db_url, echo=True)
+                instrument_engine(engine, pool="tenant")
                 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
                 self.client_engines[db_name] = engine
                 self.client_sessions[db_name] = SessionLocal
@@ -95,9 +118,8 @@ class ClientDatabaseManager:
             logger.error(f"Error getting session for {db_name}: {e}")
             return None
     
-    def create_users_table_only(self, domain: str, owner_id: int = None) -> bool:
+    def create_users_table_only(self, db_name: str) -> bool:
         """Create only the users table in client database using SQL file"""
-        db_name = self._get_client_db_name(domain, owner_id)
         db_url = self._get_client_db_url(db_name)
         
         try:
@@ -153,9 +175,8 @@ class ClientDatabaseManager:
             logger.error(f"Error creating users table in {db_name}: {e}")
             return False
     
-    def create_tables(self, domain: str, owner_id: int = None) -> bool:
+    def create_tables(self, db_name: str) -> bool:
         """Create tables in client database using SQL file"""
-        db_name = self._get_client_db_name(domain, owner_id)
         db_url = self._get_client_db_url(db_name)
         
         try:
@@ -204,10 +225,10 @@ class ClientDatabaseManager:
             logger.error(f"Error creating tables in {db_name}: {e}")
             return False
     
-    def table_exists(self, domain: str, table_name: str, owner_id: int = None) -> bool:
+    def table_exists(self, db_name: str, table_name: str) -> bool:
         """Check if table exists in client database"""
         try:
-            session = self.get_client_session(domain, owner_id)
+            session = self.get_client_session(db_name)
             if session is None:
                 return False
             
@@ -217,16 +238,16 @@ class ClientDatabaseManager:
             
             return table_name in tables
         except Exception as e:
-            logger.error(f"Error checking table existence for {domain}.{table_name}: {e}")
+            logger.error(f"Error checking table existence for {db_name}.{table_name}: {e}")
             return False
     
-    def get_table_columns(self, domain: str, table_name: str, exclude_columns: List[str] = None, owner_id: int = None) -> Optional[List[Dict[str, Any]]]:
+    def get_table_columns(self, db_name: str, table_name: str, exclude_columns: List[str] = None) -> Optional[List[Dict[str, Any]]]:
         """Get column information for a table, excluding specified columns"""
         if exclude_columns is None:
             exclude_columns = []
         
         try:
-            session = self.get_client_session(domain, owner_id)
+            session = self.get_client_session(db_name)
             if session is None:
                 return None
             
@@ -249,16 +270,16 @@ class ClientDatabaseManager:
             return filtered_columns
             
         except Exception as e:
-            logger.error(f"Error getting columns for {domain}.{table_name}: {e}")
+            logger.error(f"Error getting columns for {db_name}.{table_name}: {e}")
             return None
     
-    def get_users_data(self, domain: str, owner_id: int, exclude_columns: List[str] = None) -> Optional[List[Dict[str, Any]]]:
+    def get_users_data(self, db_name: str, exclude_columns: List[str] = None) -> Optional[List[Dict[str, Any]]]:
         """Get all user records from the users table, excluding specified columns"""
         if exclude_columns is None:
             exclude_columns = ['password_hash', 'salt', 'reset_token', 'verification_token']
         
         try:
-            session = self.get_client_session(domain, owner_id)
+            session = self.get_client_session(db_name)
             if session is None:
                 return None
             
@@ -296,9 +317,15 @@ class ClientDatabaseManager:
             return users_data
             
         except Exception as e:
-            logger.error(f"Error getting users data for {domain}: {e}")
+            logger.error(f"Error getting users data for {db_name}: {e}")
             return None
     
+    def list_databases(self) -> set:
+        """All schema names on the server, in a single INFORMATION_SCHEMA query"""
+        with self.main_engine.connect() as conn:
+            result = conn.execute(text("SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA"))
+            return {row[0] for row in result}
+    
     def close_connections(self):
         """Close all client database connections"""
         for session_factory in self.client_sessions.values():
@@ -308,6 +335,7 @@ class ClientDatabaseManager:
                 pass
         
         for engine in self.client_engines.values():
+            forget_engine(engine)
             try:
                 engine.dispose()
             except:
@@ -1,16 +1,31 @@
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.api.v1.login import router as login_router
 from app.api.v1.website import router as website_router
 from app.api.v1.manage_user import router as manage_user_router
 from app.api.v1.first_users import router as first_users_router
 from app.api.v1.get_my_users import router as get_my_users_router
+from app.api.v1.site_config import router as site_config_router
 from app.core.config import settings
+from app.core.logging_config import logging_system
+from app.core.metrics import registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.core.site_cache import published_config_cache
+from app.db.client_db_manager import client_db_manager
+from app.core.domain_resolver import domain_resolver, TenantResolverMiddleware
+from app.core.edge import EdgeMiddleware
+from app.core.password_executor import password_executor
+from app.core.password_policy import password_policy
+from app.core.token_cache import verified_token_cache
 from app.db.init_db import init_db
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Set up logging (queued, written by a background thread)
+logging_system.setup(
+    level=settings.LOG_LEVEL,
+    json_output=settings.LOG_FORMAT == "json",
+    sample_rate=settings.LOG_SAMPLE_RATE,
+    queue_size=settings.LOG_QUEUE_SIZE,
+)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Admin Page API", version="1.0.0")
@@ -24,14 +39,28 @@ async def startup_event():
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
+    # Tune the password hashing cost for this machine before the hashing pool starts
+    if password_policy.calibrate() is not None:
+        password_executor.reload_policy()
+    # Load the domain -> website map and keep it refreshed in the background
+    domain_resolver.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    domain_resolver.stop()
+    password_executor.shutdown()
+
+# Resolve the Host header to a tenant (request.state.tenant) without a per-request query
+app.add_middleware(TenantResolverMiddleware, resolver=domain_resolver)
 
-# CORS setup: allow origins from config (currently ["*"], change in production)
+# Security headers, CORS and request ids: allow origins from config (currently ["*"], change in production)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    EdgeMiddleware,
+    cors_origins=settings.CORS_ORIGINS,
+    cors_allow_credentials=True,
+    cors_allow_methods=["*"],
+    cors_allow_headers=["*"],
+    cors_max_age=settings.CORS_MAX_AGE,
 )
 
 # Test endpoint to verify the app is working
@@ -42,7 +71,33 @@ async def root():
 # Test endpoint to verify API v1 routing
 @app.get("/api/v1/health")
 async def health_check():
-    return {"status": "healthy", "message": "API v1 is working"}
+    return {"status": "healthy", "message": "API v1 is working", "password_hashing": password_executor.stats(), "password_policy": password_policy.describe(), "token_cache": verified_token_cache.get_stats(), "logging": logging_system.stats()}
+
+# Component metrics, read from each component's counters when /metrics is scraped
+registry.gauge("tenant_engines", "Tenant database engines (connection pools) open in this process",
+               function=lambda: len(client_db_manager.client_engines))
+registry.gauge("password_hash_queue_depth", "Hash/verify jobs waiting for a worker",
+               function=lambda: password_executor.stats()["queue_depth"])
+registry.gauge("password_hash_running", "Hash/verify jobs running in the process pool",
+               function=lambda: password_executor.stats()["running"])
+registry.counter("password_hash_jobs_total", "Hash/verify jobs by outcome", ("outcome",),
+                 function=lambda: {k: password_executor.stats()[k] for k in ("completed", "failed", "rejected")})
+registry.counter("token_cache_lookups_total", "Verified token cache lookups by result", ("result",),
+                 function=lambda: {"hit": verified_token_cache.stats["hits"], "miss": verified_token_cache.stats["misses"]})
+registry.counter("site_config_cache_lookups_total", "Published site config lookups by result", ("result",),
+                 function=lambda: {
+                     "local_hit": published_config_cache.stats["local_hits"],
+                     "shared_hit": published_config_cache.stats["shared_hits"],
+                     "coalesced": published_config_cache.stats["coalesced"],
+                     "miss": published_config_cache.stats["misses"],
+                 })
+registry.counter("log_records_dropped_total", "Log records not written", ("reason",),
+                 function=lambda: {"sampled": logging_system.stats()["sampled_out"], "queue_full": logging_system.stats()["dropped_queue_full"]})
+
+# Prometheus metrics: request latency by route, DB pools, hashing queue and caches
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
 
 # Include routers
 logger.info("Including routers...")
@@ -51,4 +106,5 @@ app.include_router(website_router, prefix="/api/v1", tags=["websites"])
 app.include_router(manage_user_router, prefix="/api/v1", tags=["user-management"])
 app.include_router(first_users_router, prefix="/api/v1", tags=["first-users"])
 app.include_router(get_my_users_router, prefix="/api/v1", tags=["my-users"])
+app.include_router(site_config_router, prefix="/api/v1", tags=["public-site"])
 logger.info("All routers included successfully") 
\ No newline at end of file
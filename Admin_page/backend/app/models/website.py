@@ -11,7 +11,7 @@ class Website(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     name = Column(String(100), nullable=False)
     status = Column(Enum('draft', 'published', 'archived'), default='draft')
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     organization_name = Column(String(100))
     organization_type = Column(String(50))
@@ -37,6 +37,10 @@ class Website(Base):
     social_media_links = Column(JSON)
     paid_till = Column(Date)
     domain = Column(String(100))
+    # Lowercased domain without scheme/port/www; NULL unless the row is active and has a domain
+    normalized_domain = Column(String(100), unique=True)
+    # Name of the tenant's client database, set when user management is provisioned
+    tenant_db_name = Column(String(64))
     is_active = Column(Boolean, default=True)
     page_no = Column(Integer)
 
@@ -103,6 +107,7 @@ class WebsiteOut(BaseModel):
     domain: Optional[str]
     is_active: Optional[bool]
     page_no: Optional[int]
+    tenant_db_name: Optional[str] = None
 
     class Config:
         orm_mode = True 
\ No newline at end of file
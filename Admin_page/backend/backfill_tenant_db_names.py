@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+One-time backfill of websites.tenant_db_name.
+
+Tenant databases were created under two naming conventions:
+    client_{domain}          (legacy, used by manage_user)
+    {domain}_{owner_id}      (current)
+This script lists every schema on the server with a single INFORMATION_SCHEMA query,
+detects which convention each existing tenant uses (preferring the current one when
+both exist) and records the name on the website row. Websites without a tenant
+database are left NULL and get one the first time user management is initialized.
+
+Run after database/scripts/add_tenant_db_name.sql.
+
+Usage:
+    python backfill_tenant_db_names.py            # show what would change
+    python backfill_tenant_db_names.py --apply    # write tenant_db_name
+"""
+
+import sys
+
+from app.db.session import SessionLocal
+from app.db.client_db_manager import client_db_manager
+from app.models.website import Website
+
+
+def detect_tenant_db_name(website, schemas: set):
+    """Stored-name candidate for a website, or None if no tenant database exists."""
+    if not website.domain:
+        return None
+    for candidate in (
+        client_db_manager.new_tenant_db_name(website.domain, website.owner_id),
+        client_db_manager.legacy_tenant_db_name(website.domain),
+    ):
+        if candidate in schemas:
+            return candidate
+    return None
+
+
+def backfill(apply: bool) -> None:
+    schemas = client_db_manager.list_databases()
+    db = SessionLocal()
+    try:
+        websites = db.query(Website).filter(
+            Website.tenant_db_name.is_(None),
+            Website.domain.isnot(None)
+        ).all()
+
+        found = 0
+        for website in websites:
+            db_name = detect_tenant_db_name(website, schemas)
+            if db_name is None:
+                continue
+            found += 1
+            print(f"  website {website.id} ({website.domain}) -> {db_name}")
+            if apply:
+                website.tenant_db_name = db_name
+
+        if apply:
+            db.commit()
+        print("-" * 50)
+        print(f"Websites without tenant_db_name: {len(websites)}")
+        print(f"Tenant databases detected:       {found}")
+        if not apply:
+            print("Dry run only; re-run with --apply to write the names.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("\nTenant database name backfill")
+    print("-" * 50)
+    backfill(apply="--apply" in sys.argv[1:])
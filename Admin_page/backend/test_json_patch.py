@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the JSON Patch planner (app/core/json_patch.py).
+
+Checks that operations whose MySQL path assumes the wrong container type
+(a numeric token under an object, a key under a scalar array element) carry
+JSON_TYPE preconditions, so MySQL updates no row and the patch falls back to
+apply_patch instead of silently doing nothing.
+
+Usage:
+    python test_json_patch.py        (or: pytest test_json_patch.py)
+"""
+
+import re
+import sys
+
+from app.core.json_patch import JsonPatchError, apply_patch, plan_sql_update
+
+TYPE_CHECK = re.compile(r"JSON_TYPE\(JSON_EXTRACT\((?:COALESCE\()?(\w+).*, :(\w+)\)\) = '(\w+)'$")
+
+
+def type_checks(plan):
+    """{(column, json path): expected type} from a plan's JSON_TYPE conditions."""
+    checks = {}
+    for condition in plan['conditions']:
+        match = TYPE_CHECK.match(condition)
+        if match:
+            column, key, expected = match.groups()
+            checks[(column, plan['params'][key])] = expected
+    return checks
+
+
+def test_numeric_key_on_object_requires_array():
+    # Written as $[1] for MySQL, which is only right if the column holds an array
+    plan = plan_sql_update([{'op': 'add', 'path': '/social_media_links/1', 'value': 'x'}])
+    assert type_checks(plan) == {('social_media_links', '$'): 'ARRAY'}
+    # The fallback treats "1" as an object key
+    patched = apply_patch({'social_media_links': {'facebook': 'f'}},
+                          [{'op': 'add', 'path': '/social_media_links/1', 'value': 'x'}])
+    assert patched['social_media_links'] == {'facebook': 'f', '1': 'x'}
+
+
+def test_key_under_scalar_element_requires_object():
+    plan = plan_sql_update([{'op': 'add', 'path': '/team_members/0/foo', 'value': 'x'}])
+    assert type_checks(plan) == {('team_members', '$'): 'ARRAY', ('team_members', '$[0]'): 'OBJECT'}
+    # The fallback rejects it instead of reporting success
+    try:
+        apply_patch({'team_members': ['scalar']}, [{'op': 'add', 'path': '/team_members/0/foo', 'value': 'x'}])
+    except JsonPatchError:
+        pass
+    else:
+        raise AssertionError("adding a key under a scalar must fail")
+
+
+def test_remove_and_replace_check_containers():
+    plan = plan_sql_update([
+        {'op': 'remove', 'path': '/social_media_links/0'},
+        {'op': 'replace', 'path': '/team_members/2/name', 'value': 'A'},
+    ])
+    assert type_checks(plan) == {
+        ('social_media_links', '$'): 'ARRAY',
+        ('team_members', '$'): 'ARRAY',
+        ('team_members', '$[2]'): 'OBJECT',
+    }
+
+
+def test_well_typed_paths_stay_in_sql():
+    plan = plan_sql_update([
+        {'op': 'add', 'path': '/photo_gallery_urls/-', 'value': 'a.jpg'},
+        {'op': 'replace', 'path': '/social_media_links/facebook', 'value': 'f'},
+    ])
+    assert plan is not None
+    assert type_checks(plan) == {('photo_gallery_urls', '$'): 'ARRAY', ('social_media_links', '$'): 'OBJECT'}
+    assert 'JSON_ARRAY_APPEND' in plan['assignments']['photo_gallery_urls']
+
+
+def test_shared_container_checked_once():
+    plan = plan_sql_update([
+        {'op': 'replace', 'path': '/team_members/0/name', 'value': 'A'},
+        {'op': 'replace', 'path': '/team_members/1/name', 'value': 'B'},
+    ])
+    roots = [c for c in plan['conditions'] if c.startswith('JSON_TYPE(JSON_EXTRACT(COALESCE(team_members')]
+    assert len(roots) == 1
+
+
+def main():
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_') and callable(value)]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+-- Migration: unique normalized domain for host-based tenant routing
+-- Run once against an existing database (new installs get this from create_websites_table.sql)
+USE admin_page_db;
+
+ALTER TABLE websites ADD COLUMN normalized_domain VARCHAR(100) NULL AFTER domain;
+
+-- Backfill: lowercase, strip scheme, path, query, port, trailing dots and leading 'www.'
+-- Inactive rows and rows without a domain keep NULL (they do not own a domain)
+UPDATE websites
+SET normalized_domain = NULLIF(
+    REGEXP_REPLACE(
+        REGEXP_REPLACE(
+            SUBSTRING_INDEX(SUBSTRING_INDEX(SUBSTRING_INDEX(
+                REGEXP_REPLACE(LOWER(TRIM(domain)), '^[a-z][a-z0-9+.-]*://', ''),
+            '/', 1), '?', 1), ':', 1),
+        '\\.+$', ''),
+    '^www\\.', ''),
+'')
+WHERE domain IS NOT NULL AND is_active = TRUE;
+
+-- Report domains claimed by more than one active website before enforcing uniqueness
+SELECT normalized_domain, COUNT(*) AS websites, GROUP_CONCAT(id ORDER BY id) AS website_ids
+FROM websites
+WHERE normalized_domain IS NOT NULL
+GROUP BY normalized_domain
+HAVING COUNT(*) > 1;
+
+-- The oldest website keeps the domain; the others are released and must be fixed by their owners
+UPDATE websites w
+JOIN (
+    SELECT normalized_domain, MIN(id) AS keep_id
+    FROM websites
+    WHERE normalized_domain IS NOT NULL
+    GROUP BY normalized_domain
+    HAVING COUNT(*) > 1
+) dup ON dup.normalized_domain = w.normalized_domain AND w.id <> dup.keep_id
+SET w.normalized_domain = NULL;
+
+CREATE UNIQUE INDEX ux_websites_normalized_domain ON websites (normalized_domain);
+
+-- Incremental refresh of the in-memory resolver scans by last_updated
+CREATE INDEX ix_websites_last_updated ON websites (last_updated);
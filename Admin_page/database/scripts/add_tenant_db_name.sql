@@ -0,0 +1,5 @@
+-- Migration: record each tenant's client database name on its website
+-- Run once against an existing database, then fill it with backfill_tenant_db_names.py
+USE admin_page_db;
+
+ALTER TABLE websites ADD COLUMN tenant_db_name VARCHAR(64) NULL AFTER normalized_domain;
@@ -29,7 +29,11 @@ CREATE TABLE IF NOT EXISTS websites (
     social_media_links JSON,
     paid_till DATE,
     domain VARCHAR(100),
+    normalized_domain VARCHAR(100),
+    tenant_db_name VARCHAR(64),
     is_active BOOLEAN DEFAULT TRUE,
     page_no INT,
-    CONSTRAINT fk_owner FOREIGN KEY (owner_id) REFERENCES users(id)
+    CONSTRAINT fk_owner FOREIGN KEY (owner_id) REFERENCES users(id),
+    UNIQUE KEY ux_websites_normalized_domain (normalized_domain),
+    KEY ix_websites_last_updated (last_updated)
 ); 
\ No newline at end of file
@@ -51,6 +51,12 @@ case "$1" in
         run_sql_script "database/scripts/create_websites_table.sql" "Creating websites table"
         run_sql_script "database/scripts/seed_test_data.sql" "Seeding test data"
         ;;
+    "migrate-domains")
+        run_sql_script "database/scripts/add_normalized_domain.sql" "Adding normalized domain index"
+        ;;
+    "migrate-tenant-db")
+        run_sql_script "database/scripts/add_tenant_db_name.sql" "Adding tenant database name column"
+        ;;
     "create-user")
         run_sql_script "database/scripts/create_user.sql" "Creating application user"
         ;;
@@ -62,12 +68,14 @@ case "$1" in
         run_sql_script "database/scripts/create_user.sql" "Creating application user"
         ;;
     *)
-        echo "Usage: $0 {create|drop|reset|seed|reset-seed|create-user|setup-all}"
+        echo "Usage: $0 {create|drop|reset|seed|reset-seed|migrate-domains|migrate-tenant-db|create-user|setup-all}"
         echo "  create      - Create database and tables"
         echo "  drop        - Drop database"
         echo "  reset       - Drop and recreate database"
         echo "  seed        - Seed test data into database"
         echo "  reset-seed  - Drop, recreate database and seed test data"
+        echo "  migrate-domains - Add the unique normalized domain index to an existing database"
+        echo "  migrate-tenant-db - Add websites.tenant_db_name (then run backend/backfill_tenant_db_names.py)"
         echo "  create-user - Create application user with limited permissions"
         echo "  setup-all   - Complete setup: drop, create, seed, and create user"
         exit 1
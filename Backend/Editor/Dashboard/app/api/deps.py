@@ -1,11 +1,11 @@
-from typing import Generator, Optional
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import verify_token
-from app.crud.user import get_user_by_id, check_user_permission
-from app.models.user import User
+from app.core.auth_claims import AuthenticatedUser, token_version_registry
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.security import verify_token_data
+from app.crud.user import get_user_by_id
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,19 +14,60 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer()
 
 
+def _load_principal(user_id: int, claims: dict) -> AuthenticatedUser:
+    """
+    Build the principal from the users table (claims missing or token version changed).
+    
+    Args:
+        user_id: User ID from the token subject
+        claims: Verified token payload
+        
+    Returns:
+        Current user principal
+        
+    Raises:
+        HTTPException: If the user no longer exists or the token was issued before
+                       the user's last role/status/password change
+    """
+    db = SessionLocal()
+    try:
+        user = get_user_by_id(db, user_id)
+    finally:
+        db.close()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    token_version_registry.set(user.id, user.token_version or 0)
+    if claims.get("ver") is not None and int(claims["ver"]) != (user.token_version or 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token is no longer valid, please log in again",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return AuthenticatedUser.from_user(user)
+
+
 def get_current_user(
-    db: Session = Depends(get_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
+) -> AuthenticatedUser:
     """
     Get current user from JWT token.
     
+    With AUTH_TRUST_CLAIMS enabled, the role and active state come from the token
+    claims and no query is made as long as the token version (`ver` claim) matches
+    the token version registry. The users table is read only for tokens without
+    these claims or on a version mismatch.
+    
     Args:
-        db: Database session
         credentials: HTTP Bearer credentials
         
     Returns:
-        Current user object
+        Current user principal
         
     Raises:
         HTTPException: If authentication fails
@@ -35,8 +76,9 @@ def get_current_user(
         # Extract token from credentials
         token = credentials.credentials
         
-        # Verify token and get user ID
-        user_id = verify_token(token)
+        # Verify token (cached after the first request) and get its claims
+        claims = verify_token_data(token)
+        user_id = claims.get("sub")
         
         if not user_id:
             raise HTTPException(
@@ -45,14 +87,9 @@ def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Get user from database
-        user = get_user_by_id(db, int(user_id))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        user = AuthenticatedUser.from_claims(claims) if settings.AUTH_TRUST_CLAIMS else None
+        if user is None or token_version_registry.get(user.id) != user.token_version:
+            user = _load_principal(int(user_id), claims)
         
         if not user.is_active:
             raise HTTPException(
@@ -61,9 +98,11 @@ def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        logger.info(f"User authenticated: {user.username} (ID: {user.id})")
+        logger.debug("User authenticated: %s (ID: %s)", user.username, user.id)
         return user
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Authentication error: {str(e)}")
         raise HTTPException(
@@ -74,8 +113,8 @@ def get_current_user(
 
 
 def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     """
     Get current active user.
     
@@ -97,8 +136,8 @@ def get_current_active_user(
 
 
 def require_admin_or_editor(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> AuthenticatedUser:
     """
     Require user to have Admin or Editor role.
     
@@ -117,13 +156,13 @@ def require_admin_or_editor(
             detail="Not enough permissions. Admin or Editor role required."
         )
     
-    logger.info(f"Permission granted to {current_user.username} (Role: {current_user.role})")
+    logger.debug("Permission granted to %s (Role: %s)", current_user.username, current_user.role)
     return current_user
 
 
 def require_admin(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> AuthenticatedUser:
     """
     Require user to have Admin role.
     
@@ -142,52 +181,43 @@ def require_admin(
             detail="Admin role required"
         )
     
-    logger.info(f"Admin access granted to {current_user.username}")
+    logger.debug("Admin access granted to %s", current_user.username)
     return current_user
 
 
 def optional_auth(
-    db: Session = Depends(get_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
-) -> Optional[User]:
+) -> Optional[AuthenticatedUser]:
     """
     Optional authentication - returns user if token is provided and valid, None otherwise.
     
     Args:
-        db: Database session
         credentials: Optional HTTP Bearer credentials
         
     Returns:
-        User object if authenticated, None otherwise
+        User principal if authenticated, None otherwise
     """
     if not credentials:
         return None
     
     try:
-        token = credentials.credentials
-        user_id = verify_token(token)
-        
-        if user_id:
-            user = get_user_by_id(db, int(user_id))
-            if user and user.is_active:
-                return user
-    except Exception:
+        return get_current_user(credentials)
+    except HTTPException:
         # Silently fail for optional auth
-        pass
-    
-    return None
+        return None
 
 
 def check_permission_dependency(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     """
     Check if current user has permission (Admin or Editor role and is active).
     This is the main permission check dependency for protected endpoints.
     
+    The principal from get_current_user is already up to date (its token version
+    was checked), so no second lookup is needed here.
+    
     Args:
-        db: Database session
         current_user: Current user from token
         
     Returns:
@@ -196,13 +226,10 @@ def check_permission_dependency(
     Raises:
         HTTPException: If user doesn't have required permissions
     """
-    # Double-check permissions in database
-    user_with_permission = check_user_permission(db, current_user.id)
-    
-    if not user_with_permission:
+    if not current_user.has_permission():
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied. Admin or Editor role with active status required."
         )
     
-    return user_with_permission 
\ No newline at end of file
+    return current_user
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.api.deps import check_permission_dependency, get_current_user
 from app.schemas.auth import PermissionResponse, AuthStatus
-from app.models.user import User
+from app.core.auth_claims import AuthenticatedUser
 from app.middleware.rate_limit import auth_rate_limit
 import logging
 
@@ -16,7 +16,7 @@ router = APIRouter()
 @auth_rate_limit
 async def check_permission(
     request: Request,
-    user: User = Depends(check_permission_dependency)
+    user: AuthenticatedUser = Depends(check_permission_dependency)
 ):
     """
     Check user permissions based on Bearer token.
@@ -46,7 +46,7 @@ async def check_permission(
             message=f"Permission granted for {user.role.value} user: {user.username}"
         )
         
-        logger.info(f"Permission check successful for user {user.username} (ID: {user.id})")
+        logger.debug("Permission check successful for user %s (ID: %s)", user.username, user.id)
         return response
         
     except Exception as e:
@@ -61,7 +61,7 @@ async def check_permission(
 @auth_rate_limit
 async def auth_status(
     request: Request,
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Get authentication status of current user.
@@ -95,7 +95,7 @@ async def auth_status(
 @auth_rate_limit
 async def validate_token(
     request: Request,
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Simple token validation endpoint.
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import JSONResponse
 from typing import Dict, Any
-from app.core.database import get_db
 from app.api.deps import require_admin_or_editor
-from app.models.user import User
-from app.crud.user import get_users, get_active_admins_and_editors
+from app.core.auth_claims import AuthenticatedUser
+from app.core.dashboard_snapshot import dashboard_snapshot
 from app.middleware.rate_limit import api_rate_limit
+import hashlib
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,12 +14,31 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _conditional_response(request: Request, content: Dict[str, Any]) -> Response:
+    """
+    JSON response with an ETag of its content; 304 when the client already has it.
+    
+    Args:
+        request: Incoming request (for If-None-Match)
+        content: Response body
+        
+    Returns:
+        JSONResponse, or an empty 304 response
+    """
+    body = json.dumps(content, sort_keys=True, separators=(",", ":")).encode()
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    # private: the body includes the caller's permissions
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+
 @router.get("/metrics", response_model=Dict[str, Any])
 @api_rate_limit
 async def get_dashboard_metrics(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin_or_editor)
+    current_user: AuthenticatedUser = Depends(require_admin_or_editor)
 ):
     """
     Get dashboard metrics for admin/editor users.
@@ -28,11 +48,16 @@ async def get_dashboard_metrics(
     - System information
     - Activity metrics (placeholder for future implementation)
     
+    Counts come from the in-memory dashboard snapshot, so polling does not
+    query the database. The response carries an ETag; pollers sending it back
+    in If-None-Match get 304 until the figures change.
+    
     Headers:
         Authorization: Bearer <jwt_token>
+        If-None-Match: ETag of a previous response (optional)
     
     Returns:
-        Dictionary containing dashboard metrics
+        Dictionary containing dashboard metrics (304 if unchanged)
         
     Raises:
         401: Invalid or missing token
@@ -40,35 +65,15 @@ async def get_dashboard_metrics(
         429: Rate limit exceeded
     """
     try:
-        # Get user statistics
-        all_users = get_users(db, skip=0, limit=1000)
-        active_users = get_users(db, skip=0, limit=1000, is_active=True)
-        admin_editor_users = get_active_admins_and_editors(db)
-        
-        # Count users by role
-        admin_count = len([u for u in admin_editor_users if u.role.value == "Admin"])
-        editor_count = len([u for u in admin_editor_users if u.role.value == "Editor"])
-        member_count = len([u for u in all_users if u.role.value == "Member"])
+        snapshot = dashboard_snapshot.current()
         
         metrics = {
-            "user_statistics": {
-                "total_users": len(all_users),
-                "active_users": len(active_users),
-                "inactive_users": len(all_users) - len(active_users),
-                "admin_users": admin_count,
-                "editor_users": editor_count,
-                "member_users": member_count
-            },
-            "dashboard_cards": {
-                "slider_images": 4,  # Placeholder - will be updated when metrics tables are added
-                "service_cards": 3,  # Placeholder
-                "info_cards": 3,     # Placeholder
-                "active_users": len(active_users)
-            },
+            "user_statistics": snapshot.user_statistics,
+            "dashboard_cards": snapshot.dashboard_cards,
             "system_status": {
                 "database": "online",
                 "api_status": "healthy",
-                "last_updated": "2025-01-01T00:00:00Z"  # This will be dynamic
+                "last_updated": snapshot.updated_at.isoformat() + "Z"
             },
             "recent_activity": {
                 "total_activities": 0,  # Placeholder for future activity tracking
@@ -82,8 +87,8 @@ async def get_dashboard_metrics(
             }
         }
         
-        logger.info(f"Dashboard metrics retrieved by {current_user.username}")
-        return metrics
+        logger.info("Dashboard metrics retrieved by %s", current_user.username)
+        return _conditional_response(request, metrics)
         
     except Exception as e:
         logger.error(f"Error retrieving dashboard metrics: {str(e)}")
@@ -97,17 +102,19 @@ async def get_dashboard_metrics(
 @api_rate_limit
 async def get_user_statistics(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin_or_editor)
+    current_user: AuthenticatedUser = Depends(require_admin_or_editor)
 ):
     """
     Get detailed user statistics.
     
+    Served from the dashboard snapshot with an ETag, like /metrics.
+    
     Headers:
         Authorization: Bearer <jwt_token>
+        If-None-Match: ETag of a previous response (optional)
     
     Returns:
-        Detailed user statistics
+        Detailed user statistics (304 if unchanged)
         
     Raises:
         401: Invalid or missing token
@@ -115,26 +122,10 @@ async def get_user_statistics(
         429: Rate limit exceeded
     """
     try:
-        users = get_users(db, skip=0, limit=1000)
-        
-        stats = {
-            "total_count": len(users),
-            "active_count": len([u for u in users if u.is_active]),
-            "inactive_count": len([u for u in users if not u.is_active]),
-            "by_role": {
-                "admin": len([u for u in users if u.role.value == "Admin"]),
-                "editor": len([u for u in users if u.role.value == "Editor"]),
-                "member": len([u for u in users if u.role.value == "Member"])
-            },
-            "active_by_role": {
-                "admin": len([u for u in users if u.role.value == "Admin" and u.is_active]),
-                "editor": len([u for u in users if u.role.value == "Editor" and u.is_active]),
-                "member": len([u for u in users if u.role.value == "Member" and u.is_active])
-            }
-        }
+        stats = dashboard_snapshot.current().user_stats
         
-        logger.info(f"User statistics retrieved by {current_user.username}")
-        return stats
+        logger.info("User statistics retrieved by %s", current_user.username)
+        return _conditional_response(request, stats)
         
     except Exception as e:
         logger.error(f"Error retrieving user statistics: {str(e)}")
@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+import asyncio
+import logging
+import threading
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+# Re-read rows updated this long before the watermark, to tolerate clock skew between writers
+_WATERMARK_OVERLAP = timedelta(seconds=2)
+
+
+def _role_from_claim(value: Any) -> UserRole:
+    """Map a role claim ("Admin", "editor", "User", ...) to a UserRole; unknown roles get no permissions."""
+    for role in UserRole:
+        if str(value).lower() == role.value.lower():
+            return role
+    return UserRole.MEMBER
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    The caller of a request, built from verified token claims (or from the users
+    table when the claims cannot be trusted). Offers the same permission helpers
+    as the User model so endpoints work with either.
+    """
+    id: int
+    username: str
+    role: UserRole
+    is_active: bool
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthenticatedUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=_role_from_claim(user.role.value if isinstance(user.role, UserRole) else user.role),
+            is_active=bool(user.is_active),
+            token_version=user.token_version or 0,
+        )
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> Optional["AuthenticatedUser"]:
+        """
+        Build a principal from token claims.
+
+        Args:
+            claims: Verified token payload
+
+        Returns:
+            AuthenticatedUser, or None if the token lacks the authorization claims
+            (sub, username, role, active, ver)
+        """
+        if any(claims.get(key) is None for key in ("sub", "username", "role", "active", "ver")):
+            return None
+        try:
+            return cls(
+                id=int(claims["sub"]),
+                username=str(claims["username"]),
+                role=_role_from_claim(claims["role"]),
+                is_active=bool(claims["active"]),
+                token_version=int(claims["ver"]),
+            )
+        except (TypeError, ValueError):
+            return None
+
+    def has_permission(self) -> bool:
+        """Check if user has Admin or Editor permissions and is active."""
+        return self.is_active and self.role in [UserRole.ADMIN, UserRole.EDITOR]
+
+    def is_admin(self) -> bool:
+        """Check if user is an admin"""
+        return self.role == UserRole.ADMIN and self.is_active
+
+    def is_editor(self) -> bool:
+        """Check if user is an editor"""
+        return self.role == UserRole.EDITOR and self.is_active
+
+
+class TokenVersionRegistry:
+    """
+    In-memory map of user id -> token_version.
+
+    Loaded in full at startup, then polled for rows whose `updated_at` moved past a
+    watermark. Token versions are bumped on role change, deactivation and password
+    change, so a token whose `ver` claim matches the registry still describes the
+    user correctly and can be trusted without a query. Changes made through this
+    service are applied immediately; changes made elsewhere are seen after at most
+    one polling interval.
+
+    Token versions only go up, so every write keeps the larger of the stored and
+    the new version: a refresh (or a principal load) that read a row before a bump
+    was committed cannot put the old version back. Deleted users are remembered so
+    a refresh that read them before the delete does not re-add them.
+    """
+
+    def __init__(self, refresh_interval: int = 15):
+        self.refresh_interval = refresh_interval
+        self._versions: Dict[int, int] = {}
+        self._deleted: Set[int] = set()
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, user_id: int) -> Optional[int]:
+        """Known token version of a user, or None if the user is not in the registry."""
+        return self._versions.get(user_id)
+
+    def set(self, user_id: int, version: int) -> None:
+        with self._lock:
+            self._store(user_id, version)
+
+    def discard(self, user_id: int) -> None:
+        with self._lock:
+            self._deleted.add(user_id)
+            self._versions.pop(user_id, None)
+
+    def _store(self, user_id: int, version: int) -> None:
+        """Keep the newest version seen for a user (caller holds the lock)."""
+        if user_id in self._deleted:
+            return
+        current = self._versions.get(user_id)
+        if current is None or version > current:
+            self._versions[user_id] = version
+
+    def refresh(self) -> int:
+        """
+        Load token versions changed since the last refresh (everything on the first call).
+
+        Returns:
+            Number of users loaded
+        """
+        watermark = self._watermark
+        db = SessionLocal()
+        try:
+            query = db.query(User.id, User.token_version, User.updated_at)
+            if watermark is not None:
+                query = query.filter(User.updated_at >= watermark - _WATERMARK_OVERLAP)
+            rows = query.all()
+        finally:
+            db.close()
+
+        with self._lock:
+            for user_id, version, updated_at in rows:
+                self._store(user_id, version or 0)
+                if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+            if self._watermark is None:
+                self._watermark = datetime.utcnow()
+            return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.warning(f"Token version refresh failed: {e}")
+
+    async def start(self) -> None:
+        """Load all token versions and start polling for changes."""
+        try:
+            count = await asyncio.to_thread(self.refresh)
+            logger.info(f"Token version registry loaded ({count} users)")
+        except Exception as e:
+            logger.warning(f"Token version registry load failed; tokens will be checked against the database: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._versions),
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
+
+
+# Global registry instance
+token_version_registry = TokenVersionRegistry(refresh_interval=settings.TOKEN_VERSION_REFRESH_SECONDS)
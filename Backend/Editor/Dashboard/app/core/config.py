@@ -17,18 +17,39 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Public keys of the Login/Signup service; RS256 tokens are verified locally with them
+    JWKS_URL: Optional[str] = "http://localhost:8002/.well-known/jwks.json"
+    JWKS_REFRESH_SECONDS: int = 300
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Verified tokens kept in memory (LRU)
+    
+    # Claims-based authorization: trust role/active claims while the token version matches
+    AUTH_TRUST_CLAIMS: bool = True
+    TOKEN_VERSION_REFRESH_SECONDS: int = 15  # Poll interval for token versions changed elsewhere
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 15  # Poll interval for access tokens revoked at logout
+    DASHBOARD_RECONCILE_SECONDS: int = 60  # Interval between dashboard count recounts in the database
     
     # Security Configuration
     # TODO: Replace localhost with actual domain name when going live
     ALLOWED_HOSTS: List[str] = ["localhost", "127.0.0.1", "0.0.0.0"]
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8080"]
+    CORS_MAX_AGE: int = 600  # Seconds browsers may cache a preflight response
+    TRUSTED_PROXIES: List[str] = []  # Proxy addresses/CIDRs whose X-Forwarded-For is used for the client IP
     
     # Rate Limiting Configuration (Configurable - Change these values as needed)
     RATE_LIMIT_REQUESTS: int = 10  # Number of requests allowed
     RATE_LIMIT_WINDOW: int = 60    # Time window in seconds
+    RATE_LIMIT_USE_REDIS: bool = True    # Share counters across instances via REDIS_URL
+    RATE_LIMIT_SYNC_SECONDS: float = 1.0 # Interval between batched counter syncs
+    RATE_LIMIT_SHM_ENABLED: bool = True  # Without Redis, share counters between workers via shared memory
+    RATE_LIMIT_SHM_PATH: str = "/dev/shm/temple-editor-ratelimit"
+    RATE_LIMIT_SHM_SLOTS: int = 65536    # Counter slots (24 bytes each)
     
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 0.25    # Connect/command timeout in seconds
+    REDIS_MAX_CONNECTIONS: int = 50       # Connection pool size
+    REDIS_FAILURE_THRESHOLD: int = 3      # Consecutive failures before the circuit opens
+    REDIS_RECOVERY_SECONDS: float = 5.0   # Probe interval while the circuit is open
     
     # Environment
     ENVIRONMENT: str = "development"
@@ -40,6 +61,9 @@ class Settings(BaseSettings):
     
     # Logging
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"        # "json" (one object per line) or "text"
+    LOG_SAMPLE_RATE: float = 1.0    # Fraction of requests whose INFO/DEBUG records are kept
+    LOG_QUEUE_SIZE: int = 10000     # Records buffered for the writer thread before dropping
     
     @field_validator("DATABASE_URL")
     @classmethod
@@ -0,0 +1,195 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import threading
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import UserRole
+
+logger = logging.getLogger(__name__)
+
+# Dashboard cards not derived from users (placeholders until their tables exist)
+STATIC_CARDS = {"slider_images": 4, "service_cards": 3, "info_cards": 3}
+
+UserState = Tuple[UserRole, bool]
+
+
+def _state(role: Any, is_active: Any) -> UserState:
+    return (role if isinstance(role, UserRole) else UserRole(role), bool(is_active))
+
+
+def _count(counts: Dict[UserState, int], role: Optional[UserRole] = None, is_active: Optional[bool] = None) -> int:
+    """Sum (role, is_active) counts, optionally restricted to a role and/or status."""
+    return sum(
+        count for (r, active), count in counts.items()
+        if (role is None or r == role) and (is_active is None or active == is_active)
+    )
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Dashboard figures at one point in time; replaced as a whole on every change."""
+    user_statistics: Dict[str, int] = field(default_factory=dict)
+    user_stats: Dict[str, Any] = field(default_factory=dict)
+    dashboard_cards: Dict[str, int] = field(default_factory=dict)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+
+    @classmethod
+    def from_counts(cls, counts: Dict[UserState, int]) -> "Snapshot":
+        total = _count(counts)
+        active = _count(counts, is_active=True)
+        return cls(
+            user_statistics={
+                "total_users": total,
+                "active_users": active,
+                "inactive_users": total - active,
+                "admin_users": _count(counts, UserRole.ADMIN, True),
+                "editor_users": _count(counts, UserRole.EDITOR, True),
+                "member_users": _count(counts, UserRole.MEMBER),
+            },
+            user_stats={
+                "total_count": total,
+                "active_count": active,
+                "inactive_count": total - active,
+                "by_role": {
+                    "admin": _count(counts, UserRole.ADMIN),
+                    "editor": _count(counts, UserRole.EDITOR),
+                    "member": _count(counts, UserRole.MEMBER),
+                },
+                "active_by_role": {
+                    "admin": _count(counts, UserRole.ADMIN, True),
+                    "editor": _count(counts, UserRole.EDITOR, True),
+                    "member": _count(counts, UserRole.MEMBER, True),
+                },
+            },
+            dashboard_cards={**STATIC_CARDS, "active_users": active},
+        )
+
+
+class DashboardSnapshot:
+    """
+    Materialized user counts by (role, is_active) for the dashboard endpoints.
+
+    Loaded with one GROUP BY query at startup, then kept current by the user
+    CRUD functions, which report each row's state before and after a committed
+    change. Reading the dashboard costs the same for any number of users and
+    never queries the database.
+
+    Users created or changed by other services (signup in Login_Signup, the
+    admin backend) are picked up by reconcile(), which recounts in the database
+    every `reconcile_interval` seconds and replaces the counts. A reconcile
+    that overlaps an incremental change is discarded and retried on the next
+    tick, since its result may or may not include that change.
+    """
+
+    def __init__(self, reconcile_interval: int = 60):
+        self.reconcile_interval = reconcile_interval
+        self._counts: Dict[UserState, int] = {}
+        self._snapshot: Optional[Snapshot] = None
+        self._changes = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats_counters = {"changes": 0, "reconciles": 0, "corrections": 0, "skipped": 0}
+
+    def current(self) -> Snapshot:
+        """
+        The current snapshot, loading it first if startup could not.
+
+        Returns:
+            Snapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.reconcile()
+            snapshot = self._snapshot
+        return snapshot
+
+    def record_change(self, before: Optional[UserState], after: Optional[UserState]) -> None:
+        """
+        Apply a committed user change: `before` is None for a new user, `after` is None for a deleted one.
+
+        Args:
+            before: (role, is_active) before the change
+            after: (role, is_active) after the change
+        """
+        before = _state(*before) if before is not None else None
+        after = _state(*after) if after is not None else None
+        if before == after:
+            return
+        with self._lock:
+            self._changes += 1
+            self.stats_counters["changes"] += 1
+            if self._snapshot is None:
+                return  # Not loaded yet; counted by the load (or the reconcile after it)
+            if before is not None:
+                self._counts[before] = max(0, self._counts.get(before, 0) - 1)
+            if after is not None:
+                self._counts[after] = self._counts.get(after, 0) + 1
+            self._snapshot = Snapshot.from_counts(self._counts)
+
+    def reconcile(self) -> bool:
+        """
+        Recount users in the database and replace the counts.
+
+        Returns:
+            True if the counts were replaced, False if a concurrent change made the result ambiguous
+        """
+        from app.crud.user import count_users_by_role_and_status
+
+        changes = self._changes
+        db = SessionLocal()
+        try:
+            counts = count_users_by_role_and_status(db)
+        finally:
+            db.close()
+
+        with self._lock:
+            if self._changes != changes and self._snapshot is not None:
+                self.stats_counters["skipped"] += 1
+                return False
+            if self._snapshot is None or counts != self._counts:
+                if self._snapshot is not None:
+                    self.stats_counters["corrections"] += 1
+                    logger.debug("Dashboard counts corrected by reconcile")
+                self._counts = counts
+                self._snapshot = Snapshot.from_counts(counts)
+            self.stats_counters["reconciles"] += 1
+            return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await asyncio.to_thread(self.reconcile)
+            except Exception as e:
+                logger.warning(f"Dashboard snapshot reconcile failed: {e}")
+
+    async def start(self) -> None:
+        """Load the counts and start the reconcile timer."""
+        try:
+            await asyncio.to_thread(self.reconcile)
+            logger.info(f"Dashboard snapshot loaded ({self._snapshot.user_statistics['total_users']} users)")
+        except Exception as e:
+            logger.warning(f"Dashboard snapshot load failed; retrying on first request: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "updated_at": snapshot.updated_at.isoformat() if snapshot else None,
+            **self.stats_counters,
+        }
+
+
+# Global snapshot instance
+dashboard_snapshot = DashboardSnapshot(reconcile_interval=settings.DASHBOARD_RECONCILE_SECONDS)
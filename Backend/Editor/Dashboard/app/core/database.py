@@ -5,6 +5,7 @@ from typing import Generator
 import logging
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +22,9 @@ engine = create_engine(
     echo=settings.ENVIRONMENT == "development"  # SQL logging in development
 )
 
+# Pool checkouts and wait time for /metrics
+instrument_engine(engine)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -55,6 +59,7 @@ def init_db() -> None:
     try:
         # Import all models here to ensure they are registered with SQLAlchemy
         from app.models import user  # noqa
+        from app.models import auth_token  # noqa
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
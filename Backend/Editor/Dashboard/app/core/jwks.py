@@ -0,0 +1,113 @@
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import threading
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSClient:
+    """
+    In-memory cache of the token issuer's public keys (JWKS), by key id.
+
+    Tokens signed by the Login/Signup service (RS256) are verified locally with
+    these keys: no call to the issuer and no shared secret. The document is
+    refreshed in the background every `refresh_interval` seconds, and on demand
+    when a token names an unknown `kid` (key rotation), at most once every
+    `min_refetch_interval` seconds so bogus key ids cannot trigger a fetch storm.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        refresh_interval: int = 300,
+        min_refetch_interval: int = 30,
+        timeout: float = 3.0,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._last_fetch = 0.0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def fetch(self) -> int:
+        """
+        Download the JWKS document and replace the cached keys.
+
+        Returns:
+            Number of keys loaded
+        """
+        if not self.url:
+            return 0
+        with self._lock:
+            self._last_fetch = time.monotonic()
+            response = httpx.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            keys = {
+                key["kid"]: key
+                for key in response.json().get("keys", [])
+                if key.get("kid") and key.get("kty") == "RSA"
+            }
+            self._keys = keys
+            return len(keys)
+
+    def get_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Public key (JWK) for a key id, refetching the document once for unknown ids.
+
+        Args:
+            kid: Key id from the token header
+
+        Returns:
+            JWK dictionary, or None if the key is unknown
+        """
+        if not kid:
+            return None
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._last_fetch >= self.min_refetch_interval:
+            try:
+                self.fetch()
+            except Exception as e:
+                logger.warning(f"JWKS fetch for unknown key {kid} failed: {e}")
+            key = self._keys.get(kid)
+        return key
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.fetch)
+            except Exception as e:
+                logger.warning(f"JWKS refresh failed; keeping cached keys: {e}")
+
+    async def start(self) -> None:
+        """Fetch the keys and start refreshing them in the background."""
+        if not self.url:
+            return
+        try:
+            count = await asyncio.to_thread(self.fetch)
+            logger.info(f"Loaded {count} token signing key(s) from {self.url}")
+        except Exception as e:
+            logger.warning(f"JWKS load from {self.url} failed; will retry on demand: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"url": self.url, "kids": sorted(self._keys)}
+
+
+# Global JWKS client
+jwks_client = JWKSClient(settings.JWKS_URL, refresh_interval=settings.JWKS_REFRESH_SECONDS)
@@ -0,0 +1,170 @@
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import zlib
+
+# Correlation id of the request being handled (set by EdgeMiddleware)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The previous plain-text format, with the request id appended when there is one."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"{line} [{request_id}]" if request_id else line
+
+
+class RequestSamplingFilter(logging.Filter):
+    """
+    Attach the request id to records and keep only a sample of requests' routine records.
+
+    Records below WARNING logged while handling a request are kept for
+    `sample_rate` of requests, chosen by a hash of the request id, so a sampled
+    request keeps all of its records and a dropped one loses all of them.
+    Warnings, errors and records logged outside requests (startup, background
+    tasks) are always kept.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self._threshold = int(max(0.0, min(1.0, sample_rate)) * 0xFFFFFFFF)
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        record.request_id = request_id
+        if request_id is None or record.levelno >= logging.WARNING or self.sample_rate >= 1.0:
+            return True
+        if zlib.crc32(request_id.encode("utf-8")) <= self._threshold:
+            return True
+        self.dropped += 1
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks or formats on the caller's thread.
+
+    The standard handler formats the message before enqueueing (so records can
+    be pickled); here the queue is in-process, so the record is passed as is and
+    the message is built by the writer thread. When the queue is full the record
+    is dropped and counted instead of blocking the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingSystem:
+    """Root logging through a bounded queue drained by a background writer thread."""
+
+    def __init__(self):
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._queue: Optional[queue.Queue] = None
+        self._handler: Optional[NonBlockingQueueHandler] = None
+        self._sampler: Optional[RequestSamplingFilter] = None
+        self.json_output = False
+
+    def setup(
+        self,
+        level: str = "INFO",
+        json_output: bool = True,
+        sample_rate: float = 1.0,
+        queue_size: int = 10000,
+    ) -> None:
+        """
+        Route all logging through the queue (replaces the root logger's handlers).
+
+        Args:
+            level: Root log level name
+            json_output: JSON lines instead of the plain-text format
+            sample_rate: Fraction of requests whose INFO/DEBUG records are kept
+            queue_size: Records buffered before new ones are dropped
+        """
+        self.shutdown()
+        self.json_output = json_output
+        self._queue = queue.Queue(maxsize=queue_size)
+
+        output = logging.StreamHandler(sys.stderr)
+        output.setFormatter(JsonFormatter() if json_output else TextFormatter())
+
+        self._sampler = RequestSamplingFilter(sample_rate)
+        self._handler = NonBlockingQueueHandler(self._queue)
+        self._handler.addFilter(self._sampler)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self._handler)
+        root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+        self._listener = logging.handlers.QueueListener(self._queue, output, respect_handler_level=True)
+        self._listener.start()
+
+    def shutdown(self) -> None:
+        """Write the queued records and stop the writer thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "format": "json" if self.json_output else "text",
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "sample_rate": self._sampler.sample_rate if self._sampler else 1.0,
+            "sampled_out": self._sampler.dropped if self._sampler else 0,
+            "dropped_queue_full": self._handler.dropped if self._handler else 0,
+        }
+
+
+# Global logging system
+logging_system = LoggingSystem()
+atexit.register(logging_system.shutdown)
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import logging
+import threading
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Re-read rows created this long before the watermark (transactions commit out of order)
+_WATERMARK_OVERLAP = timedelta(seconds=2)
+
+
+class RevocationList:
+    """
+    In-memory set of revoked access tokens, mirrored from auth_tokens.
+
+    The Login/Signup service records an access token in auth_tokens when it is
+    revoked (logout); tokens expire within ACCESS_TOKEN_EXPIRE_MINUTES, so the
+    live set stays small and a plain set lookup of the token's `jti` digest is
+    all a request pays. The set is polled from the table by `created_at`.
+    """
+
+    def __init__(self, sync_interval: int = 15):
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, datetime] = {}
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _digest(jti: str) -> str:
+        return hashlib.sha256(jti.encode("utf-8")).hexdigest()
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """
+        Check whether an access token id has been revoked.
+
+        Args:
+            jti: Token id claim (tokens without one cannot be revoked individually)
+
+        Returns:
+            True if the token is revoked
+        """
+        if not jti:
+            return False
+        return self._digest(jti) in self._revoked
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        """Mark a token id as revoked in this process (the database row is written by the caller)."""
+        self._revoked[self._digest(jti)] = expires_at
+
+    def sync(self) -> int:
+        """
+        Pull revocations recorded since the last sync (all live ones on the first call).
+
+        Returns:
+            Number of rows read
+        """
+        from app.crud.auth_token import get_revoked_access_tokens
+
+        with self._lock:
+            db = SessionLocal()
+            try:
+                since = self._watermark - _WATERMARK_OVERLAP if self._watermark else None
+                rows = get_revoked_access_tokens(db, since)
+            finally:
+                db.close()
+
+            for token_hash, expires_at, created_at in rows:
+                self._revoked[token_hash] = expires_at
+                if created_at is not None and (self._watermark is None or created_at > self._watermark):
+                    self._watermark = created_at
+
+            now = datetime.utcnow()
+            for token_hash in [h for h, exp in list(self._revoked.items()) if exp <= now]:
+                del self._revoked[token_hash]
+            return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                logger.warning(f"Token revocation sync failed: {e}")
+
+    async def start(self) -> None:
+        """Load live revocations and start polling auth_tokens."""
+        try:
+            await asyncio.to_thread(self.sync)
+            logger.info(f"Token revocation list loaded ({len(self._revoked)} revoked tokens)")
+        except Exception as e:
+            logger.warning(f"Token revocation list load failed: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked_access_tokens": len(self._revoked),
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
+
+
+# Global revocation list
+revocation_list = RevocationList(sync_interval=settings.TOKEN_REVOCATION_SYNC_SECONDS)
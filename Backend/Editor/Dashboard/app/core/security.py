@@ -4,6 +4,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.core.config import settings
+from app.core.token_cache import TokenRevoked, verified_token_cache
+from app.core.revocation import revocation_list
+from app.core.jwks import jwks_client
 
 
 # Password hashing context
@@ -30,11 +33,25 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {"exp": expire, "sub": str(subject), "iat": datetime.utcnow()}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def _decode_token(token: str) -> dict:
+    """
+    Full signature and expiry check; only reached on a token cache miss.
+    RS256 tokens are checked against the issuer's cached JWKS, others with SECRET_KEY.
+    """
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") == "RS256":
+        key = jwks_client.get_key(header.get("kid"))
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key, algorithms=["RS256"])
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
 def verify_token(token: str) -> Optional[str]:
     """
     Verify and decode a JWT token.
@@ -49,18 +66,16 @@ def verify_token(token: str) -> Optional[str]:
         HTTPException: If token is invalid or expired
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = verified_token_cache.decode(token, _decode_token)
         user_id: str = payload.get("sub")
-        if user_id is None:
+        if user_id is None or revocation_list.is_revoked(payload.get("jti")):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         return user_id
-    except JWTError:
+    except (JWTError, TokenRevoked):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication token",
@@ -109,11 +124,11 @@ def verify_token_data(token: str) -> dict:
         HTTPException: If token is invalid or expired
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = verified_token_cache.decode(token, _decode_token)
+        if revocation_list.is_revoked(payload.get("jti")):
+            raise TokenRevoked("Token has been revoked")
         return payload
-    except JWTError as e:
+    except (JWTError, TokenRevoked) as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Token validation failed: {str(e)}",
@@ -0,0 +1,26 @@
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+from app.models.auth_token import AuthToken
+
+
+def get_revoked_access_tokens(db: Session, since: Optional[datetime] = None) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Revoked, unexpired access tokens recorded since a point in time.
+
+    Args:
+        db: Database session
+        since: Only rows created at or after this time (all rows when None)
+
+    Returns:
+        List of (token_hash, expires_at, created_at)
+    """
+    query = db.query(AuthToken.token_hash, AuthToken.expires_at, AuthToken.created_at).filter(
+        AuthToken.token_type == "access",
+        AuthToken.is_revoked == True,
+        AuthToken.expires_at > datetime.utcnow()
+    )
+    if since is not None:
+        query = query.filter(AuthToken.created_at >= since)
+    return query.all()
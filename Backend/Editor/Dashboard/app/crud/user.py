@@ -1,9 +1,12 @@
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
+from app.core.token_cache import verified_token_cache
+from app.core.auth_claims import token_version_registry
+from app.core.dashboard_snapshot import dashboard_snapshot
 
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
@@ -101,6 +104,23 @@ def get_active_admins_and_editors(db: Session) -> List[User]:
     ).all()
 
 
+def count_users_by_role_and_status(db: Session) -> Dict[Tuple[UserRole, bool], int]:
+    """
+    Count users per (role, is_active) with a single GROUP BY query.
+    
+    Args:
+        db: Database session
+        
+    Returns:
+        Mapping of (role, is_active) to user count; every combination is present
+    """
+    counts = {(role, active): 0 for role in UserRole for active in (True, False)}
+    rows = db.query(User.role, User.is_active, func.count(User.id)).group_by(User.role, User.is_active).all()
+    for role, is_active, count in rows:
+        counts[(role, bool(is_active))] = count
+    return counts
+
+
 def create_user(db: Session, user: UserCreate) -> User:
     """
     Create a new user.
@@ -126,6 +146,7 @@ def create_user(db: Session, user: UserCreate) -> User:
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    dashboard_snapshot.record_change(None, (db_user.role, db_user.is_active))
     return db_user
 
 
@@ -145,6 +166,7 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
     if not db_user:
         return None
     
+    before = (db_user.role, db_user.is_active)
     update_data = user_update.dict(exclude_unset=True)
     
     # Handle password update
@@ -155,8 +177,18 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
+    # Role, status or password changes invalidate tokens issued before now
+    invalidate_tokens = bool(update_data.keys() & {"role", "is_active", "password_hash"})
+    if invalidate_tokens:
+        db_user.token_version = (db_user.token_version or 0) + 1
+    
     db.commit()
     db.refresh(db_user)
+    
+    if invalidate_tokens:
+        token_version_registry.set(db_user.id, db_user.token_version)
+        verified_token_cache.revoke_subject(user_id)
+    dashboard_snapshot.record_change(before, (db_user.role, db_user.is_active))
     return db_user
 
 
@@ -175,8 +207,13 @@ def delete_user(db: Session, user_id: int) -> bool:
     if not db_user:
         return False
     
+    before = (db_user.role, db_user.is_active)
     db_user.is_active = False
+    db_user.token_version = (db_user.token_version or 0) + 1
     db.commit()
+    token_version_registry.set(db_user.id, db_user.token_version)
+    verified_token_cache.revoke_subject(user_id)
+    dashboard_snapshot.record_change(before, (db_user.role, False))
     return True
 
 
@@ -195,8 +232,12 @@ def hard_delete_user(db: Session, user_id: int) -> bool:
     if not db_user:
         return False
     
+    before = (db_user.role, db_user.is_active)
     db.delete(db_user)
     db.commit()
+    token_version_registry.discard(user_id)
+    verified_token_cache.revoke_subject(user_id)
+    dashboard_snapshot.record_change(before, None)
     return True
 
 
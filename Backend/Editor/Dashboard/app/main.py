@@ -1,20 +1,30 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import logging
 import uvicorn
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
+from app.core.logging_config import logging_system
+from app.core.metrics import registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
 from app.core.database import init_db, check_db_connection
-from app.middleware.rate_limit import setup_rate_limiting
+from app.core.token_cache import verified_token_cache
+from app.core.auth_claims import token_version_registry
+from app.core.revocation import revocation_list
+from app.core.jwks import jwks_client
+from app.core.redis_manager import redis_manager
+from app.core.dashboard_snapshot import dashboard_snapshot
+from app.middleware.rate_limit import setup_rate_limiting, limiter
+from app.middleware.edge import EdgeMiddleware
 from app.api.v1 import auth, dashboard
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Configure logging: records are formatted and written by a background thread
+logging_system.setup(
+    level=settings.LOG_LEVEL,
+    json_output=settings.LOG_FORMAT == "json",
+    sample_rate=settings.LOG_SAMPLE_RATE,
+    queue_size=settings.LOG_QUEUE_SIZE
 )
 logger = logging.getLogger(__name__)
 
@@ -41,12 +51,27 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database initialization failed: {e}")
         raise
     
+    # Token versions let authorized requests skip the user lookup
+    await token_version_registry.start()
+    await revocation_list.start()
+    await jwks_client.start()
+    # User counts for the dashboard, kept in memory and reconciled on a timer
+    await dashboard_snapshot.start()
+    redis_manager.start()
+    limiter.start()
+    
     logger.info("Application startup complete")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Temple Management System API...")
+    await token_version_registry.stop()
+    await revocation_list.stop()
+    await jwks_client.stop()
+    await dashboard_snapshot.stop()
+    await limiter.stop()
+    await redis_manager.stop()
 
 
 # Create FastAPI application
@@ -66,14 +91,16 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS  # Change from localhost to actual domain
 )
 
-# CORS middleware
+# Security headers, CORS (with cached preflights), request ids and timing
 # TODO: Update CORS origins when frontend domain is available
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,  # Update with actual frontend domain
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
+    EdgeMiddleware,
+    cors_origins=settings.CORS_ORIGINS,  # Update with actual frontend domain
+    cors_allow_credentials=True,
+    cors_allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    cors_allow_headers=["*"],
+    cors_expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After"],
+    cors_max_age=settings.CORS_MAX_AGE,
 )
 
 # Setup rate limiting
@@ -109,9 +136,33 @@ async def health():
         "status": "healthy",
         "database": db_status,
         "version": settings.PROJECT_VERSION,
-        "environment": settings.ENVIRONMENT
+        "environment": settings.ENVIRONMENT,
+        "token_cache": verified_token_cache.get_stats(),
+        "token_versions": token_version_registry.stats(),
+        "token_revocation": revocation_list.stats(),
+        "jwks": jwks_client.stats(),
+        "dashboard_snapshot": dashboard_snapshot.stats(),
+        "rate_limiter": limiter.stats(),
+        "redis": redis_manager.stats(),
+        "logging": logging_system.stats()
     }
 
+# Component metrics, read from each component's counters when /metrics is scraped
+registry.counter("rate_limit_checks_total", "Rate limit checks by result", ("result",),
+                 function=lambda: {k: limiter.stats_counters[k] for k in ("allowed", "rejected")})
+registry.counter("token_cache_lookups_total", "Verified token cache lookups by result", ("result",),
+                 function=lambda: {"hit": verified_token_cache.stats["hits"], "miss": verified_token_cache.stats["misses"]})
+registry.gauge("redis_circuit_open", "1 while the Redis circuit breaker is open",
+               function=lambda: 1 if redis_manager.stats()["state"] == "open" else 0)
+registry.counter("log_records_dropped_total", "Log records not written", ("reason",),
+                 function=lambda: {"sampled": logging_system.stats()["sampled_out"], "queue_full": logging_system.stats()["dropped_queue_full"]})
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: request latency by route, DB pool, rate limits and caches"""
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Include API routers
 app.include_router(
     auth.router,
@@ -0,0 +1,218 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import re
+import time
+import uuid
+
+from app.core.logging_config import request_id_var
+from app.core.metrics import http_request_duration, route_label
+
+logger = logging.getLogger(__name__)
+
+# Headers added to every response unless the endpoint set them itself
+DEFAULT_SECURITY_HEADERS: Dict[str, str] = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+}
+
+# Incoming request ids are reused only if they look like an id (no header injection, bounded size)
+_REQUEST_ID_PATTERN = re.compile(rb"^[A-Za-z0-9._:-]{1,128}$")
+
+_SAFELISTED_HEADERS = {"accept", "accept-language", "content-language", "content-type"}
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def _encode(headers: Dict[str, str]) -> Headers:
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+
+class EdgeMiddleware:
+    """
+    Pure ASGI middleware for everything done at the edge of every request.
+
+    Adds security headers, handles CORS (preflight requests are answered here,
+    with Access-Control-Max-Age so browsers cache them), assigns a request id
+    (reused from the X-Request-ID request header when valid, exposed as
+    `request.state.request_id`, attached to log records via request_id_var and
+    echoed in the response), reports the processing time in X-Process-Time and
+    records it in the http_request_duration_seconds histogram.
+
+    All header names and values are encoded once at startup; per request the
+    middleware only appends prebuilt byte pairs to the response start message.
+    Unlike @app.middleware("http") it does not wrap the response in a stream or
+    run the endpoint in a separate task.
+    """
+
+    def __init__(
+        self,
+        app,
+        security_headers: Optional[Dict[str, str]] = None,
+        cors_origins: Sequence[str] = (),
+        cors_allow_credentials: bool = False,
+        cors_allow_methods: Iterable[str] = ("GET",),
+        cors_allow_headers: Iterable[str] = (),
+        cors_expose_headers: Iterable[str] = (),
+        cors_max_age: int = 600,
+        request_id_header: str = "X-Request-ID",
+        log_requests: bool = False,
+    ):
+        self.app = app
+        self.log_requests = log_requests
+        self._request_id_header = request_id_header.lower().encode("latin-1")
+        self._security_headers = _encode(
+            DEFAULT_SECURITY_HEADERS if security_headers is None else security_headers
+        )
+
+        self._allow_all_origins = "*" in cors_origins
+        self._origins = {origin.encode("latin-1") for origin in cors_origins if origin != "*"}
+        methods = [method.upper() for method in cors_allow_methods]
+        if "*" in methods:
+            methods = ["DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT"]
+        self._allow_methods = {method.encode("latin-1") for method in methods}
+        headers = [header.lower() for header in cors_allow_headers]
+        self._allow_all_headers = "*" in headers
+        self._allow_headers = _SAFELISTED_HEADERS | set(headers)
+
+        # Added to every response to an allowed cross-origin request
+        simple = {}
+        if cors_allow_credentials:
+            simple["Access-Control-Allow-Credentials"] = "true"
+        expose = list(cors_expose_headers)
+        if request_id_header not in expose:
+            expose.append(request_id_header)
+        expose.append("X-Process-Time")
+        simple["Access-Control-Expose-Headers"] = ", ".join(expose)
+        self._cors_simple_headers = _encode(simple)
+
+        # Added to every successful preflight response
+        preflight = {
+            "Access-Control-Allow-Methods": ", ".join(sorted(methods)),
+            "Access-Control-Max-Age": str(cors_max_age),
+        }
+        if cors_allow_credentials:
+            preflight["Access-Control-Allow-Credentials"] = "true"
+        if not self._allow_all_headers:
+            preflight["Access-Control-Allow-Headers"] = ", ".join(sorted(self._allow_headers))
+        self._cors_preflight_headers = _encode(preflight)
+
+        # With credentials the wildcard is not allowed: echo the origin instead
+        self._origin_wildcard = self._allow_all_origins and not cors_allow_credentials
+
+    def _origin_allowed(self, origin: bytes) -> bool:
+        return self._allow_all_origins or origin in self._origins
+
+    def _allow_origin_headers(self, origin: bytes) -> Headers:
+        if self._origin_wildcard:
+            return [(b"access-control-allow-origin", b"*")]
+        return [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        origin = None
+        request_id = None
+        preflight_method = None
+        preflight_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == self._request_id_header:
+                request_id = value
+            elif name == b"access-control-request-method":
+                preflight_method = value
+            elif name == b"access-control-request-headers":
+                preflight_headers = value
+
+        if request_id is None or not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex.encode("latin-1")
+        request_id_text = request_id.decode("latin-1")
+        scope.setdefault("state", {})["request_id"] = request_id_text
+
+        if origin is not None and scope["method"] == "OPTIONS" and preflight_method is not None:
+            await self._preflight(scope, send, origin, preflight_method, preflight_headers, request_id)
+            return
+
+        # Log records emitted while handling the request carry its id
+        context_token = request_id_var.set(request_id_text)
+
+        cors_headers = None
+        if origin is not None and self._origin_allowed(origin):
+            cors_headers = self._allow_origin_headers(origin) + self._cors_simple_headers
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                present = {name.lower() for name, _ in headers}
+                for name, value in self._security_headers:
+                    if name not in present:
+                        headers.append((name, value))
+                if cors_headers is not None:
+                    headers.extend(cors_headers)
+                headers.append((self._request_id_header, request_id))
+                headers.append((b"x-process-time", b"%.6f" % (time.perf_counter() - start)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_request_duration.labels(scope["method"], route_label(scope), status_code).observe(duration)
+            if self.log_requests and logger.isEnabledFor(logging.INFO):
+                client = scope.get("client")
+                logger.info(
+                    "%s %s %s %.4fs", scope["method"], scope["path"], status_code, duration,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round(duration * 1000, 3),
+                        "client_ip": client[0] if client else None,
+                    },
+                )
+            request_id_var.reset(context_token)
+
+    async def _preflight(
+        self,
+        scope,
+        send,
+        origin: bytes,
+        method: bytes,
+        requested_headers: Optional[bytes],
+        request_id: bytes,
+    ) -> None:
+        failures = []
+        if not self._origin_allowed(origin):
+            failures.append("origin")
+        if method.upper() not in self._allow_methods:
+            failures.append("method")
+        if requested_headers and not self._allow_all_headers:
+            requested = {h.strip().lower() for h in requested_headers.decode("latin-1").split(",") if h.strip()}
+            if not requested <= self._allow_headers:
+                failures.append("headers")
+
+        headers = [(self._request_id_header, request_id)]
+        if failures:
+            status, body = 400, ("Disallowed CORS " + ", ".join(failures)).encode("utf-8")
+            headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        else:
+            status, body = 200, b"OK"
+            headers.extend(self._allow_origin_headers(origin))
+            headers.extend(self._cors_preflight_headers)
+            if self._allow_all_headers and requested_headers:
+                headers.append((b"access-control-allow-headers", requested_headers))
+            headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        headers.extend(self._security_headers)
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -1,68 +1,435 @@
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import inspect
+import ipaddress
+import logging
+import math
+import threading
+import time
+
 from fastapi import FastAPI, Request
-import redis
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+
 from app.core.config import settings
-import logging
+from app.core.redis_manager import RedisManager, RedisUnavailable, redis_manager
+from app.middleware.shm_counters import SharedMemoryCounterStore
 
 logger = logging.getLogger(__name__)
 
-# Redis connection for rate limiting
-try:
-    redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-    # Test connection
-    redis_client.ping()
-    logger.info("Connected to Redis for rate limiting")
-except Exception as e:
-    logger.warning(f"Redis connection failed, using in-memory storage: {e}")
-    redis_client = None
+# Proxies whose X-Forwarded-For header is believed (addresses or CIDR ranges)
+_TRUSTED_PROXY_NETWORKS = [ipaddress.ip_network(proxy.strip(), strict=False) for proxy in settings.TRUSTED_PROXIES]
 
-# Create limiter instance
-# Rate limit configuration: configurable via environment variables
-# Current setting: 10 requests per minute (configurable in env.example)
-limiter = Limiter(
-    key_func=get_remote_address,
-    storage_uri=settings.REDIS_URL if redis_client else "memory://",
-    default_limits=[f"{settings.RATE_LIMIT_REQUESTS}/minute"]
-)
 
+@dataclass(frozen=True)
+class RateLimit:
+    """A limit of `requests` per `window` seconds."""
+    requests: int
+    window: int = 60
 
-def setup_rate_limiting(app: FastAPI) -> None:
+    def __str__(self) -> str:
+        return f"{self.requests} per {self.window} seconds"
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of one rate limit check, with the values reported in X-RateLimit-* headers."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # Seconds until the bucket is full again
+    retry_after: float  # Seconds until the next request is allowed (0 if allowed)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(int(time.time() + self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class RateLimitExceeded(Exception):
+    """Raised by a rate-limited endpoint when its bucket is empty."""
+
+    def __init__(self, limit: RateLimit, result: RateLimitResult):
+        self.limit = limit
+        self.result = result
+        self.detail = str(limit)
+        super().__init__(self.detail)
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "last_hit", "pending", "window_id", "own", "remote_seen")
+
+    def __init__(self, capacity: int, now: float):
+        self.tokens = float(capacity)
+        self.updated = now
+        self.last_hit = now
+        self.pending = 0      # Local hits not yet pushed to the shared store
+        self.window_id = -1   # Shared counter window the fields below refer to
+        self.own = 0          # Local hits pushed for that window
+        self.remote_seen = 0  # Other instances' hits already deducted for that window
+
+
+class RedisCounterStore:
+    """Expiring counters in Redis, shared by every instance; one pipelined round trip per batch."""
+
+    name = "redis"
+
+    def __init__(self, manager: RedisManager):
+        self._manager = manager
+
+    def incr_many(self, items: Sequence[Tuple[str, int, int]]) -> List[int]:
+        def run(client):
+            pipe = client.pipeline(transaction=False)
+            for key, delta, ttl in items:
+                if delta:
+                    pipe.incrby(key, delta)
+                    pipe.expire(key, ttl)
+                else:
+                    pipe.get(key)
+            return pipe.execute()
+
+        replies = iter(self._manager.call(run))
+        results = []
+        for _, delta, _ in items:
+            results.append(int(next(replies) or 0))
+            if delta:
+                next(replies)  # EXPIRE reply
+        return results
+
+
+class RateLimiter:
     """
-    Setup rate limiting middleware for the FastAPI app.
-    
-    Args:
-        app: FastAPI application instance
+    Token-bucket rate limiter with per-process buckets and batched shared counters.
+
+    Each (route, identity) pair has an in-process token bucket: a check is a dict
+    lookup and some arithmetic under a lock, with no I/O. Every `sync_interval`
+    seconds a background task pushes the hits counted locally to a shared
+    fixed-window counter (one batch per sync) and deducts the hits other
+    processes reported from the local buckets, so limits hold globally with a
+    lag of at most one sync interval.
+
+    Counters live in Redis, shared by all instances, while its circuit (see
+    redis_manager) is closed. Otherwise they live in a shared memory segment
+    (`shm_path`), shared by the worker processes of this host, so N workers
+    still enforce one limit rather than N. With neither, limits apply per
+    process.
     """
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
-    
-    logger.info(f"Rate limiting configured: {settings.RATE_LIMIT_REQUESTS} requests per {settings.RATE_LIMIT_WINDOW} seconds")
+
+    def __init__(
+        self,
+        redis: Optional[RedisManager] = None,
+        sync_interval: float = 1.0,
+        key_prefix: str = "ratelimit:",
+        shm_path: Optional[str] = None,
+        shm_slots: int = 65536,
+    ):
+        self.sync_interval = sync_interval
+        self.key_prefix = key_prefix
+        self._redis = redis if redis is not None and redis.enabled else None
+        self._redis_store = RedisCounterStore(self._redis) if self._redis is not None else None
+        self._shm_path = shm_path
+        self._shm_slots = shm_slots
+        self._shm_store: Optional[SharedMemoryCounterStore] = None
+        self._shm_checked = False
+        self._backend = "memory"
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._limits: Dict[str, RateLimit] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats_counters = {"allowed": 0, "rejected": 0, "syncs": 0}
+
+    def _get_shm_store(self) -> Optional[SharedMemoryCounterStore]:
+        if not self._shm_checked:
+            self._shm_checked = True
+            if self._shm_path:
+                try:
+                    self._shm_store = SharedMemoryCounterStore(self._shm_path, self._shm_slots)
+                except Exception as e:
+                    logger.warning(f"Shared memory counters unavailable, rate limits apply per process: {e}")
+        return self._shm_store
+
+    def hit(self, scope: str, identity: str, limit: RateLimit) -> RateLimitResult:
+        """
+        Consume one token for an identity on a route.
+
+        Args:
+            scope: Name of the limited route (each route has its own buckets)
+            identity: Caller key, e.g. client IP or user ID
+            limit: Limit applied to the route
+
+        Returns:
+            RateLimitResult (allowed or not, and the header values)
+        """
+        now = time.monotonic()
+        rate = limit.requests / limit.window
+        key = (scope, identity)
+        with self._lock:
+            self._limits[scope] = limit
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(limit.requests, now)
+            else:
+                bucket.tokens = min(float(limit.requests), bucket.tokens + (now - bucket.updated) * rate)
+                bucket.updated = now
+            bucket.last_hit = now
+
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                bucket.pending += 1
+                allowed, retry_after = True, 0.0
+                self.stats_counters["allowed"] += 1
+            else:
+                allowed, retry_after = False, (1 - bucket.tokens) / rate
+                self.stats_counters["rejected"] += 1
+            tokens = bucket.tokens
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit.requests,
+            remaining=max(0, int(tokens)),
+            reset_after=(limit.requests - tokens) / rate,
+            retry_after=retry_after,
+        )
+
+    def _push(self, store, batch: List[Tuple[Tuple[str, str], int, int, RateLimit]]) -> List[int]:
+        return store.incr_many([
+            (f"{self.key_prefix}{scope}:{identity}:{window_id}", delta, limit.window * 2)
+            for (scope, identity), window_id, delta, limit in batch
+        ])
+
+    def sync(self) -> int:
+        """
+        Exchange hit counts with the shared counters and drop idle buckets.
+
+        Returns:
+            Number of buckets synced
+        """
+        now = time.monotonic()
+        wall = time.time()
+        store = self._select_store()
+        backend = store.name if store is not None else "memory"
+        if backend != self._backend:
+            # Counts in the previous store do not carry over
+            with self._lock:
+                for bucket in self._buckets.values():
+                    bucket.window_id = -1
+            self._backend = backend
+
+        batch: List[Tuple[Tuple[str, str], int, int, RateLimit]] = []
+        with self._lock:
+            for key, bucket in list(self._buckets.items()):
+                limit = self._limits[key[0]]
+                if not bucket.pending and now - bucket.last_hit >= limit.window:
+                    # Idle for a whole window: the bucket is full and its counter expired
+                    del self._buckets[key]
+                    continue
+                if store is None:
+                    bucket.pending = 0
+                    continue
+                window_id = int(wall // limit.window)
+                if bucket.window_id != window_id:
+                    bucket.window_id, bucket.own, bucket.remote_seen = window_id, 0, 0
+                batch.append((key, window_id, bucket.pending, limit))
+                bucket.own += bucket.pending
+                bucket.pending = 0
+
+        if not batch:
+            return 0
+
+        try:
+            totals = self._push(store, batch)
+        except Exception as e:
+            # Redis failures are counted by the circuit breaker, which switches the next sync to shared memory
+            if not isinstance(e, RedisUnavailable):
+                logger.warning(f"Rate limit sync failed: {e}")
+            # Push the hits again on the next sync
+            with self._lock:
+                for key, window_id, delta, _ in batch:
+                    bucket = self._buckets.get(key)
+                    if bucket is not None and bucket.window_id == window_id:
+                        bucket.own -= delta
+                        bucket.pending += delta
+            return 0
+
+        with self._lock:
+            for (key, window_id, delta, _), total in zip(batch, totals):
+                bucket = self._buckets.get(key)
+                if bucket is None or bucket.window_id != window_id:
+                    continue
+                remote = total - bucket.own
+                if remote > bucket.remote_seen:
+                    bucket.tokens = max(0.0, bucket.tokens - (remote - bucket.remote_seen))
+                    bucket.remote_seen = remote
+        self.stats_counters["syncs"] += 1
+        return len(batch)
+
+    def _select_store(self):
+        """Redis while its circuit is closed, else shared memory."""
+        if self._redis is not None and self._redis.available:
+            return self._redis_store
+        return self._get_shm_store()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                logger.warning(f"Rate limit sync failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self.sync)
+
+    def limit(
+        self,
+        requests: int,
+        window: int = 60,
+        key_func: Optional[Callable[[Request], str]] = None,
+        scope: Optional[str] = None,
+    ) -> Callable:
+        """
+        Decorator limiting an endpoint to `requests` per `window` seconds per identity.
+
+        The endpoint must take a `request: Request` parameter. The result is stored
+        in `request.state.rate_limit` for RateLimitHeadersMiddleware; an empty
+        bucket raises RateLimitExceeded.
+
+        Args:
+            requests: Requests allowed per window
+            window: Window in seconds
+            key_func: Identity of the caller (default: client IP)
+            scope: Bucket namespace (default: the endpoint's qualified name)
+        """
+        rate_limit = RateLimit(requests, window)
+        identify = key_func or get_client_ip
+
+        def decorator(func: Callable) -> Callable:
+            if "request" not in inspect.signature(func).parameters:
+                raise TypeError(f"Rate-limited endpoint {func.__name__} needs a 'request: Request' parameter")
+            name = scope or f"{func.__module__}.{func.__qualname__}"
+
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                request: Request = kwargs["request"]
+                result = self.hit(name, identify(request), rate_limit)
+                request.state.rate_limit = result
+                if not result.allowed:
+                    raise RateLimitExceeded(rate_limit, result)
+                return await func(*args, **kwargs)
+
+            wrapper.rate_limit = rate_limit
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self._backend,
+            "buckets": len(self._buckets),
+            **self.stats_counters,
+        }
+
+
+class RateLimitHeadersMiddleware:
+    """Adds X-RateLimit-* headers to responses of rate-limited endpoints (pure ASGI)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                result = scope.get("state", {}).get("rate_limit")
+                if result is not None:
+                    headers = MutableHeaders(scope=message)
+                    for name, value in result.headers().items():
+                        if name not in headers:
+                            headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address.strip())
+    except ValueError:
+        return False
+    return any(ip in network for network in _TRUSTED_PROXY_NETWORKS)
 
 
 def get_client_ip(request: Request) -> str:
     """
     Get client IP address from request.
-    
+
+    The peer address is used unless it is one of TRUSTED_PROXIES, in which case
+    the nearest X-Forwarded-For entry that is not a trusted proxy is used.
+    Forwarded headers from any other peer are ignored, since clients can set them.
+
     Args:
         request: FastAPI request object
-        
+
     Returns:
         Client IP address
     """
-    # Check for forwarded headers (for load balancers/proxies)
-    forwarded_for = request.headers.get("X-Forwarded-For")
-    if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
+    peer = request.client.host if request.client else "127.0.0.1"
+    if not _is_trusted_proxy(peer):
+        return peer
+    forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return forwarded[0] if forwarded else peer
+
+
+# Create limiter instance
+limiter = RateLimiter(
+    redis=redis_manager if settings.RATE_LIMIT_USE_REDIS else None,
+    sync_interval=settings.RATE_LIMIT_SYNC_SECONDS,
+    shm_path=settings.RATE_LIMIT_SHM_PATH if settings.RATE_LIMIT_SHM_ENABLED else None,
+    shm_slots=settings.RATE_LIMIT_SHM_SLOTS,
+)
+
+
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    """Return 429 with the limit and retry headers."""
+    logger.warning(f"Rate limit exceeded for {get_client_ip(request)} on {request.url.path}: {exc.detail}")
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Rate limit exceeded: {exc.detail}"},
+        headers=exc.result.headers()
+    )
+
+
+def setup_rate_limiting(app: FastAPI) -> None:
+    """
+    Setup rate limiting middleware for the FastAPI app.
     
-    real_ip = request.headers.get("X-Real-IP")
-    if real_ip:
-        return real_ip
+    Args:
+        app: FastAPI application instance
+    """
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+    app.add_middleware(RateLimitHeadersMiddleware)
     
-    return request.client.host if request.client else "unknown"
+    logger.info(f"Rate limiting configured: {settings.RATE_LIMIT_REQUESTS} requests per {settings.RATE_LIMIT_WINDOW} seconds")
 
 
 # Custom rate limit decorator for specific endpoints
@@ -77,7 +444,7 @@ def custom_rate_limit(requests: int, window: int = 60):
     Returns:
         Rate limit decorator
     """
-    return limiter.limit(f"{requests}/{window}second")
+    return limiter.limit(requests, window)
 
 
 # Higher rate limit for authentication endpoints
@@ -87,4 +454,4 @@ auth_rate_limit = custom_rate_limit(5, 60)  # 5 requests per minute for auth
 api_rate_limit = custom_rate_limit(settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW)
 
 # Stricter rate limit for sensitive operations
-strict_rate_limit = custom_rate_limit(3, 300)  # 3 requests per 5 minutes 
\ No newline at end of file
+strict_rate_limit = custom_rate_limit(3, 300)  # 3 requests per 5 minutes
@@ -0,0 +1,141 @@
+from typing import List, Optional, Sequence, Tuple
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"RLSHM001"
+_HEADER = struct.Struct("<8sQQ")  # magic, slots, stripes
+_SLOT = struct.Struct("<QdQ")     # key hash (0 = never used), expires at (epoch), count
+
+
+class SharedMemoryCounterStore:
+    """
+    Expiring counters in a memory-mapped file shared by all worker processes on a host.
+
+    The file (in /dev/shm by default, i.e. RAM) holds a fixed-size open-addressing
+    hash table of (key hash, expiry, count) slots. The table is split into
+    `stripes` regions; a key only ever lives in the region chosen by its hash, and
+    each region is guarded by an fcntl lock on one byte, so workers updating
+    different keys rarely contend. Expired slots are reused in place. Used by the
+    rate limiter when Redis is not available, so limits stay global across the
+    workers of a host instead of being multiplied by the worker count.
+    """
+
+    name = "shm"
+
+    def __init__(self, path: str, slots: int = 65536, stripes: int = 64):
+        if fcntl is None:
+            raise RuntimeError("Shared memory counters need fcntl (POSIX only)")
+        self.path = path
+        self._thread_lock = threading.Lock()  # fcntl locks are per process, not per thread
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                header = os.pread(fd, _HEADER.size, 0)
+                if len(header) == _HEADER.size and header[:8] == _MAGIC:
+                    # Reuse the table another worker created (its geometry wins)
+                    _, slots, stripes = _HEADER.unpack(header)
+                else:
+                    slots = max(stripes, slots - slots % stripes)
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, _HEADER.size + slots * _SLOT.size)
+                    os.pwrite(fd, _HEADER.pack(_MAGIC, slots, stripes), 0)
+                    logger.info(f"Created shared rate limit counters at {path} ({slots} slots)")
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            self._mmap = mmap.mmap(fd, _HEADER.size + slots * _SLOT.size)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self.slots = slots
+        self.stripes = stripes
+        self._stripe_slots = slots // stripes
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+        return value or 1
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + index * _SLOT.size
+
+    def _update(self, key_hash: int, delta: int, ttl: int, now: float) -> Optional[int]:
+        """Add delta to a key within its stripe (caller holds the stripe lock)."""
+        stripe = key_hash % self.stripes
+        base = stripe * self._stripe_slots
+        start = (key_hash >> 16) % self._stripe_slots
+        free_index = None
+
+        for probe in range(self._stripe_slots):
+            index = base + (start + probe) % self._stripe_slots
+            offset = self._offset(index)
+            slot_hash, expires_at, count = _SLOT.unpack_from(self._mmap, offset)
+            if slot_hash == key_hash and expires_at > now:
+                if delta:
+                    count += delta
+                    _SLOT.pack_into(self._mmap, offset, slot_hash, expires_at, count)
+                return count
+            if slot_hash == 0 or expires_at <= now:
+                if free_index is None:
+                    free_index = index
+                if slot_hash == 0:
+                    # Never-used slot ends the probe sequence: the key is not stored
+                    break
+
+        if not delta:
+            return 0
+        if free_index is None:
+            return None
+        _SLOT.pack_into(self._mmap, self._offset(free_index), key_hash, now + ttl, delta)
+        return delta
+
+    def incr_many(self, items: Sequence[Tuple[str, int, int]]) -> List[int]:
+        """
+        Add to several counters, creating them with a TTL if missing.
+
+        Args:
+            items: (key, delta, ttl seconds) tuples; a delta of 0 only reads the counter
+
+        Returns:
+            Counter values after the update, in order
+
+        Raises:
+            RuntimeError: If a stripe of the table is full
+        """
+        now = time.time()
+        by_stripe = {}
+        for position, (key, delta, ttl) in enumerate(items):
+            key_hash = self._hash(key)
+            by_stripe.setdefault(key_hash % self.stripes, []).append((position, key_hash, delta, ttl))
+
+        results = [0] * len(items)
+        with self._thread_lock:
+            for stripe, entries in by_stripe.items():
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+                try:
+                    for position, key_hash, delta, ttl in entries:
+                        value = self._update(key_hash, delta, ttl, now)
+                        if value is None:
+                            raise RuntimeError(f"Shared rate limit counters full ({self.path})")
+                        results[position] = value
+                finally:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+        return results
+
+    def close(self) -> None:
+        self._mmap.close()
+        os.close(self._fd)
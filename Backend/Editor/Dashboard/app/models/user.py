@@ -35,6 +35,8 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_login = Column(DateTime(timezone=True), nullable=True)
+    # Bumped on role change, deactivation and password change; tokens carry it as the `ver` claim
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}', role='{self.role}', is_active={self.is_active})>"
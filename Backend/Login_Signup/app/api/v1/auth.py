@@ -1,34 +1,32 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Request
 from sqlalchemy.orm import Session
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-import redis
+from datetime import datetime
 import logging
 from fastapi.responses import JSONResponse
 
 from app.core.database import get_db
 from app.core.config import settings
-from app.core.security import create_login_response, sanitize_input
+from app.core.security import create_login_response, sanitize_input, verify_token_claims
+from app.core.revocation import revocation_list
+from app.core.token_cache import verified_token_cache
 from app.schemas.auth import (
     LoginRequest, LoginResponse, SignupRequest, SignupResponse, 
-    ErrorResponse, TokenValidationResponse
+    ErrorResponse, TokenValidationResponse, RefreshRequest, LogoutRequest,
+    BatchTokenValidationRequest, BatchTokenValidationResponse, ResetPasswordRequest, VerifyEmailRequest
 )
-from app.crud.user import authenticate_user, create_user, check_email_exists
+from app.crud.user import (
+    authenticate_user, create_user, get_users_by_ids, EmailAlreadyRegistered,
+    request_password_reset, reset_password as reset_user_password, verify_email as verify_user_email
+)
+from app.crud.auth_token import (
+    issue_refresh_token, rotate_refresh_token, revoke_refresh_token, revoke_access_token
+)
+from app.core.password_executor import PasswordQueueFull
+from app.middleware.rate_limit import limiter, get_client_ip
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Setup rate limiter with Redis fallback
-try:
-    redis_client = redis.from_url(settings.REDIS_URL)
-    redis_client.ping()  # Test connection
-    limiter = Limiter(key_func=get_remote_address, storage_uri=settings.REDIS_URL)
-    logger.info("Rate limiter using Redis storage")
-except Exception as e:
-    logger.warning(f"Redis connection failed, using memory storage: {e}")
-    limiter = Limiter(key_func=get_remote_address)
-
 # Create router
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -36,7 +34,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/login", response_model=LoginResponse)
-@limiter.limit(f"{settings.RATE_LIMIT_REQUESTS}/minute")
+@limiter.limit(settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW)
 async def login(
     request: Request,
     login_data: LoginRequest,
@@ -66,6 +64,8 @@ async def login(
         "access_token": "jwt_token_here",
         "token_type": "bearer",
         "expires_in": 1800,
+        "refresh_token": "opaque_refresh_token",
+        "refresh_expires_in": 1209600,
         "user": {
             "id": 1,
             "username": "user@example.com",
@@ -80,6 +80,7 @@ async def login(
     - 423: Account locked
     - 429: Rate limit exceeded
     - 500: Server error
+    - 503: Too many password verifications queued
     """
     try:
         # Sanitize input
@@ -87,8 +88,8 @@ async def login(
         password = login_data.password  # Don't sanitize password as it may contain special chars
         
         # Log login attempt (without sensitive data)
-        client_ip = get_remote_address(request)
-        logger.info(f"Login attempt for user: {userid} from IP: {client_ip}")
+        client_ip = get_client_ip(request)
+        logger.debug("Login attempt for user: %s from IP: %s", userid, client_ip)
         
         # Validate input
         if not userid or not password:
@@ -99,7 +100,15 @@ async def login(
             )
         
         # Authenticate user
-        user = authenticate_user(db, userid, password)
+        try:
+            user = await authenticate_user(db, userid, password, client=client_ip)
+        except PasswordQueueFull:
+            logger.warning(f"Password hashing queue full, rejecting login from IP: {client_ip}")
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"success": False, "message": "Server is busy, please try again shortly"},
+                headers={"Retry-After": "1"}
+            )
         
         if not user:
             logger.warning(f"Failed authentication for user: {userid} from IP: {client_ip}")
@@ -117,13 +126,22 @@ async def login(
             )
         
         # Create login response with JWT token
-        resp = create_login_response(user.id, user.username, user.role)
+        resp = create_login_response(
+            user.id, user.username, user.role,
+            is_active=user.is_active, token_version=user.token_version or 0
+        )
+        # Refresh token lets the client renew the access token without the password
+        refresh_token = issue_refresh_token(db, user.id)
         
-        logger.info(f"Successful login for user: {user.email} (ID: {user.id}) from IP: {client_ip}")
+        logger.info("Successful login for user: %s (ID: %s) from IP: %s", user.email, user.id, client_ip)
         # Return a dict with success: true and the token details
         return JSONResponse(
             status_code=status.HTTP_200_OK,
-            content={"success": True, "access_token": resp["access_token"], "token_type": resp["token_type"], "expires_in": resp["expires_in"], "user": resp["user"]}
+            content={
+                "success": True, "access_token": resp["access_token"], "token_type": resp["token_type"],
+                "expires_in": resp["expires_in"], "refresh_token": refresh_token,
+                "refresh_expires_in": settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400, "user": resp["user"]
+            }
         )
         
     except Exception as e:
@@ -134,8 +152,126 @@ async def login(
         )
 
 
+@router.post("/refresh", response_model=LoginResponse)
+@limiter.limit(settings.REFRESH_RATE_LIMIT)
+async def refresh(
+    request: Request,
+    refresh_data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+    
+    Refresh tokens are single use: each call revokes the presented token and
+    returns a replacement. Presenting an already used token revokes every refresh
+    token of that user (possible theft), forcing a new password login.
+    No password verification happens here.
+    
+    **Request Body:**
+    ```json
+    {
+        "refresh_token": "opaque_refresh_token"
+    }
+    ```
+    
+    **Response:** same shape as `/auth/login`
+    
+    **Error Codes:**
+    - 401: Invalid, expired, reused or revoked refresh token (or inactive account)
+    - 429: Rate limit exceeded
+    - 500: Server error
+    """
+    client_ip = get_client_ip(request)
+    try:
+        user, new_refresh_token = rotate_refresh_token(db, refresh_data.refresh_token)
+        if not user:
+            logger.warning(f"Rejected refresh token from IP: {client_ip}")
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"success": False, "message": "Invalid or expired refresh token"}
+            )
+        
+        resp = create_login_response(
+            user.id, user.username, user.role,
+            is_active=user.is_active, token_version=user.token_version or 0
+        )
+        logger.info("Tokens refreshed for user ID: %s from IP: %s", user.id, client_ip)
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "success": True, "access_token": resp["access_token"], "token_type": resp["token_type"],
+                "expires_in": resp["expires_in"], "refresh_token": new_refresh_token,
+                "refresh_expires_in": settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400, "user": resp["user"]
+            }
+        )
+    
+    except Exception as e:
+        logger.error(f"Token refresh error from IP: {client_ip} - {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"success": False, "message": "Internal server error during token refresh"}
+        )
+
+
+@router.post("/logout")
+async def logout(
+    request: Request,
+    logout_data: LogoutRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Revoke the caller's access token and, if given, their refresh token.
+    
+    **Headers:**
+        Authorization: Bearer <access_token>
+    
+    **Request Body:**
+    ```json
+    {
+        "refresh_token": "opaque_refresh_token"  // optional
+    }
+    ```
+    
+    The access token is recorded in auth_tokens and rejected by every service
+    instance (after at most one revocation sync interval) until it expires.
+    
+    **Error Codes:**
+    - 401: Missing or invalid access token
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"success": False, "message": "Missing access token"},
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    try:
+        claims = verify_token_claims(token)
+    except HTTPException:
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"success": False, "message": "Invalid authentication token"},
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    user_id = int(claims["sub"])
+    if logout_data.refresh_token:
+        revoke_refresh_token(db, logout_data.refresh_token, user_id=user_id)
+    
+    if claims.get("jti"):
+        expires_at = datetime.utcfromtimestamp(claims["exp"])
+        revoke_access_token(db, claims["jti"], user_id, expires_at)
+        revocation_list.add(claims["jti"], expires_at)
+    verified_token_cache.revoke_token(token, expires_at=float(claims["exp"]))
+    
+    logger.info("User ID: %s logged out", user_id)
+    return {"success": True, "message": "Logged out"}
+
+
 @router.post("/signup", response_model=SignupResponse)
-@limiter.limit(f"{settings.SIGNUP_RATE_LIMIT}/minute")
+@limiter.limit(settings.SIGNUP_RATE_LIMIT)
 async def signup(
     request: Request,
     signup_data: SignupRequest,
@@ -178,32 +314,29 @@ async def signup(
     - 422: Unprocessable (e.g. misnamed fields (e.g. "emailid" instead of "email"))
     - 429: Rate limit exceeded
     - 500: Internal server error
+    - 503: Too many password hashes queued
     """
-    try:
-        # Log the incoming request body (for debugging)
-        body = await request.json()
-        logger.info(f"Signup request body: {body}")
-        # (If the UI sends "emailid" (or misnamed fields), pydantic (SignupRequest) will raise a ValidationError.)
-    except Exception as e:
-        logger.error(f"Error parsing signup request body: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            content={"success": False, "message": "Invalid request body (e.g. missing or misnamed fields)."}
-        )
     try:
         # Get client IP for logging
-        client_ip = get_remote_address(request)
-        logger.info(f"Signup attempt for email: {signup_data.email} from IP: {client_ip}")
-        # Check if email already exists
-        if check_email_exists(db, signup_data.email):
+        client_ip = get_client_ip(request)
+        logger.debug("Signup attempt for email: %s from IP: %s", signup_data.email, client_ip)
+        # Create new user (the unique email index rejects duplicates)
+        try:
+            new_user = await create_user(db, signup_data, client=client_ip)
+        except EmailAlreadyRegistered:
             logger.warning(f"Signup attempt with existing email: {signup_data.email} from IP: {client_ip}")
             return JSONResponse(
                 status_code=status.HTTP_409_CONFLICT,
                 content={"success": False, "message": "Email address is already registered"}
             )
-        # Create new user
-        new_user = create_user(db, signup_data)
-        logger.info(f"User signup successful: {new_user.email} (ID: {new_user.id}) from IP: {client_ip}")
+        except PasswordQueueFull:
+            logger.warning(f"Password hashing queue full, rejecting signup from IP: {client_ip}")
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"success": False, "message": "Server is busy, please try again shortly"},
+                headers={"Retry-After": "1"}
+            )
+        logger.info("User signup successful: %s (ID: %s) from IP: %s", new_user.email, new_user.id, client_ip)
         return SignupResponse(
             success=True,
             message="Account created successfully",
@@ -239,6 +372,26 @@ async def health_check():
     }
 
 
+def _token_user_result(claims: dict, user) -> TokenValidationResponse:
+    """
+    Per-token checks shared by /validate-token and /validate-tokens: the user must
+    exist, be active and still be on the token version the token was issued with.
+    """
+    if user is None:
+        return TokenValidationResponse(valid=False, message="User not found")
+    if not user.is_active:
+        return TokenValidationResponse(valid=False, message="User account is inactive")
+    if "ver" in claims and claims["ver"] != (user.token_version or 0):
+        return TokenValidationResponse(valid=False, message="Token has been invalidated")
+    return TokenValidationResponse(
+        valid=True,
+        user_id=user.id,
+        username=user.username,
+        role=user.role,
+        message="Token is valid"
+    )
+
+
 @router.post("/validate-token", response_model=TokenValidationResponse)
 async def validate_token(
     request: Request,
@@ -248,6 +401,8 @@ async def validate_token(
     """
     Validate JWT token and return user information.
     
+    Applies the same checks as /validate-tokens, including the token version.
+    
     **Note:** This endpoint is for internal validation only.
     Production systems should validate tokens locally for performance.
     
@@ -270,11 +425,11 @@ async def validate_token(
     ```
     """
     try:
-        from app.core.security import verify_token
         from app.crud.user import get_user_by_id
         
         # Verify token
-        user_id = verify_token(token)
+        claims = verify_token_claims(token)
+        user_id = claims.get("sub")
         
         if not user_id:
             return TokenValidationResponse(
@@ -282,28 +437,8 @@ async def validate_token(
                 message="Invalid token"
             )
         
-        # Get user details
-        user = get_user_by_id(db, int(user_id))
-        
-        if not user:
-            return TokenValidationResponse(
-                valid=False,
-                message="User not found"
-            )
-        
-        if not user.is_active:
-            return TokenValidationResponse(
-                valid=False,
-                message="User account is inactive"
-            )
-        
-        return TokenValidationResponse(
-            valid=True,
-            user_id=user.id,
-            username=user.username,
-            role=user.role,
-            message="Token is valid"
-        )
+        # Get user details and check them against the token
+        return _token_user_result(claims, get_user_by_id(db, int(user_id)))
         
     except Exception as e:
         logger.error(f"Token validation error: {str(e)}")
@@ -313,13 +448,152 @@ async def validate_token(
         )
 
 
+@router.post("/validate-tokens", response_model=BatchTokenValidationResponse)
+def validate_tokens(
+    payload: BatchTokenValidationRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Validate several JWT tokens in one call (for gateways).
+    
+    Tokens are decoded in one pass (through the verified token cache) and all
+    referenced users are loaded with a single query. Results are returned in
+    request order; a token is also invalid once the user's token version has
+    moved past the one it was issued with.
+    
+    **Request Body:**
+    ```json
+    {
+        "tokens": ["jwt_token_1", "jwt_token_2"]
+    }
+    ```
+    
+    **Response:**
+    ```json
+    {
+        "results": [
+            {"valid": true, "user_id": 123, "username": "user", "role": "User", "message": "Token is valid"},
+            {"valid": false, "message": "Invalid token"}
+        ]
+    }
+    ```
+    """
+    # Decode each distinct token once
+    claims_by_token = {}
+    for token in payload.tokens:
+        if token in claims_by_token:
+            continue
+        try:
+            claims = verify_token_claims(token)
+            claims_by_token[token] = (claims, int(claims["sub"]))
+        except (HTTPException, ValueError):
+            claims_by_token[token] = None
+    
+    try:
+        users = get_users_by_ids(db, (entry[1] for entry in claims_by_token.values() if entry is not None))
+    except Exception as e:
+        logger.error("Batch token validation error: %s", e)
+        return BatchTokenValidationResponse(results=[
+            TokenValidationResponse(valid=False, message="Token validation failed") for _ in payload.tokens
+        ])
+    
+    results = []
+    for token in payload.tokens:
+        entry = claims_by_token[token]
+        if entry is None:
+            results.append(TokenValidationResponse(valid=False, message="Invalid token"))
+            continue
+        claims, user_id = entry
+        results.append(_token_user_result(claims, users.get(user_id)))
+    
+    return BatchTokenValidationResponse(results=results)
+
+
 @router.post("/forgot-password", response_model=dict)
+@limiter.limit(settings.FORGOT_PASSWORD_RATE_LIMIT)
 async def forgot_password(request: Request, email: str, db: Session = Depends(get_db)):
     """
-    Endpoint for "Forgot Password" (a stub that returns a success message).
-    In a real implementation, you'd generate a reset link (e.g. a JWT or a token) and send an email.
-    (This endpoint is intended for UI integration so that a "Forgot Password" link can be added.)
+    Start a password reset for the given email.
+    
+    The reset email is staged in the email outbox in the same transaction as
+    the reset token and delivered in the background, so the response never
+    waits on the mail server. The response is the same whether or not the
+    email belongs to an account, so it cannot be used to discover accounts.
+    
+    **Query Parameters:**
+        email: Account email address
+    
+    **Error Codes:**
+    - 429: Rate limit exceeded
+    - 500: Server error
+    """
+    client_ip = get_client_ip(request)
+    try:
+        queued = request_password_reset(db, email.strip())
+        if not queued:
+            logger.debug("Password reset requested for unknown email from IP: %s", client_ip)
+    except Exception as e:
+        logger.error(f"Forgot password error from IP: {client_ip} - {str(e)}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"success": False, "message": "Internal server error during password reset request"}
+        )
+    return {"success": True, "message": "If the email is registered, a reset link has been sent."}
+
+
+@router.post("/reset-password", response_model=dict)
+@limiter.limit(settings.FORGOT_PASSWORD_RATE_LIMIT)
+async def reset_password(request: Request, reset_data: ResetPasswordRequest, db: Session = Depends(get_db)):
+    """
+    Set a new password with the token from the reset email.
+    
+    **Request Body:**
+    ```json
+    {
+        "token": "token_from_email",
+        "new_password": "new_secure_password"
+    }
+    ```
+    
+    Tokens issued before the reset, access and refresh, stop working.
+    
+    **Error Codes:**
+    - 400: Invalid or expired reset token
+    - 429: Rate limit exceeded
+    - 503: Too many password hashes queued
+    """
+    client_ip = get_client_ip(request)
+    try:
+        user = await reset_user_password(db, reset_data.token, reset_data.new_password, client=client_ip)
+    except PasswordQueueFull:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"success": False, "message": "Server is busy, please try again shortly"},
+            headers={"Retry-After": "1"}
+        )
+    if not user:
+        logger.warning(f"Invalid password reset token from IP: {client_ip}")
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"success": False, "message": "Invalid or expired reset token"}
+        )
+    
+    verified_token_cache.revoke_subject(user.id)
+    return {"success": True, "message": "Password has been reset"}
+
+
+@router.post("/verify-email", response_model=dict)
+def verify_email(verify_data: VerifyEmailRequest, db: Session = Depends(get_db)):
     """
-    # (In a real implementation, you'd check if the email exists, generate a reset token, and send an email.)
-    # For now, we return a success message.
-    return {"success": True, "message": "Reset password link sent."} 
\ No newline at end of file
+    Confirm an email address with the token from the verification email.
+    
+    **Error Codes:**
+    - 400: Invalid verification token
+    """
+    user = verify_user_email(db, verify_data.token)
+    if not user:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"success": False, "message": "Invalid verification token"}
+        )
+    return {"success": True, "message": "Email verified"}
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 import secrets
@@ -14,21 +14,35 @@ class Settings(BaseSettings):
     DATABASE_NAME: str = "svtemple_2"
     
     # JWT Configuration (Configurable token expiration)
-    SECRET_KEY: str = "your-shared-secret-key-change-in-production"  # Fixed key for token sharing between services
-    ALGORITHM: str = "HS256"
+    SECRET_KEY: str = "your-shared-secret-key-change-in-production"  # HS256 key (legacy tokens / ALGORITHM=HS256)
+    ALGORITHM: str = "RS256"  # RS256: sign with a private key, verifiers use the public JWKS
+    JWT_KEYS_DIR: str = "keys"            # RSA signing keys, one <kid>.pem per key
+    JWT_ACTIVE_KID: Optional[str] = None  # Key id used for new tokens (default: newest key file)
+    JWT_ACCEPT_HS256: bool = True         # Keep accepting HS256 tokens issued before the switch
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # Configurable - change as needed
     
     # Security Configuration
     ALLOWED_HOSTS: List[str] = ["localhost", "127.0.0.1", "0.0.0.0"]
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8080", "http://localhost:8001", "http://localhost:8002"]
+    CORS_MAX_AGE: int = 600   # Seconds browsers may cache a preflight response
+    TRUSTED_PROXIES: List[str] = []  # Proxy addresses/CIDRs whose X-Forwarded-For is used for the client IP
     
     # Rate Limiting Configuration (Stricter for auth endpoints)
     RATE_LIMIT_REQUESTS: int = 5   # 5 login attempts per minute
     RATE_LIMIT_WINDOW: int = 60    # Time window in seconds
     SIGNUP_RATE_LIMIT: int = 3     # 3 signup attempts per minute
+    RATE_LIMIT_USE_REDIS: bool = True    # Share counters across instances via REDIS_URL
+    RATE_LIMIT_SYNC_SECONDS: float = 1.0 # Interval between batched counter syncs
+    RATE_LIMIT_SHM_ENABLED: bool = True  # Without Redis, share counters between workers via shared memory
+    RATE_LIMIT_SHM_PATH: str = "/dev/shm/temple-login-ratelimit"
+    RATE_LIMIT_SHM_SLOTS: int = 65536    # Counter slots (24 bytes each)
     
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 0.25    # Connect/command timeout in seconds
+    REDIS_MAX_CONNECTIONS: int = 50       # Connection pool size
+    REDIS_FAILURE_THRESHOLD: int = 3      # Consecutive failures before the circuit opens
+    REDIS_RECOVERY_SECONDS: float = 5.0   # Probe interval while the circuit is open
     
     # Environment
     ENVIRONMENT: str = "development"
@@ -40,10 +54,58 @@ class Settings(BaseSettings):
     
     # Logging
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"        # "json" (one object per line) or "text"
+    LOG_SAMPLE_RATE: float = 1.0    # Fraction of requests whose INFO/DEBUG records are kept
+    LOG_QUEUE_SIZE: int = 10000     # Records buffered for the writer thread before dropping
+    LOG_REQUESTS: bool = True       # One log line per request (method, path, status, time, client IP)
     
     # Account Security
     MAX_LOGIN_ATTEMPTS: int = 5        # Account lockout after failed attempts
     LOCKOUT_DURATION_MINUTES: int = 15 # Account lockout duration
+    LOCKOUT_WINDOW_MINUTES: int = 15   # Sliding window for counting failed attempts
+    LOCKOUT_USE_REDIS: bool = True     # Share failure counters via REDIS_URL (memory fallback)
+    LAST_LOGIN_FLUSH_SECONDS: int = 5  # last_login is written behind in batches
+    IDENTIFIER_FILTER_ENABLED: bool = True      # Reject unknown login identifiers without a query
+    IDENTIFIER_FILTER_ERROR_RATE: float = 0.01  # Bloom filter false positive rate
+    IDENTIFIER_FILTER_REFRESH_SECONDS: int = 5  # Min interval between reloads of new users (misses in between query the DB)
+    
+    # Password Hashing Policy (first scheme hashes new passwords; the others are rehashed on login)
+    PASSWORD_HASH_SCHEMES: List[str] = ["bcrypt"]
+    PASSWORD_HASH_COSTS: Dict[str, int] = {"bcrypt": 12}  # Minimum cost per scheme (passlib rounds)
+    PASSWORD_HASH_TARGET_VERIFY_MS: int = 0              # Raise the cost at startup up to this verify time (0 = off)
+    
+    # Password Hashing Pool (bcrypt runs in worker processes, off the event loop)
+    PASSWORD_HASH_WORKERS: int = 0               # 0 = one worker per CPU core
+    PASSWORD_HASH_MAX_QUEUE: int = 256           # Requests get 503 beyond this backlog
+    PASSWORD_HASH_MAX_QUEUE_PER_CLIENT: int = 8  # Fair share of the backlog per client IP (needs TRUSTED_PROXIES)
+    
+    # Verified Token Cache (decoded JWT claims reused until the token expires)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    TOKEN_VALIDATION_BATCH_MAX: int = 100  # Tokens per /auth/validate-tokens request
+    
+    # Email (SMTP delivery from the email_outbox table; unset SMTP_HOST keeps mail queued)
+    SMTP_HOST: Optional[str] = None
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_USE_TLS: bool = True              # STARTTLS on a plain connection
+    SMTP_USE_SSL: bool = False             # Implicit TLS (port 465)
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    EMAIL_FROM: str = "no-reply@localhost"
+    FRONTEND_URL: str = "http://localhost:3000"  # Base of links in verification/reset emails
+    EMAIL_VERIFICATION_ENABLED: bool = True      # Send a verification email at signup
+    PASSWORD_RESET_EXPIRE_MINUTES: int = 30
+    FORGOT_PASSWORD_RATE_LIMIT: int = 5          # Reset requests per minute per IP
+    EMAIL_OUTBOX_WORKERS: int = 2                # Concurrent delivery tasks
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20            # Messages sent per SMTP connection
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0       # Poll interval when idle (new mail wakes workers at once)
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8           # Then the message is marked failed
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = 30.0   # First retry delay, doubled per attempt (max 1 hour)
+    
+    # Refresh Tokens (opaque, stored hashed in auth_tokens, rotated on every use)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    REFRESH_RATE_LIMIT: int = 30              # Refresh requests per minute per IP
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 15   # Poll interval for access tokens revoked by other instances
     
     @field_validator("DATABASE_URL")
     @classmethod
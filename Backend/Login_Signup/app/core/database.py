@@ -5,6 +5,7 @@ from typing import Generator
 import logging
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +25,9 @@ engine = create_engine(
     }
 )
 
+# Pool checkouts and wait time for /metrics
+instrument_engine(engine)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -58,6 +62,8 @@ def init_db() -> None:
     try:
         # Import all models here to ensure they are registered with SQLAlchemy
         from app.models import user  # noqa
+        from app.models import auth_token  # noqa
+        from app.models import email_outbox  # noqa
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import random
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.mailer import Mailer, OutgoingEmail, mailer
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """
+    Delivers email_outbox rows in the background.
+
+    Each of `workers` tasks repeatedly claims up to `batch_size` due rows with
+    SELECT ... FOR UPDATE SKIP LOCKED (so concurrent workers, in this process
+    or other instances, never claim the same rows and never wait on each
+    other), moves them `lease_seconds` into the future and commits, then sends
+    the batch over one SMTP connection outside any transaction. Delivered rows
+    are marked sent; failed ones are retried with exponential backoff and
+    jitter until `max_attempts`, then marked failed. A worker that dies after
+    claiming leaves rows that become due again when the lease expires.
+
+    notify() wakes the workers right after a request commits a message, so
+    delivery does not wait for the next poll. `categories` restricts a worker
+    to messages of those categories (all by default).
+    """
+
+    def __init__(
+        self,
+        mailer: Mailer,
+        workers: int = 2,
+        batch_size: int = 20,
+        poll_interval: float = 5.0,
+        lease_seconds: int = 120,
+        max_attempts: int = 8,
+        backoff_base: float = 30.0,
+        backoff_max: float = 3600.0,
+        categories: Optional[Sequence[str]] = None,
+    ):
+        self.mailer = mailer
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.categories = tuple(categories) if categories else None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_error: Optional[str] = None
+        self.stats_counters = {"sent": 0, "retried": 0, "failed": 0, "batches": 0}
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before the next attempt after `attempts` failed ones (full jitter)."""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, attempts - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def claim(self) -> List[Tuple[OutgoingEmail, int]]:
+        """
+        Claim a batch of due messages.
+
+        Returns:
+            (message, attempt number) pairs
+        """
+        from app.models.email_outbox import EmailOutbox
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            query = db.query(EmailOutbox).filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+            if self.categories:
+                query = query.filter(EmailOutbox.category.in_(self.categories))
+            rows = (
+                query
+                .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            claimed = []
+            lease_until = now + timedelta(seconds=self.lease_seconds)
+            for row in rows:
+                row.attempts += 1
+                row.next_attempt_at = lease_until
+                claimed.append((OutgoingEmail(row.id, row.recipient, row.subject, row.body), row.attempts))
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def deliver(self, claimed: List[Tuple[OutgoingEmail, int]]) -> int:
+        """
+        Send claimed messages and record the outcome of each.
+
+        Returns:
+            Number of messages delivered
+        """
+        from app.models.email_outbox import EmailOutbox
+
+        if not claimed:
+            return 0
+        errors = self.mailer.send_batch([message for message, _ in claimed])
+
+        now = datetime.utcnow()
+        changes = []
+        sent = 0
+        for (message, attempts), error in zip(claimed, errors):
+            if error is None:
+                sent += 1
+                changes.append({"id": message.id, "status": "sent", "sent_at": now, "last_error": None})
+            elif attempts >= self.max_attempts:
+                self.stats_counters["failed"] += 1
+                logger.error("Email %s to %s failed permanently after %d attempts: %s", message.id, message.recipient, attempts, error)
+                changes.append({"id": message.id, "status": "failed", "last_error": error[:500]})
+            else:
+                self.stats_counters["retried"] += 1
+                retry_at = now + timedelta(seconds=self.backoff(attempts))
+                changes.append({"id": message.id, "next_attempt_at": retry_at, "last_error": error[:500]})
+            if error is not None:
+                self._last_error = error
+
+        db = SessionLocal()
+        try:
+            # Rows with the same keys are grouped into executemany UPDATEs by primary key
+            for keys in {tuple(sorted(change)) for change in changes}:
+                db.execute(update(EmailOutbox), [change for change in changes if tuple(sorted(change)) == keys])
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Unrecorded rows are retried when their lease expires (a sent one may be sent twice)
+            raise
+        finally:
+            db.close()
+
+        self.stats_counters["sent"] += sent
+        self.stats_counters["batches"] += 1
+        return sent
+
+    def run_once(self) -> int:
+        """
+        Claim and deliver one batch.
+
+        Returns:
+            Number of messages claimed
+        """
+        claimed = self.claim()
+        self.deliver(claimed)
+        return len(claimed)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.warning(f"Email outbox delivery failed: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                # Caught up: sleep until the next poll or a notify()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    def notify(self) -> None:
+        """Wake the workers (call after committing a new message)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        if not self.mailer.configured:
+            logger.warning("SMTP_HOST is not set; outgoing email stays in the outbox until it is configured")
+            return
+        if not self._tasks:
+            self._wakeup = asyncio.Event()
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._wakeup = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._tasks),
+            "workers": len(self._tasks),
+            "last_error": self._last_error,
+            **self.stats_counters,
+        }
+
+
+# Global outbox worker
+outbox_worker = OutboxWorker(
+    mailer,
+    workers=settings.EMAIL_OUTBOX_WORKERS,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    backoff_base=settings.EMAIL_OUTBOX_BACKOFF_SECONDS,
+)
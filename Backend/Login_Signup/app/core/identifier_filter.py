@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+import hashlib
+import logging
+import asyncio
+import math
+import secrets
+import threading
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.password_policy import password_policy
+
+logger = logging.getLogger(__name__)
+
+# Re-read rows updated this long before the watermark, to tolerate clock skew between writers
+_WATERMARK_OVERLAP = timedelta(seconds=2)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter: no false negatives, about `error_rate` false positives
+    once `capacity` items have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def normalize_identifier(identifier: str) -> str:
+    """Login identifiers are matched case-insensitively (see get_user_by_email_or_username)."""
+    return identifier.lower().strip()
+
+
+class IdentifierIndex:
+    """
+    Membership index of every email and username in the users table.
+
+    Built at startup and updated by create_user. An identifier missing from the
+    filter may still belong to a user created or renamed by another worker or
+    service since the last load, so a miss is only rejected after an
+    incremental reload (rows whose updated_at moved past a watermark) that
+    started after the request arrived. Reloads run off the event loop, at most
+    once every `refresh_interval` seconds; misses in between fall through to
+    the indexed database lookup. Unknown-identifier floods therefore cost at
+    most one reload per interval plus single-row index probes, and there are
+    no false negatives.
+    Until the index is built, every identifier is treated as possibly existing.
+
+    `dummy_hash` is a hash of a random password under the current policy; logins
+    for unknown identifiers verify against it so they take as long as real ones.
+    """
+
+    def __init__(self, error_rate: float = 0.01, refresh_interval: int = 5):
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self._filter: Optional[BloomFilter] = None
+        self._watermark: Optional[datetime] = None
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+        self._added_during_build: Optional[list] = None
+        self.dummy_hash: Optional[str] = None
+        self.stats_counters = {"rejected": 0, "passed": 0, "fallbacks": 0, "refreshes": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    def build(self) -> int:
+        """
+        Load every identifier from the users table into a new filter.
+
+        Returns:
+            Number of users loaded
+        """
+        from app.models.user import User
+
+        with self._lock:
+            # Users created here while the table is read may be missing from the rows
+            self._added_during_build = []
+            db = SessionLocal()
+            try:
+                rows = db.query(User.email, User.username, User.updated_at).all()
+            except Exception:
+                self._added_during_build = None
+                raise
+            finally:
+                db.close()
+
+            # Two identifiers per user, doubled to leave room for signups before a rebuild
+            bloom = BloomFilter(max(4 * len(rows), 10000), self.error_rate)
+            watermark = None
+            for email, username, updated_at in rows:
+                for identifier in (email, username):
+                    if identifier:
+                        bloom.add(normalize_identifier(identifier))
+                if updated_at is not None and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+
+            added, self._added_during_build = self._added_during_build, None
+            for identifier in added:
+                bloom.add(identifier)
+            self._filter = bloom
+            self._watermark = watermark
+            self._last_refresh = time.monotonic()
+            return len(rows)
+
+    async def start(self) -> None:
+        """Build the filter and the dummy hash off the event loop."""
+        try:
+            self.dummy_hash = await asyncio.to_thread(password_policy.context.hash, secrets.token_urlsafe(16))
+            count = await asyncio.to_thread(self.build)
+            logger.info(f"Identifier filter built from {count} users")
+        except Exception as e:
+            logger.warning(f"Identifier filter build failed; all identifiers go to the database: {e}")
+
+    def refresh(self) -> int:
+        """
+        Add identifiers of users created or updated since the last load.
+
+        Returns:
+            Number of users read
+        """
+        from app.models.user import User
+
+        if self._filter is None or self._filter.count > self._filter.capacity:
+            return self.build()
+
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            self.stats_counters["refreshes"] += 1
+            db = SessionLocal()
+            try:
+                query = db.query(User.email, User.username, User.updated_at)
+                if self._watermark is not None:
+                    query = query.filter(User.updated_at >= self._watermark - _WATERMARK_OVERLAP)
+                rows = query.all()
+            finally:
+                db.close()
+
+            for email, username, updated_at in rows:
+                for identifier in (email, username):
+                    if identifier:
+                        self._filter.add(normalize_identifier(identifier))
+                if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+            return len(rows)
+
+    def add(self, *identifiers: str) -> None:
+        """Add identifiers of a newly created user."""
+        if self._filter is None:
+            return
+        building = self._added_during_build
+        for identifier in identifiers:
+            if identifier:
+                self._filter.add(normalize_identifier(identifier))
+                if building is not None:
+                    building.append(normalize_identifier(identifier))
+
+    async def might_exist(self, identifier: str) -> bool:
+        """
+        Check whether an identifier may belong to a user.
+
+        Args:
+            identifier: Email or username from a login request
+
+        Returns:
+            False only if no user has this identifier (no false negatives)
+        """
+        if self._filter is None:
+            return True
+        identifier = normalize_identifier(identifier)
+        if identifier in self._filter:
+            self.stats_counters["passed"] += 1
+            return True
+
+        # Not seen yet: the user may have been created elsewhere since the last reload
+        arrived = time.monotonic()
+        if arrived - self._last_refresh < self.refresh_interval:
+            # Reloaded recently; let the indexed lookup decide rather than reload again
+            self.stats_counters["fallbacks"] += 1
+            return True
+
+        self._last_refresh = arrived
+        try:
+            await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            logger.warning(f"Identifier index refresh failed: {e}")
+            return True
+        if identifier in self._filter:
+            self.stats_counters["passed"] += 1
+            return True
+
+        self.stats_counters["rejected"] += 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "identifiers": self._filter.count if self._filter else 0,
+            "capacity": self._filter.capacity if self._filter else 0,
+            "size_bytes": len(self._filter._bits) if self._filter else 0,
+            **self.stats_counters,
+        }
+
+
+# Global identifier index
+identifier_index = IdentifierIndex(
+    error_rate=settings.IDENTIFIER_FILTER_ERROR_RATE,
+    refresh_interval=settings.IDENTIFIER_FILTER_REFRESH_SECONDS,
+)
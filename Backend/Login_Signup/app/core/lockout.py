@@ -0,0 +1,184 @@
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis_manager import RedisManager, RedisUnavailable, redis_manager
+
+logger = logging.getLogger(__name__)
+
+
+class LockoutTracker:
+    """
+    Sliding-window failed-login counters, kept out of the users table.
+
+    Each failure is a timestamp; failures older than `window_seconds` no longer
+    count. Counters live in Redis (a sorted set per user, shared by all
+    instances) while it is reachable, otherwise in process memory. The users row
+    is only written when the lock state changes (see crud.user).
+    """
+
+    def __init__(self, window_seconds: int, redis: Optional[RedisManager] = None, key_prefix: str = "lockout:"):
+        self.window_seconds = window_seconds
+        self.key_prefix = key_prefix
+        self._redis = redis
+        self._failures: Dict[int, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _use_redis(self) -> bool:
+        return self._redis is not None and self._redis.enabled
+
+    def record_failure(self, user_id: int) -> int:
+        """
+        Record a failed login.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Number of failures within the window, including this one
+        """
+        now = time.time()
+        if self._use_redis():
+            key = f"{self.key_prefix}{user_id}"
+
+            def record(client):
+                pipe = client.pipeline()
+                pipe.zremrangebyscore(key, 0, now - self.window_seconds)
+                pipe.zadd(key, {f"{now}:{uuid.uuid4().hex[:8]}": now})
+                pipe.zcard(key)
+                pipe.expire(key, self.window_seconds)
+                return int(pipe.execute()[2])
+
+            try:
+                return self._redis.call(record)
+            except RedisUnavailable:
+                pass
+
+        with self._lock:
+            failures = self._failures.setdefault(user_id, deque())
+            while failures and failures[0] <= now - self.window_seconds:
+                failures.popleft()
+            failures.append(now)
+            return len(failures)
+
+    def count(self, user_id: int) -> int:
+        """Failures within the window for a user."""
+        now = time.time()
+        if self._use_redis():
+            try:
+                return int(self._redis.call(
+                    lambda client: client.zcount(f"{self.key_prefix}{user_id}", now - self.window_seconds, "+inf")
+                ))
+            except RedisUnavailable:
+                pass
+        with self._lock:
+            return sum(1 for t in self._failures.get(user_id, ()) if t > now - self.window_seconds)
+
+    def reset(self, user_id: int) -> None:
+        """Forget a user's failures (successful login, lock applied or manual unlock)."""
+        if self._use_redis():
+            try:
+                self._redis.call(lambda client: client.delete(f"{self.key_prefix}{user_id}"))
+            except RedisUnavailable as e:
+                logger.debug(f"Lockout tracker could not reset Redis counter: {e}")
+        with self._lock:
+            self._failures.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis" if self._use_redis() and self._redis.available else "memory",
+            "window_seconds": self.window_seconds,
+            "tracked_users": len(self._failures),
+        }
+
+
+class LastLoginWriter:
+    """
+    Write-behind buffer for users.last_login.
+
+    Successful logins only record the timestamp in memory; a background task
+    writes all pending timestamps in one batched UPDATE every `flush_interval`
+    seconds (and on shutdown). A crash loses at most one interval of
+    last_login values, which are informational only.
+    """
+
+    def __init__(self, flush_interval: int = 5):
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+
+    def record(self, user_id: int, when: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._pending[user_id] = when or datetime.utcnow()
+
+    def flush(self) -> int:
+        """
+        Write pending last_login values.
+
+        Returns:
+            Number of users updated
+        """
+        from app.models.user import User
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        db = SessionLocal()
+        try:
+            # ORM bulk UPDATE by primary key: a single executemany statement
+            db.execute(
+                update(User),
+                [{"id": user_id, "last_login": ts} for user_id, ts in pending.items()],
+            )
+            db.commit()
+            self.flushed += len(pending)
+            return len(pending)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error writing last_login batch: {e}")
+            # Keep the values for the next flush unless newer ones arrived meanwhile
+            with self._lock:
+                for user_id, ts in pending.items():
+                    self._pending.setdefault(user_id, ts)
+            return 0
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.to_thread(self.flush)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": len(self._pending), "flushed": self.flushed}
+
+
+# Global instances
+lockout_tracker = LockoutTracker(
+    window_seconds=settings.LOCKOUT_WINDOW_MINUTES * 60,
+    redis=redis_manager if settings.LOCKOUT_USE_REDIS else None,
+)
+last_login_writer = LastLoginWriter(flush_interval=settings.LAST_LOGIN_FLUSH_SECONDS)
@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import List, Optional, Sequence
+import logging
+import smtplib
+import ssl
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class OutgoingEmail:
+    """One message to deliver; `id` is the outbox row it came from."""
+    id: int
+    recipient: str
+    subject: str
+    body: str
+
+
+class Mailer:
+    """
+    SMTP delivery of message batches.
+
+    A batch is sent over one connection (one TCP/TLS handshake and login for
+    all its messages). Failures are reported per message, so one rejected
+    recipient does not fail the rest of the batch; a connection failure fails
+    the messages not sent yet.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str],
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        use_ssl: bool = False,
+        from_address: str = "no-reply@localhost",
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.from_address = from_address
+        self.timeout = timeout
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.host)
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+        if self.username:
+            smtp.login(self.username, self.password or "")
+        return smtp
+
+    def _build(self, email: OutgoingEmail) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.from_address
+        message["To"] = email.recipient
+        message["Subject"] = email.subject
+        message["Date"] = formatdate(localtime=False)
+        message["Message-ID"] = make_msgid(idstring=f"outbox-{email.id}")
+        message.set_content(email.body)
+        return message
+
+    def send_batch(self, emails: Sequence[OutgoingEmail]) -> List[Optional[str]]:
+        """
+        Send messages over a single SMTP connection.
+
+        Args:
+            emails: Messages to send
+
+        Returns:
+            One entry per message, in order: None if accepted by the server, else the error
+        """
+        if not emails:
+            return []
+        errors: List[Optional[str]] = [None] * len(emails)
+        try:
+            smtp = self._connect()
+        except (smtplib.SMTPException, OSError) as e:
+            return [f"connect: {e}"] * len(emails)
+
+        try:
+            for index, email in enumerate(emails):
+                try:
+                    smtp.send_message(self._build(email))
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                    errors[index] = str(e)
+                    smtp.rset()
+                except (smtplib.SMTPException, OSError) as e:
+                    # Connection lost: this and the remaining messages are retried later
+                    for remaining in range(index, len(emails)):
+                        errors[remaining] = str(e)
+                    break
+        finally:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+        return errors
+
+
+# Global mailer
+mailer = Mailer(
+    settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USERNAME,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    use_ssl=settings.SMTP_USE_SSL,
+    from_address=settings.EMAIL_FROM,
+    timeout=settings.SMTP_TIMEOUT_SECONDS,
+)
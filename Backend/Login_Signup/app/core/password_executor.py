@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.password_policy import PasswordPolicy, password_policy
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordQueueFull(Exception):
+    """Raised when too many hashing jobs are waiting; callers should answer 503."""
+
+
+# Hashing context inside a worker process, built from the policy by the pool initializer
+_worker_context: Optional[CryptContext] = None
+
+
+def _init_worker(context_kwargs: Dict[str, Any]) -> None:
+    global _worker_context
+    _worker_context = CryptContext(**context_kwargs)
+
+
+def _context() -> CryptContext:
+    return _worker_context or password_policy.context
+
+
+def _hash_password(password: str) -> str:
+    return _context().hash(password)
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    try:
+        return _context().verify(password, hashed_password)
+    except ValueError:
+        # Malformed or unknown hash format
+        return False
+
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return _context().verify_and_update(password, hashed_password)
+    except ValueError:
+        return False, None
+
+
+_Job = Tuple[Callable[..., Any], tuple, asyncio.Future]
+
+
+class PasswordHashingExecutor:
+    """
+    Runs password hashing and verification in a process pool so a ~250 ms bcrypt
+    call never blocks the event loop.
+
+    At most `workers` jobs run at once; the rest wait in per-client queues that are
+    served round-robin, so one client submitting many logins cannot starve the others.
+    The total backlog is bounded (`max_queue`), as is each client's share of it
+    (`max_queue_per_client`, 0 = no per-client cap); beyond that `PasswordQueueFull`
+    is raised. The per-client cap is only as good as the client key: behind a proxy
+    every request shares the proxy's address, so the global instance enforces it
+    only when TRUSTED_PROXIES is configured and the forwarded address can be used.
+    All bookkeeping happens on the event loop thread, so no locks are needed.
+    Workers build their hashing context from the password policy when they start.
+    """
+
+    def __init__(
+        self,
+        policy: PasswordPolicy,
+        workers: int = 0,
+        max_queue: int = 256,
+        max_queue_per_client: int = 8,
+    ):
+        self.policy = policy
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queues: "OrderedDict[str, Deque[_Job]]" = OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "peak_queue_depth": 0}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.policy.context_kwargs(),),
+            )
+        return self._pool
+
+    def reload_policy(self) -> None:
+        """Start fresh workers with the current policy (e.g. after calibration)."""
+        self.shutdown()
+
+    async def hash(self, password: str, client: Optional[str] = None) -> str:
+        """
+        Hash a password without blocking the event loop.
+        
+        Args:
+            password: Plain text password
+            client: Fairness key (usually the client IP)
+            
+        Returns:
+            Hashed password string
+            
+        Raises:
+            PasswordQueueFull: If the hashing backlog is full
+        """
+        return await self._submit(client, _hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str, client: Optional[str] = None) -> bool:
+        """
+        Verify a password against its hash without blocking the event loop.
+        
+        Args:
+            password: Plain text password
+            hashed_password: Hashed password from database
+            client: Fairness key (usually the client IP)
+            
+        Returns:
+            True if password matches, False otherwise
+            
+        Raises:
+            PasswordQueueFull: If the hashing backlog is full
+        """
+        return await self._submit(client, _verify_password, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str, client: Optional[str] = None
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and rehash it if the stored hash is out of policy.
+        
+        Args:
+            password: Plain text password
+            hashed_password: Hashed password from database
+            client: Fairness key (usually the client IP)
+            
+        Returns:
+            (matches, new_hash) where new_hash is None unless the hash should be replaced
+            
+        Raises:
+            PasswordQueueFull: If the hashing backlog is full
+        """
+        return await self._submit(client, _verify_and_update, password, hashed_password)
+
+    async def _submit(self, client: Optional[str], fn: Callable[..., Any], *args: Any) -> Any:
+        key = client or "anonymous"
+        queue = self._queues.get(key)
+        if self._queued >= self.max_queue or (
+            self.max_queue_per_client and queue is not None and len(queue) >= self.max_queue_per_client
+        ):
+            self._counters["rejected"] += 1
+            raise PasswordQueueFull("Password hashing queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self._queues[key] = deque()
+        queue.append((fn, args, future))
+        self._queued += 1
+        self._counters["submitted"] += 1
+        self._counters["peak_queue_depth"] = max(self._counters["peak_queue_depth"], self._queued)
+        self._dispatch()
+        return await future
+
+    def _dispatch(self) -> None:
+        while self._running < self.workers and self._queues:
+            key, queue = next(iter(self._queues.items()))
+            fn, args, future = queue.popleft()
+            self._queued -= 1
+            if queue:
+                # Round-robin: this client goes to the back of the line
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if future.done():  # caller went away while queued
+                continue
+
+            try:
+                try:
+                    job = self._get_pool().submit(fn, *args)
+                except BrokenProcessPool:
+                    logger.error("Password hashing pool is broken; restarting it")
+                    self._pool = None
+                    job = self._get_pool().submit(fn, *args)
+            except Exception as e:
+                self._counters["failed"] += 1
+                future.set_exception(e)
+                continue
+            self._running += 1
+            asyncio.wrap_future(job).add_done_callback(
+                lambda done, future=future: self._on_done(done, future)
+            )
+
+    def _on_done(self, done: asyncio.Future, future: asyncio.Future) -> None:
+        self._running -= 1
+        if done.cancelled():  # pool shut down before the job started
+            self._counters["failed"] += 1
+            future.cancel()
+        elif done.exception() is not None:
+            self._counters["failed"] += 1
+            if not future.done():
+                future.set_exception(done.exception())
+        else:
+            self._counters["completed"] += 1
+            if not future.done():
+                future.set_result(done.result())
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and throughput counters for health/metrics endpoints."""
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queue_depth": self._queued,
+            "clients_waiting": len(self._queues),
+            "max_queue": self.max_queue,
+            **self._counters,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global instance
+password_executor = PasswordHashingExecutor(
+    password_policy,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    max_queue_per_client=settings.PASSWORD_HASH_MAX_QUEUE_PER_CLIENT if settings.TRUSTED_PROXIES else 0,
+)
@@ -0,0 +1,131 @@
+from typing import Any, Dict, List, Optional
+import logging
+import time
+
+from passlib.context import CryptContext
+from passlib.registry import get_crypt_handler
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Password used only to time hash verification during calibration
+_CALIBRATION_PASSWORD = "calibration-Password-1234"
+
+
+def measure_verify_ms(scheme: str, cost: Optional[int] = None, samples: int = 3) -> float:
+    """
+    Median time to verify one password hashed with `scheme` at `cost`.
+
+    Args:
+        scheme: passlib scheme name (e.g. "bcrypt", "argon2")
+        cost: Rounds for the scheme (passlib "rounds"); scheme default when None
+        samples: Number of verifications to time
+
+    Returns:
+        Median verification time in milliseconds
+    """
+    handler = get_crypt_handler(scheme)
+    if cost is not None:
+        handler = handler.using(rounds=cost)
+    hashed = handler.hash(_CALIBRATION_PASSWORD)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.verify(_CALIBRATION_PASSWORD, hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+class PasswordPolicy:
+    """
+    Configurable password hashing policy.
+
+    - `schemes`: accepted schemes; the first one is used for new hashes and the
+      others are deprecated (verified, then rehashed on the next login).
+    - `costs`: minimum cost per scheme (passlib "rounds": log2 for bcrypt/scrypt,
+      iterations/time_cost for pbkdf2/argon2). Hashes below it are out of policy.
+    - `target_verify_ms`: when set, `calibrate()` raises the cost of the primary
+      scheme until one verification takes about this long on this machine.
+      Costs are only ever raised, so hosts with different speeds never
+      downgrade each other's hashes.
+
+    `context` is a single CryptContext updated in place, so modules holding a
+    reference to it always see the current policy.
+    """
+
+    def __init__(self, schemes: List[str], costs: Dict[str, int], target_verify_ms: int = 0):
+        if not schemes:
+            raise ValueError("At least one password hashing scheme is required")
+        self.schemes = list(schemes)
+        self.costs = dict(costs)
+        self.target_verify_ms = target_verify_ms
+        self.context = CryptContext(**self.context_kwargs())
+
+    @property
+    def primary(self) -> str:
+        return self.schemes[0]
+
+    def context_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for CryptContext describing this policy (also sent to worker processes)."""
+        kwargs: Dict[str, Any] = {
+            "schemes": self.schemes,
+            "default": self.primary,
+            "deprecated": self.schemes[1:],
+        }
+        for scheme, cost in self.costs.items():
+            if scheme in self.schemes:
+                kwargs[f"{scheme}__rounds"] = cost
+                kwargs[f"{scheme}__min_rounds"] = cost
+        return kwargs
+
+    def calibrate(self) -> Optional[int]:
+        """
+        Raise the primary scheme's cost so a verification takes about `target_verify_ms`.
+
+        Returns:
+            The cost now in effect for the primary scheme, or None if calibration is disabled
+        """
+        if not self.target_verify_ms:
+            return None
+        handler = get_crypt_handler(self.primary)
+        if not hasattr(handler, "rounds_cost"):
+            logger.warning(f"Scheme {self.primary} has no tunable cost; skipping calibration")
+            return None
+
+        floor = self.costs.get(self.primary, handler.default_rounds)
+        cost = floor
+        elapsed = measure_verify_ms(self.primary, cost)
+        if handler.rounds_cost == "log2":
+            # Each step doubles the work
+            while elapsed * 2 <= self.target_verify_ms and cost < handler.max_rounds:
+                cost += 1
+                elapsed *= 2
+        elif elapsed > 0:
+            cost = min(handler.max_rounds, max(floor, int(cost * self.target_verify_ms / elapsed)))
+
+        if cost != floor:
+            self.costs[self.primary] = cost
+            self.context.update(**self.context_kwargs())
+        measured = measure_verify_ms(self.primary, cost)
+        logger.info(
+            f"Password hashing calibrated: {self.primary} cost={cost} "
+            f"verify={measured:.0f}ms (target {self.target_verify_ms}ms, floor {floor})"
+        )
+        return cost
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "schemes": self.schemes,
+            "costs": self.costs,
+            "target_verify_ms": self.target_verify_ms,
+        }
+
+
+# Global policy instance
+password_policy = PasswordPolicy(
+    schemes=settings.PASSWORD_HASH_SCHEMES,
+    costs=settings.PASSWORD_HASH_COSTS,
+    target_verify_ms=settings.PASSWORD_HASH_TARGET_VERIFY_MS,
+)
@@ -0,0 +1,178 @@
+from typing import Any, Callable, Dict, Optional, TypeVar
+import asyncio
+import logging
+import threading
+import time
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RedisUnavailable(Exception):
+    """Raised when Redis is not configured, the circuit is open, or a command failed."""
+
+
+class RedisManager:
+    """
+    Shared Redis client with a circuit breaker.
+
+    The client (and its connection pool) is created on first use, never at
+    import, and commands use short socket timeouts. After `failure_threshold`
+    consecutive failures the circuit opens: callers get RedisUnavailable at once
+    and use their local fallback instead of waiting for a timeout on every
+    request. While open, a background task pings Redis every `recovery_interval`
+    seconds and closes the circuit when it answers. Without the background task
+    (e.g. in scripts), one caller is let through per interval as the probe.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        socket_timeout: float = 0.25,
+        max_connections: int = 50,
+        failure_threshold: int = 3,
+        recovery_interval: float = 5.0,
+    ):
+        self.url = url
+        self.socket_timeout = socket_timeout
+        self.max_connections = max_connections
+        self.failure_threshold = failure_threshold
+        self.recovery_interval = recovery_interval
+        self._client: Optional[redis.Redis] = None
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._open_until: Optional[float] = None  # Set while the circuit is open
+        self._last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats_counters = {"calls": 0, "failures": 0, "short_circuited": 0, "trips": 0, "recoveries": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    @property
+    def available(self) -> bool:
+        """Whether commands are currently sent to Redis (configured and circuit closed)."""
+        return self.enabled and self._open_until is None
+
+    def _get_client(self) -> redis.Redis:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(
+                        self.url,
+                        max_connections=self.max_connections,
+                        socket_timeout=self.socket_timeout,
+                        socket_connect_timeout=self.socket_timeout,
+                        health_check_interval=30,
+                    ))
+        return self._client
+
+    def call(self, operation: Callable[[redis.Redis], T]) -> T:
+        """
+        Run a command (or pipeline) against Redis through the circuit breaker.
+
+        Args:
+            operation: Function receiving the client, e.g. `lambda r: r.get(key)`
+
+        Returns:
+            The operation's result
+
+        Raises:
+            RedisUnavailable: If Redis is not configured, the circuit is open, or the command failed
+        """
+        if not self.enabled:
+            raise RedisUnavailable("Redis is not configured")
+        if self._open_until is not None:
+            with self._lock:
+                # Without the background probe, let one caller through per interval
+                probe = self._task is None and time.monotonic() >= self._open_until
+                if probe:
+                    self._open_until = time.monotonic() + self.recovery_interval
+            if not probe:
+                self.stats_counters["short_circuited"] += 1
+                raise RedisUnavailable("Redis circuit open")
+
+        self.stats_counters["calls"] += 1
+        try:
+            result = operation(self._get_client())
+        except redis.RedisError as e:
+            self._record_failure(e)
+            raise RedisUnavailable(str(e)) from e
+        self._record_success()
+        return result
+
+    def _record_success(self) -> None:
+        if self._consecutive_failures or self._open_until is not None:
+            with self._lock:
+                if self._open_until is not None:
+                    self.stats_counters["recoveries"] += 1
+                    logger.info("Redis reachable again, circuit closed")
+                self._consecutive_failures = 0
+                self._open_until = None
+
+    def _record_failure(self, error: Exception) -> None:
+        with self._lock:
+            self.stats_counters["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_error = str(error)
+            if self._open_until is None and self._consecutive_failures >= self.failure_threshold:
+                self._open_until = time.monotonic() + self.recovery_interval
+                self.stats_counters["trips"] += 1
+                logger.warning(f"Redis failing ({error}); circuit open, using local fallbacks")
+            elif self._open_until is not None:
+                self._open_until = time.monotonic() + self.recovery_interval
+
+    def probe(self) -> bool:
+        """Ping Redis, updating the circuit state. Returns True if it answered."""
+        if not self.enabled:
+            return False
+        try:
+            self._get_client().ping()
+        except redis.RedisError as e:
+            self._record_failure(e)
+            return False
+        self._record_success()
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.recovery_interval)
+            if self._open_until is not None:
+                await asyncio.to_thread(self.probe)
+
+    def start(self) -> None:
+        """Start probing Redis in the background while the circuit is open."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._client is not None:
+            self._client.connection_pool.disconnect()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "configured": self.enabled,
+            "state": "disabled" if not self.enabled else ("open" if self._open_until is not None else "closed"),
+            "consecutive_failures": self._consecutive_failures,
+            "last_error": self._last_error,
+            **self.stats_counters,
+        }
+
+
+# Global Redis manager
+redis_manager = RedisManager(
+    settings.REDIS_URL,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    failure_threshold=settings.REDIS_FAILURE_THRESHOLD,
+    recovery_interval=settings.REDIS_RECOVERY_SECONDS,
+)
@@ -1,19 +1,19 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.core.config import settings
+from app.core.password_policy import password_policy
+from app.core.token_cache import TokenRevoked, verified_token_cache
+from app.core.revocation import revocation_list
+from app.core.signing_keys import signing_keys
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context with enhanced security
-pwd_context = CryptContext(
-    schemes=["bcrypt"], 
-    deprecated="auto",
-    bcrypt__rounds=12  # Higher rounds for better security
-)
+# Password hashing context, configured by the hashing policy (see password_policy.py)
+pwd_context = password_policy.context
 
 
 def create_access_token(
@@ -39,50 +39,81 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    # Base payload
-    to_encode = {"exp": expire, "sub": str(subject), "iat": datetime.utcnow()}
+    # Base payload (jti lets a single token be revoked, e.g. at logout)
+    to_encode = {"exp": expire, "sub": str(subject), "iat": datetime.utcnow(), "jti": uuid.uuid4().hex}
     
     # Add additional claims if provided
     if additional_claims:
         to_encode.update(additional_claims)
     
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    if settings.ALGORITHM == "RS256":
+        kid, private_key = signing_keys.signing_key()
+        encoded_jwt = jwt.encode(to_encode, private_key, algorithm="RS256", headers={"kid": kid})
+    else:
+        encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     logger.info(f"Access token created for subject: {subject}")
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
+def _decode_token(token: str) -> dict:
+    """Full signature and expiry check; only reached on a token cache miss."""
+    header = jwt.get_unverified_header(token)
+    if header.get("alg") == "RS256":
+        public_key = signing_keys.public_key(header.get("kid"))
+        if public_key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, public_key, algorithms=["RS256"])
+    if settings.ALGORITHM == "HS256" or settings.JWT_ACCEPT_HS256:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    raise JWTError("Unsupported token algorithm")
+
+
+def verify_token_claims(token: str) -> dict:
     """
-    Verify and decode a JWT token.
+    Verify a JWT token and return its claims.
     
     Args:
         token: JWT token string
         
     Returns:
-        User ID if token is valid, None otherwise
+        Token claims
         
     Raises:
-        HTTPException: If token is invalid or expired
+        HTTPException: If token is invalid, expired or revoked
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return user_id
-    except JWTError as e:
+        payload = verified_token_cache.decode(token, _decode_token)
+    except (JWTError, TokenRevoked) as e:
         logger.warning(f"Token verification failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    
+    if payload.get("sub") is None or revocation_list.is_revoked(payload.get("jti")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+def verify_token(token: str) -> Optional[str]:
+    """
+    Verify and decode a JWT token.
+    
+    Args:
+        token: JWT token string
+        
+    Returns:
+        User ID if token is valid, None otherwise
+        
+    Raises:
+        HTTPException: If token is invalid, expired or revoked
+    """
+    return verify_token_claims(token)["sub"]
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -105,7 +136,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """
-    Hash a password with bcrypt and salt.
+    Hash a password with the policy's primary scheme.
     
     Args:
         password: Plain text password
@@ -123,14 +154,26 @@ def get_password_hash(password: str) -> str:
         )
 
 
-def create_login_response(user_id: int, username: str, role: str) -> dict:
+def create_login_response(
+    user_id: int,
+    username: str,
+    role: str,
+    is_active: bool = True,
+    token_version: int = 0
+) -> dict:
     """
     Create a standardized login response with token.
     
+    The token carries everything other services need to authorize a request
+    (role, active state) plus the user's token version, which is bumped to
+    invalidate issued tokens after a role change or deactivation.
+    
     Args:
         user_id: User ID
         username: Username
         role: User role
+        is_active: Whether the account is active
+        token_version: User's current token version
         
     Returns:
         Login response dictionary
@@ -139,6 +182,8 @@ def create_login_response(user_id: int, username: str, role: str) -> dict:
     additional_claims = {
         "username": username,
         "role": role,
+        "active": is_active,
+        "ver": token_version,
         "token_type": "access"
     }
     
@@ -0,0 +1,122 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+import base64
+import hashlib
+import logging
+import os
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _b64url_uint(value: int) -> str:
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class SigningKeyStore:
+    """
+    RSA signing keys for access tokens (RS256), one PEM file per key id.
+
+    Keys live in `keys_dir` as `<kid>.pem`. Tokens are signed with the active key
+    (`active_kid`, or the newest file) and carry its id in the `kid` header. Every
+    key in the directory is published in the JWKS document, so rotation is:
+    add a new key, make it active, and delete the old file once the tokens
+    signed with it have expired. Verifiers pick the key by `kid`.
+    """
+
+    def __init__(self, keys_dir: str, active_kid: Optional[str] = None):
+        self.keys_dir = Path(keys_dir)
+        self.active_kid = active_kid
+        self._private_pems: Dict[str, bytes] = {}
+        self._public_pems: Dict[str, bytes] = {}
+        self._jwks: Dict[str, Any] = {"keys": []}
+
+    def load(self) -> None:
+        """Load every key in the directory, generating one if it is empty."""
+        self.keys_dir.mkdir(parents=True, exist_ok=True)
+        paths = sorted(self.keys_dir.glob("*.pem"), key=lambda p: p.stat().st_mtime)
+        if not paths:
+            paths = [self.generate()]
+
+        private_pems, public_pems, jwks = {}, {}, []
+        for path in paths:
+            pem = path.read_bytes()
+            key = serialization.load_pem_private_key(pem, password=None)
+            if not isinstance(key, rsa.RSAPrivateKey):
+                logger.warning(f"Skipping non-RSA signing key: {path.name}")
+                continue
+            kid = path.stem
+            public_key = key.public_key()
+            numbers = public_key.public_numbers()
+            private_pems[kid] = pem
+            public_pems[kid] = public_key.public_bytes(
+                serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+            jwks.append({
+                "kty": "RSA",
+                "use": "sig",
+                "alg": "RS256",
+                "kid": kid,
+                "n": _b64url_uint(numbers.n),
+                "e": _b64url_uint(numbers.e),
+            })
+
+        if not private_pems:
+            raise RuntimeError(f"No usable RSA signing keys in {self.keys_dir}")
+        if self.active_kid not in private_pems:
+            if self.active_kid:
+                logger.warning(f"Signing key {self.active_kid} not found; using the newest key")
+            self.active_kid = list(private_pems)[-1]
+
+        self._private_pems, self._public_pems = private_pems, public_pems
+        self._jwks = {"keys": jwks}
+        logger.info(f"Loaded {len(private_pems)} signing key(s); active kid: {self.active_kid}")
+
+    def generate(self) -> Path:
+        """
+        Create a new 2048-bit RSA key file; its id is derived from the public key.
+
+        Returns:
+            Path of the new PEM file
+        """
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        public_der = key.public_key().public_bytes(
+            serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        kid = hashlib.sha256(public_der).hexdigest()[:16]
+        path = self.keys_dir / f"{kid}.pem"
+        path.write_bytes(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ))
+        os.chmod(path, 0o600)
+        logger.info(f"Generated signing key {kid} in {self.keys_dir}")
+        return path
+
+    def signing_key(self) -> tuple:
+        """Active (kid, private key PEM), loading the keys on first use."""
+        if not self._private_pems:
+            self.load()
+        return self.active_kid, self._private_pems[self.active_kid]
+
+    def public_key(self, kid: Optional[str]) -> Optional[bytes]:
+        """Public key PEM for a key id, or None if unknown."""
+        if not self._public_pems:
+            self.load()
+        return self._public_pems.get(kid)
+
+    def jwks(self) -> Dict[str, Any]:
+        """JWKS document with the public part of every key."""
+        if not self._private_pems:
+            self.load()
+        return self._jwks
+
+
+# Global key store
+signing_keys = SigningKeyStore(settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
@@ -0,0 +1,167 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import math
+import logging
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevoked(Exception):
+    """Raised when a token (or every token of its subject) has been revoked."""
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified JWT claims, keyed by the SHA-256 digest of the token.
+
+    A token is decoded and its signature checked once; later requests carrying the
+    same token get the cached claims until the token's `exp`, skipping the HMAC and
+    JSON work entirely. Tokens without `exp` are never cached.
+
+    Revocation hooks:
+    - `revoke_token(token)` rejects one token until it expires (e.g. logout)
+    - `revoke_subject(sub)` rejects every token of a subject issued before now
+      (e.g. role change, deactivation, password change)
+    Revocations are kept in process memory; each worker applies its own.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_token_lifetime: int = 1800):
+        self.max_entries = max_entries
+        self.max_token_lifetime = max_token_lifetime
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._revoked_tokens: Dict[bytes, float] = {}
+        self._revoked_subjects: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revoked": 0, "evictions": 0}
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def _check_revoked(self, digest: bytes, claims: Dict[str, Any]) -> None:
+        if digest in self._revoked_tokens:
+            raise TokenRevoked("Token has been revoked")
+        revoked_before = self._revoked_subjects.get(str(claims.get("sub")))
+        # Cutoffs and `iat` are whole seconds: a token issued in the cutoff's second stays valid,
+        # so a login right after a revocation works (token_version covers the same-second case)
+        if revoked_before is not None and _timestamp(claims.get("iat")) < revoked_before:
+            raise TokenRevoked("Token has been revoked")
+
+    def decode(self, token: str, decoder: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return the claims of a token, verifying it with `decoder` only on a cache miss.
+
+        Args:
+            token: JWT token string
+            decoder: Function that fully verifies the token and returns its claims
+                     (it raises on an invalid signature or expired token)
+
+        Returns:
+            Token claims
+
+        Raises:
+            TokenRevoked: If the token or its subject has been revoked
+        """
+        digest = self._digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, claims = entry
+                if expires_at > now:
+                    self._entries.move_to_end(digest)
+                    self.stats["hits"] += 1
+                    self._check_revoked(digest, claims)
+                    return claims
+                del self._entries[digest]
+
+        self.stats["misses"] += 1
+        claims = decoder(token)
+        with self._lock:
+            self._check_revoked(digest, claims)
+            expires_at = _timestamp(claims.get("exp"))
+            if expires_at > now:
+                self._entries[digest] = (expires_at, claims)
+                self._entries.move_to_end(digest)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+        return claims
+
+    def revoke_token(self, token: str, expires_at: Optional[float] = None) -> None:
+        """
+        Reject a single token from now on.
+
+        Args:
+            token: JWT token string
+            expires_at: Token expiry (epoch seconds); the revocation is dropped after it
+        """
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.pop(digest, None)
+            if expires_at is None:
+                expires_at = entry[0] if entry else time.time() + self.max_token_lifetime
+            self._revoked_tokens[digest] = expires_at
+            self.stats["revoked"] += 1
+            self._prune(time.time())
+
+    def revoke_subject(self, subject: Any, before: Optional[float] = None) -> None:
+        """
+        Reject every token of a subject issued before the second of `before` (default: now).
+
+        Args:
+            subject: Token subject (`sub` claim)
+            before: Epoch seconds; tokens with an `iat` in the same or a later second stay valid
+        """
+        key = str(subject)
+        cutoff = math.floor(before if before is not None else time.time())
+        with self._lock:
+            self._revoked_subjects[key] = max(cutoff, self._revoked_subjects.get(key, 0))
+            for digest in [d for d, (_, claims) in self._entries.items() if str(claims.get("sub")) == key]:
+                del self._entries[digest]
+            self.stats["revoked"] += 1
+            self._prune(time.time())
+
+    def _prune(self, now: float) -> None:
+        for digest in [d for d, exp in self._revoked_tokens.items() if exp <= now]:
+            del self._revoked_tokens[digest]
+        # A subject cutoff is useless once every token issued before it has expired
+        for key in [k for k, cutoff in self._revoked_subjects.items() if cutoff + self.max_token_lifetime <= now]:
+            del self._revoked_subjects[key]
+
+    def clear(self) -> None:
+        """Drop every cached entry (revocations are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters for health/metrics endpoints."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "revoked_tokens": len(self._revoked_tokens),
+                "revoked_subjects": len(self._revoked_subjects),
+                **self.stats,
+            }
+
+
+def _timestamp(value: Any) -> float:
+    """Epoch seconds for a numeric or datetime claim (0 when missing)."""
+    if value is None:
+        return 0.0
+    if hasattr(value, "timestamp"):
+        return value.timestamp()
+    return float(value)
+
+
+# Global token cache instance
+verified_token_cache = VerifiedTokenCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    max_token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
@@ -0,0 +1,208 @@
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import hashlib
+import logging
+import secrets
+
+from app.models.auth_token import AuthToken
+from app.models.user import User
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def hash_token(token: str) -> str:
+    """
+    Hash a token (or jti) for storage; tokens are never stored in plain text.
+
+    Args:
+        token: Token string
+
+    Returns:
+        SHA-256 hex digest
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _add_refresh_token(db: Session, user_id: int) -> str:
+    """Stage a new refresh token row (caller commits) and return the plain token."""
+    token = secrets.token_urlsafe(48)
+    db.add(AuthToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        token_type="refresh",
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        is_revoked=False
+    ))
+    return token
+
+
+def issue_refresh_token(db: Session, user_id: int) -> str:
+    """
+    Issue a refresh token for a user (at login).
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        Plain refresh token (only its hash is stored)
+    """
+    token = _add_refresh_token(db, user_id)
+    db.commit()
+    return token
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> int:
+    """
+    Revoke every active refresh token of a user.
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        Number of tokens revoked
+    """
+    count = db.query(AuthToken).filter(
+        AuthToken.user_id == user_id,
+        AuthToken.token_type == "refresh",
+        AuthToken.is_revoked == False
+    ).update({"is_revoked": True}, synchronize_session=False)
+    db.commit()
+    return count
+
+
+def rotate_refresh_token(db: Session, refresh_token: str) -> Tuple[Optional[User], Optional[str]]:
+    """
+    Exchange a refresh token for a new one (rotation).
+
+    The presented token is revoked and a new one issued in the same transaction.
+    Presenting a token that was already rotated or revoked is treated as theft:
+    every refresh token of that user is revoked and they must log in again.
+
+    Args:
+        db: Database session
+        refresh_token: Plain refresh token from the client
+
+    Returns:
+        Tuple of (user, new refresh token), or (None, None) if the token is not usable
+    """
+    row = db.query(AuthToken).filter(
+        AuthToken.token_hash == hash_token(refresh_token),
+        AuthToken.token_type == "refresh"
+    ).first()
+
+    if not row:
+        return None, None
+
+    if row.is_revoked:
+        logger.warning(f"Refresh token reuse detected for user ID: {row.user_id}; revoking all refresh tokens")
+        revoke_user_refresh_tokens(db, row.user_id)
+        return None, None
+
+    if row.expires_at <= datetime.utcnow():
+        return None, None
+
+    user = db.query(User).filter(User.id == row.user_id).first()
+    if not user or not user.can_attempt_login():
+        return None, None
+
+    # Claim the token atomically; a concurrent rotation of the same token loses
+    claimed = db.query(AuthToken).filter(
+        AuthToken.id == row.id,
+        AuthToken.is_revoked == False
+    ).update({"is_revoked": True}, synchronize_session=False)
+    if claimed != 1:
+        db.rollback()
+        logger.warning(f"Concurrent refresh token reuse for user ID: {row.user_id}; revoking all refresh tokens")
+        revoke_user_refresh_tokens(db, row.user_id)
+        return None, None
+
+    new_token = _add_refresh_token(db, user.id)
+    db.commit()
+    return user, new_token
+
+
+def revoke_refresh_token(db: Session, refresh_token: str, user_id: Optional[int] = None) -> bool:
+    """
+    Revoke a single refresh token (logout).
+
+    Args:
+        db: Database session
+        refresh_token: Plain refresh token
+        user_id: If given, only revoke the token when it belongs to this user
+
+    Returns:
+        True if a token was revoked
+    """
+    query = db.query(AuthToken).filter(
+        AuthToken.token_hash == hash_token(refresh_token),
+        AuthToken.token_type == "refresh",
+        AuthToken.is_revoked == False
+    )
+    if user_id is not None:
+        query = query.filter(AuthToken.user_id == user_id)
+    count = query.update({"is_revoked": True}, synchronize_session=False)
+    db.commit()
+    return count > 0
+
+
+def revoke_access_token(db: Session, jti: str, user_id: int, expires_at: datetime) -> None:
+    """
+    Record a revoked access token so every service instance rejects it until it expires.
+
+    Args:
+        db: Database session
+        jti: Token id claim
+        user_id: Token subject
+        expires_at: Token expiry (UTC)
+    """
+    db.add(AuthToken(
+        user_id=user_id,
+        token_hash=hash_token(jti),
+        token_type="access",
+        expires_at=expires_at,
+        is_revoked=True
+    ))
+    db.commit()
+
+
+def get_revoked_access_tokens(db: Session, since: Optional[datetime] = None) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Revoked, unexpired access tokens recorded since a point in time.
+
+    Args:
+        db: Database session
+        since: Only rows created at or after this time (all rows when None)
+
+    Returns:
+        List of (token_hash, expires_at, created_at)
+    """
+    query = db.query(AuthToken.token_hash, AuthToken.expires_at, AuthToken.created_at).filter(
+        AuthToken.token_type == "access",
+        AuthToken.is_revoked == True,
+        AuthToken.expires_at > datetime.utcnow()
+    )
+    if since is not None:
+        query = query.filter(AuthToken.created_at >= since)
+    return query.all()
+
+
+def purge_expired_tokens(db: Session, grace: timedelta = timedelta(days=1)) -> int:
+    """
+    Delete token rows that expired more than `grace` ago.
+
+    Args:
+        db: Database session
+        grace: How long expired rows are kept (for reuse detection and audit)
+
+    Returns:
+        Number of rows deleted
+    """
+    count = db.query(AuthToken).filter(
+        AuthToken.expires_at < datetime.utcnow() - grace
+    ).delete(synchronize_session=False)
+    db.commit()
+    return count
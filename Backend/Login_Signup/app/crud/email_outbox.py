@@ -0,0 +1,87 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from datetime import datetime
+import logging
+
+from app.models.email_outbox import EmailOutbox
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(db: Session, recipient: str, subject: str, body: str, category: str = "general") -> EmailOutbox:
+    """
+    Stage an email in the outbox (caller commits).
+
+    The row is committed together with the change that triggers the email, so
+    the email is sent if and only if that change is; delivery happens later in
+    the outbox worker.
+
+    Args:
+        db: Database session
+        recipient: Recipient address
+        subject: Subject line
+        body: Plain-text body
+        category: Kind of email, for monitoring
+
+    Returns:
+        The staged outbox row
+    """
+    message = EmailOutbox(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        category=category,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(message)
+    return message
+
+
+def enqueue_verification_email(db: Session, recipient: str, first_name: Optional[str], token: str) -> EmailOutbox:
+    """
+    Stage the email-address verification message sent after signup (caller commits).
+
+    Args:
+        db: Database session
+        recipient: New user's email
+        first_name: Used in the greeting
+        token: Plain verification token (only its hash is stored on the user)
+
+    Returns:
+        The staged outbox row
+    """
+    link = f"{settings.FRONTEND_URL}/verify-email?token={token}"
+    body = (
+        f"Hello {first_name or ''},\n\n"
+        f"Please confirm your email address for {settings.PROJECT_NAME} by opening this link:\n\n"
+        f"{link}\n\n"
+        "If you did not create an account, you can ignore this email.\n"
+    )
+    return enqueue_email(db, recipient, "Confirm your email address", body, category="verify_email")
+
+
+def enqueue_password_reset_email(db: Session, recipient: str, first_name: Optional[str], token: str) -> EmailOutbox:
+    """
+    Stage the password reset message (caller commits).
+
+    Args:
+        db: Database session
+        recipient: User's email
+        first_name: Used in the greeting
+        token: Plain reset token (only its hash is stored on the user)
+
+    Returns:
+        The staged outbox row
+    """
+    link = f"{settings.FRONTEND_URL}/reset-password?token={token}"
+    body = (
+        f"Hello {first_name or ''},\n\n"
+        "We received a request to reset your password. Open this link to choose a new one:\n\n"
+        f"{link}\n\n"
+        f"The link expires in {settings.PASSWORD_RESET_EXPIRE_MINUTES} minutes. "
+        "If you did not request a reset, you can ignore this email.\n"
+    )
+    return enqueue_email(db, recipient, "Reset your password", body, category="reset_password")
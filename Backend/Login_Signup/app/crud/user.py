@@ -1,14 +1,20 @@
-from typing import Optional
+from typing import Dict, Iterable, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta
 import logging
 import secrets
 
 from app.models.user import User, UserRole
 from app.schemas.auth import SignupRequest
-from app.core.security import get_password_hash, verify_password
+from app.core.password_executor import password_executor, PasswordQueueFull
 from app.core.config import settings
+from app.core.lockout import lockout_tracker, last_login_writer
+from app.core.identifier_filter import identifier_index
+from app.core.email_outbox import outbox_worker
+from app.crud.auth_token import hash_token, revoke_user_refresh_tokens
+from app.crud.email_outbox import enqueue_verification_email, enqueue_password_reset_email
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +33,23 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
 
 
+def get_users_by_ids(db: Session, user_ids: Iterable[int]) -> Dict[int, User]:
+    """
+    Get several users by ID with a single IN query.
+    
+    Args:
+        db: Database session
+        user_ids: User IDs (duplicates are ignored)
+        
+    Returns:
+        Dict of user ID to User for the IDs that exist
+    """
+    ids = set(user_ids)
+    if not ids:
+        return {}
+    return {user.id: user for user in db.query(User).filter(User.id.in_(ids)).all()}
+
+
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     """
     Get user by email address.
@@ -59,6 +82,12 @@ def get_user_by_email_or_username(db: Session, identifier: str) -> Optional[User
     """
     Get user by email or username (for login).
     
+    Each lookup is an exact match on one unique index: an OR across email and
+    username cannot be served by a single index and tends to become a scan.
+    Identifiers containing '@' are emails; signups store the email as username
+    too, so the username lookup only runs for the rare account whose
+    '@'-containing username differs from its email.
+    
     Args:
         db: Database session
         identifier: Email or username
@@ -67,9 +96,11 @@ def get_user_by_email_or_username(db: Session, identifier: str) -> Optional[User
         User object if found, None otherwise
     """
     identifier = identifier.lower().strip()
-    return db.query(User).filter(
-        or_(User.email == identifier, User.username == identifier)
-    ).first()
+    if "@" in identifier:
+        user = db.query(User).filter(User.email == identifier).first()
+        if user is not None:
+            return user
+    return db.query(User).filter(User.username == identifier).first()
 
 
 def check_email_exists(db: Session, email: str) -> bool:
@@ -87,59 +118,106 @@ def check_email_exists(db: Session, email: str) -> bool:
     return user is not None
 
 
-def create_user(db: Session, signup_data: SignupRequest) -> User:
+# MySQL "Duplicate entry for key" (ER_DUP_ENTRY)
+_MYSQL_DUPLICATE_ENTRY = 1062
+
+
+class EmailAlreadyRegistered(ValueError):
+    """Raised when a signup collides with an existing email/username."""
+
+
+def _is_duplicate_entry(error: IntegrityError) -> bool:
+    """Whether an IntegrityError is a unique constraint violation."""
+    args = getattr(error.orig, "args", ())
+    if args and args[0] == _MYSQL_DUPLICATE_ENTRY:
+        return True
+    # Other drivers (e.g. SQLite in local runs) only report it in the message
+    return "unique" in str(error.orig).lower()
+
+
+async def create_user(db: Session, signup_data: SignupRequest, client: Optional[str] = None) -> User:
     """
     Create a new user account.
     
+    Duplicates are detected by the unique email/username indexes rather than a
+    prior SELECT, so the check cannot race with a concurrent signup for the
+    same address. The verification email (when enabled) is staged in the
+    outbox in the same transaction, so a signup is the user INSERT plus the
+    outbox INSERT and never waits on the mail server. The returned user is
+    detached from the session with the values it was inserted with (including
+    its ID), so reading it does not reload the row.
+    
     Args:
         db: Database session
         signup_data: Signup request data
+        client: Client identifier used for fair scheduling of password hashing
         
     Returns:
         Created User object
         
     Raises:
-        ValueError: If email already exists
+        EmailAlreadyRegistered: If the email is already registered
+        PasswordQueueFull: If the password hashing backlog is full
     """
+    # Hash the password (in the hashing pool, off the event loop)
+    hashed_password = await password_executor.hash(signup_data.password, client=client)
+    
+    # Generate a salt for the existing salt column (for compatibility)
+    salt = secrets.token_hex(16)
+    
+    # Create user object with existing database schema
+    email = signup_data.email.lower()
+    db_user = User(
+        first_name=signup_data.first_name,
+        last_name=signup_data.last_name,
+        email=email,
+        username=email,  # Set username to email
+        password_hash=hashed_password,
+        salt=salt,  # Required by existing schema
+        role='User',  # Default role string for new signups (not enum)
+        is_active=True,
+        is_verified=False,  # Using existing column name
+        failed_login_attempts=0,
+        token_version=0
+    )
+    
+    verification_token = None
+    if settings.EMAIL_VERIFICATION_ENABLED:
+        verification_token = secrets.token_urlsafe(32)
+        db_user.verification_token = hash_token(verification_token)
+    
     try:
-        # Check if email already exists
-        if check_email_exists(db, signup_data.email):
-            raise ValueError("Email already registered")
-        
-        # Hash the password
-        hashed_password = get_password_hash(signup_data.password)
-        
-        # Generate a salt for the existing salt column (for compatibility)
-        salt = secrets.token_hex(16)
-        
-        # Create user object with existing database schema
-        db_user = User(
-            first_name=signup_data.first_name,
-            last_name=signup_data.last_name,
-            email=signup_data.email.lower(),
-            username=signup_data.email.lower(),  # Set username to email
-            password_hash=hashed_password,
-            salt=salt,  # Required by existing schema
-            role='User',  # Default role string for new signups (not enum)
-            is_active=True,
-            is_verified=False,  # Using existing column name
-            failed_login_attempts=0
-        )
-        
         db.add(db_user)
+        if verification_token is not None:
+            enqueue_verification_email(db, email, db_user.first_name, verification_token)
+        db.flush()  # INSERTs; assigns the ID
+        db.expunge(db_user)  # Keep loaded values instead of expiring them on commit
         db.commit()
-        db.refresh(db_user)
-        
-        logger.info(f"New user created: {db_user.email} (ID: {db_user.id})")
-        return db_user
-        
+    except IntegrityError as e:
+        db.rollback()
+        if _is_duplicate_entry(e):
+            raise EmailAlreadyRegistered("Email already registered") from e
+        logger.error(f"Error creating user: {str(e)}")
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"Error creating user: {str(e)}")
         raise
+    
+    identifier_index.add(email)
+    logger.info("New user created: %s (ID: %s)", email, db_user.id)
+    if verification_token is not None:
+        outbox_worker.notify()
+    return db_user
 
 
-def authenticate_user(db: Session, identifier: str, password: str) -> Optional[User]:
+async def _dummy_verify(password: str, client: Optional[str]) -> None:
+    """Spend one password verification on a login that cannot succeed."""
+    if identifier_index.dummy_hash:
+        await password_executor.verify(password, identifier_index.dummy_hash, client=client)
+
+
+async def authenticate_user(db: Session, identifier: str, password: str, client: Optional[str] = None) -> Optional[User]:
     """
     Authenticate user with email/username and password.
     
@@ -147,15 +225,27 @@ def authenticate_user(db: Session, identifier: str, password: str) -> Optional[U
         db: Database session
         identifier: Email or username
         password: Plain text password
+        client: Client identifier used for fair scheduling of password verification
         
     Returns:
         User object if authentication successful, None otherwise
+        
+    Raises:
+        PasswordQueueFull: If the password hashing backlog is full
     """
     try:
+        # Unknown identifiers are rejected without a query; the dummy verify keeps
+        # their response time in line with wrong passwords for real accounts
+        if not await identifier_index.might_exist(identifier):
+            await _dummy_verify(password, client)
+            logger.warning(f"Login attempt for non-existent user: {identifier}")
+            return None
+        
         # Get user by email or username
         user = get_user_by_email_or_username(db, identifier)
         
         if not user:
+            await _dummy_verify(password, client)
             logger.warning(f"Login attempt for non-existent user: {identifier}")
             return None
         
@@ -169,18 +259,28 @@ def authenticate_user(db: Session, identifier: str, password: str) -> Optional[U
             logger.warning(f"Login attempt for inactive account: {user.email}")
             return None
         
-        # Verify password
-        if not verify_password(password, user.password_hash):
+        # Verify password (in the hashing pool, off the event loop)
+        password_ok, new_hash = await password_executor.verify_and_update(
+            password, user.password_hash, client=client
+        )
+        if not password_ok:
             # Increment failed login attempts
             handle_failed_login(db, user)
             logger.warning(f"Failed login attempt for user: {user.email}")
             return None
         
+        # Upgrade hashes that are out of policy (old scheme or cost); saved with the login
+        if new_hash:
+            user.password_hash = new_hash
+            logger.info("Password hash upgraded to current policy for user: %s", user.email)
+        
         # Successful login - reset failed attempts
         handle_successful_login(db, user)
-        logger.info(f"Successful login for user: {user.email}")
+        logger.debug("Successful login for user: %s", user.email)
         return user
         
+    except PasswordQueueFull:
+        raise
     except Exception as e:
         logger.error(f"Error during authentication: {str(e)}")
         return None
@@ -188,21 +288,25 @@ def authenticate_user(db: Session, identifier: str, password: str) -> Optional[U
 
 def handle_failed_login(db: Session, user: User) -> None:
     """
-    Handle failed login attempt - increment counter and lock if necessary.
+    Handle failed login attempt - count it and lock the account if necessary.
+    
+    Failures are counted in the lockout tracker (sliding window); the users row
+    is only written when the account becomes locked.
     
     Args:
         db: Database session
         user: User object
     """
     try:
-        user.increment_failed_login()
+        failures = lockout_tracker.record_failure(user.id)
         
-        # Lock account if max attempts reached
-        if user.failed_login_attempts >= settings.MAX_LOGIN_ATTEMPTS:
+        # Lock account if max attempts reached within the window
+        if failures >= settings.MAX_LOGIN_ATTEMPTS:
+            user.failed_login_attempts = failures
             user.lock_account(settings.LOCKOUT_DURATION_MINUTES)
-            logger.warning(f"Account locked for user: {user.email} after {user.failed_login_attempts} failed attempts")
-        
-        db.commit()
+            db.commit()
+            lockout_tracker.reset(user.id)
+            logger.warning(f"Account locked for user: {user.email} after {failures} failed attempts")
         
     except Exception as e:
         logger.error(f"Error handling failed login: {str(e)}")
@@ -211,15 +315,23 @@ def handle_failed_login(db: Session, user: User) -> None:
 
 def handle_successful_login(db: Session, user: User) -> None:
     """
-    Handle successful login - reset failed attempts and update last login.
+    Handle successful login - reset failed attempts and record last login.
+    
+    The users row is only written when there is lock state to clear or a pending
+    change (e.g. an upgraded password hash); last_login is written behind in batches.
     
     Args:
         db: Database session
         user: User object
     """
     try:
-        user.reset_failed_login_attempts()
-        db.commit()
+        lockout_tracker.reset(user.id)
+        if user.failed_login_attempts or user.account_locked_until:
+            user.failed_login_attempts = 0
+            user.account_locked_until = None  # Using existing column name
+        if db.is_modified(user):
+            db.commit()
+        last_login_writer.record(user.id)
         
     except Exception as e:
         logger.error(f"Error handling successful login: {str(e)}")
@@ -245,8 +357,9 @@ def unlock_user_account(db: Session, user_id: int) -> bool:
         user.failed_login_attempts = 0
         user.account_locked_until = None  # Using existing column name
         db.commit()
+        lockout_tracker.reset(user.id)
         
-        logger.info(f"Account unlocked for user: {user.email}")
+        logger.info("Account unlocked for user: %s", user.email)
         return True
         
     except Exception as e:
@@ -255,23 +368,134 @@ def unlock_user_account(db: Session, user_id: int) -> bool:
         return False
 
 
-def update_user_last_login(db: Session, user_id: int) -> None:
+def request_password_reset(db: Session, email: str) -> bool:
     """
-    Update user's last login timestamp.
+    Start a password reset: store a reset token and stage the reset email.
+    
+    Only the token's hash is stored (users.reset_token); the user row and the
+    outbox row are committed together. Unknown or inactive accounts get no
+    email, and callers must respond the same way in both cases.
     
     Args:
         db: Database session
-        user_id: User ID
+        email: Email address from the request
+        
+    Returns:
+        True if a reset email was queued, False otherwise
     """
+    user = get_user_by_email(db, email)
+    if not user or not user.is_active:
+        return False
+    
+    token = secrets.token_urlsafe(32)
     try:
-        user = get_user_by_id(db, user_id)
-        if user:
-            user.last_login = datetime.utcnow()
-            db.commit()
-            
+        user.reset_token = hash_token(token)
+        user.reset_token_expires = datetime.utcnow() + timedelta(minutes=settings.PASSWORD_RESET_EXPIRE_MINUTES)
+        enqueue_password_reset_email(db, user.email, user.first_name, token)
+        db.commit()
     except Exception as e:
-        logger.error(f"Error updating last login: {str(e)}")
         db.rollback()
+        logger.error(f"Error requesting password reset: {str(e)}")
+        raise
+    
+    outbox_worker.notify()
+    logger.info("Password reset requested for user ID: %s", user.id)
+    return True
+
+
+async def reset_password(db: Session, token: str, new_password: str, client: Optional[str] = None) -> Optional[User]:
+    """
+    Complete a password reset with the token from the reset email.
+    
+    The token is single-use: it is cleared by a conditional UPDATE before the
+    password is hashed, so concurrent requests with the same token cannot both
+    succeed. Tokens issued before the reset stop working (token_version is
+    bumped and refresh tokens are revoked).
+    
+    Args:
+        db: Database session
+        token: Plain reset token
+        new_password: New password
+        client: Client identifier used for fair scheduling of password hashing
+        
+    Returns:
+        Updated User object, or None if the token is invalid or expired
+        
+    Raises:
+        PasswordQueueFull: If the password hashing backlog is full
+    """
+    token_hash = hash_token(token)
+    row = db.query(User.id, User.reset_token_expires).filter(User.reset_token == token_hash).first()
+    if not row:
+        return None
+    user_id, expires = row
+    
+    # Claim the token before hashing: of concurrent requests with the same token only
+    # the one whose conditional UPDATE clears it goes on
+    claimed = db.query(User).filter(
+        User.id == user_id, User.reset_token == token_hash, User.reset_token_expires > datetime.utcnow()
+    ).update({User.reset_token: None, User.reset_token_expires: None}, synchronize_session=False)
+    db.commit()
+    if not claimed:
+        return None
+    
+    try:
+        password_hash = await password_executor.hash(new_password, client=client)
+    except Exception:
+        # Not reset after all (e.g. hashing queue full): give the token back
+        db.query(User).filter(User.id == user_id, User.reset_token.is_(None)).update(
+            {User.reset_token: token_hash, User.reset_token_expires: expires}, synchronize_session=False
+        )
+        db.commit()
+        raise
+    
+    user = get_user_by_id(db, user_id)
+    if not user:
+        return None
+    user.password_hash = password_hash
+    user.is_verified = True  # Receiving the reset email proves ownership of the address
+    user.failed_login_attempts = 0
+    user.account_locked_until = None
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    revoke_user_refresh_tokens(db, user.id)
+    lockout_tracker.reset(user.id)
+    
+    logger.info("Password reset completed for user ID: %s", user.id)
+    return user
+
+
+def verify_email(db: Session, token: str) -> Optional[User]:
+    """
+    Mark a user's email as verified with the token from the verification email.
+    
+    Args:
+        db: Database session
+        token: Plain verification token
+        
+    Returns:
+        Verified User object, or None if the token is invalid
+    """
+    user = db.query(User).filter(User.verification_token == hash_token(token)).first()
+    if not user:
+        return None
+    
+    user.is_verified = True
+    user.verification_token = None
+    db.commit()
+    logger.info("Email verified for user ID: %s", user.id)
+    return user
+
+
+def update_user_last_login(db: Session, user_id: int) -> None:
+    """
+    Update user's last login timestamp (written behind in batches).
+    
+    Args:
+        db: Database session
+        user_id: User ID
+    """
+    last_login_writer.record(user_id)
 
 
 def get_user_security_info(db: Session, user_id: int) -> Optional[dict]:
@@ -295,6 +519,7 @@ def get_user_security_info(db: Session, user_id: int) -> Optional[dict]:
             "email": user.email,
             "is_active": user.is_active,
             "failed_login_attempts": user.failed_login_attempts,
+            "recent_failed_attempts": lockout_tracker.count(user.id),
             "account_locked_until": user.account_locked_until,  # Using existing column name
             "last_login": user.last_login,
             "is_verified": user.is_verified,  # Using existing column name
@@ -1,33 +1,55 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
+from fastapi.responses import JSONResponse, Response
 import logging
 import time
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
+from app.core.logging_config import logging_system
+from app.core.metrics import registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
 from app.core.database import init_db, check_db_connection, close_db_connections
-from app.api.v1.auth import router as auth_router, limiter
+from app.api.v1.auth import router as auth_router
+from app.middleware.rate_limit import (
+    limiter, get_client_ip, RateLimitExceeded, RateLimitHeadersMiddleware
+)
+from app.middleware.edge import EdgeMiddleware
+from app.core.password_executor import password_executor
+from app.core.password_policy import password_policy
+from app.core.token_cache import verified_token_cache
+from app.core.revocation import revocation_list
+from app.core.signing_keys import signing_keys
+from app.core.lockout import lockout_tracker, last_login_writer
+from app.core.identifier_filter import identifier_index
+from app.core.redis_manager import redis_manager
+from app.core.email_outbox import outbox_worker
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Configure logging: records are formatted and written by a background thread
+logging_system.setup(
+    level=settings.LOG_LEVEL,
+    json_output=settings.LOG_FORMAT == "json",
+    sample_rate=settings.LOG_SAMPLE_RATE,
+    queue_size=settings.LOG_QUEUE_SIZE
 )
 logger = logging.getLogger(__name__)
 
+# Security headers added to every response
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Content-Security-Policy": "default-src 'self'",
+}
+
 
 # Rate limit exception handler function
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
     """
     Handle rate limit exceeded exceptions.
     """
-    client_ip = get_remote_address(request)
+    client_ip = get_client_ip(request)
     logger.warning(f"Rate limit exceeded for IP: {client_ip} - {exc.detail}")
     
     return JSONResponse(
@@ -37,7 +59,7 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
             "detail": f"Rate limit exceeded: {exc.detail}",
             "error_code": "RATE_LIMIT_EXCEEDED"
         },
-        headers={"Retry-After": "60"}
+        headers=exc.result.headers()
     )
 
 
@@ -60,6 +82,33 @@ async def lifespan(app: FastAPI):
         init_db()
         logger.info("Database initialized successfully")
         
+        # Tune the password hashing cost for this machine before the hashing pool starts
+        if password_policy.calibrate() is not None:
+            password_executor.reload_policy()
+        
+        # Load (or create) the token signing keys published at /.well-known/jwks.json
+        if settings.ALGORITHM == "RS256":
+            signing_keys.load()
+        
+        # Mirror revoked access tokens from auth_tokens
+        await revocation_list.start()
+        
+        # Batch last_login writes instead of committing on every login
+        last_login_writer.start()
+        
+        # Probe Redis in the background while its circuit is open
+        redis_manager.start()
+        
+        # Push rate limit counters to the shared store in the background
+        limiter.start()
+        
+        # Load login identifiers so unknown ones are rejected without a query
+        if settings.IDENTIFIER_FILTER_ENABLED:
+            await identifier_index.start()
+        
+        # Deliver queued emails (verification, password reset) in the background
+        outbox_worker.start()
+        
         logger.info(f"Service started successfully on {settings.ENVIRONMENT} environment")
         logger.info(f"Database: {settings.DATABASE_NAME}")
         
@@ -71,7 +120,13 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Temple Management Login/Signup Service...")
+    await revocation_list.stop()
+    await last_login_writer.stop()
+    await limiter.stop()
+    await redis_manager.stop()
+    await outbox_worker.stop()
     close_db_connections()
+    password_executor.shutdown()
     logger.info("Service shutdown complete")
 
 
@@ -93,7 +148,7 @@ app = FastAPI(
     - 📊 **Comprehensive Logging**: Full audit trail of authentication events
     
     ### Security Standards:
-    - Password hashing with bcrypt (12 rounds)
+    - Configurable password hashing policy (bcrypt, 12 rounds by default) in a bounded process pool
     - Input sanitization and validation
     - CORS protection with specific origins
     - Trusted host middleware
@@ -112,10 +167,9 @@ app = FastAPI(
     debug=settings.ENVIRONMENT == "development"
 )
 
-# Add Rate Limiting Middleware and Exception Handler
-app.state.limiter = limiter
+# Add Rate Limiting Headers Middleware and Exception Handler
 app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
-app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(RateLimitHeadersMiddleware)
 
 # Add Security Middleware
 app.add_middleware(
@@ -123,57 +177,20 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
-# Add CORS Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["GET", "POST"],  # Only allow necessary methods
-    allow_headers=["*"],
-    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"]
-)
-
-# Add CORS middleware to allow OPTIONS (preflight) requests from the UI (e.g. from http://localhost:3000)
+# Security headers, CORS (with cached preflights), request ids and timing in one pure ASGI layer
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # adjust as needed (e.g. for production)
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS", "PUT", "DELETE"],
-    allow_headers=["Authorization", "Content-Type", "Accept"]
+    EdgeMiddleware,
+    security_headers=SECURITY_HEADERS,
+    cors_origins=settings.CORS_ORIGINS,
+    cors_allow_credentials=True,
+    cors_allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    cors_allow_headers=["*"],
+    cors_expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After"],
+    cors_max_age=settings.CORS_MAX_AGE,
+    log_requests=settings.LOG_REQUESTS
 )
 
 
-# Custom middleware for request logging and security headers
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next):
-    """
-    Add security headers and log requests.
-    """
-    start_time = time.time()
-    
-    # Log request
-    client_ip = get_remote_address(request)
-    logger.info(f"Request: {request.method} {request.url.path} from IP: {client_ip}")
-    
-    # Process request
-    response = await call_next(request)
-    
-    # Add security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Content-Security-Policy"] = "default-src 'self'"
-    
-    # Log response time
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    logger.info(f"Response: {response.status_code} in {process_time:.4f}s")
-    
-    return response
-
-
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -236,18 +253,69 @@ async def health():
     }
 
 
-# Metrics endpoint (for monitoring)
-@app.get("/metrics")
+# Public signing keys, so other services verify tokens locally
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+async def jwks():
+    """
+    JWKS document with the public keys used to sign access tokens (RS256).
+    Verifiers select the key by the token's `kid` header and cache this document.
+    """
+    keys = signing_keys.jwks() if settings.ALGORITHM == "RS256" else {"keys": []}
+    return JSONResponse(content=keys, headers={"Cache-Control": "public, max-age=300"})
+
+
+# Component metrics, read from each component's counters when /metrics is scraped
+registry.gauge("password_hash_queue_depth", "Hash/verify jobs waiting for a worker",
+               function=lambda: password_executor.stats()["queue_depth"])
+registry.gauge("password_hash_running", "Hash/verify jobs running in the process pool",
+               function=lambda: password_executor.stats()["running"])
+registry.counter("password_hash_jobs_total", "Hash/verify jobs by outcome", ("outcome",),
+                 function=lambda: {k: password_executor.stats()[k] for k in ("completed", "failed", "rejected")})
+registry.counter("rate_limit_checks_total", "Rate limit checks by result", ("result",),
+                 function=lambda: {k: limiter.stats_counters[k] for k in ("allowed", "rejected")})
+registry.counter("token_cache_lookups_total", "Verified token cache lookups by result", ("result",),
+                 function=lambda: {"hit": verified_token_cache.stats["hits"], "miss": verified_token_cache.stats["misses"]})
+registry.counter("identifier_filter_checks_total", "Login identifiers checked against the filter by result", ("result",),
+                 function=lambda: {k: identifier_index.stats_counters[k] for k in ("passed", "rejected", "fallbacks")})
+registry.gauge("redis_circuit_open", "1 while the Redis circuit breaker is open",
+               function=lambda: 1 if redis_manager.stats()["state"] == "open" else 0)
+registry.counter("log_records_dropped_total", "Log records not written", ("reason",),
+                 function=lambda: {"sampled": logging_system.stats()["sampled_out"], "queue_full": logging_system.stats()["dropped_queue_full"]})
+registry.counter("email_outbox_messages_total", "Outbox delivery attempts by result", ("result",),
+                 function=lambda: {k: outbox_worker.stats_counters[k] for k in ("sent", "retried", "failed")})
+
+
+# Metrics endpoint (Prometheus text format)
+@app.get("/metrics", include_in_schema=False)
 async def metrics():
     """
-    Basic metrics endpoint for monitoring.
+    Prometheus metrics: request latency by route, DB pool, hashing queue, rate limits and caches.
+    """
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+# Detailed component state (for debugging)
+@app.get("/metrics/json")
+async def metrics_json():
+    """
+    Component statistics as JSON.
     """
     return {
         "service": settings.PROJECT_NAME,
         "version": settings.PROJECT_VERSION,
-        "uptime": "running",
         "environment": settings.ENVIRONMENT,
-        "database": settings.DATABASE_NAME
+        "database": settings.DATABASE_NAME,
+        "password_hashing": password_executor.stats(),
+        "password_policy": password_policy.describe(),
+        "token_cache": verified_token_cache.get_stats(),
+        "token_revocation": revocation_list.stats(),
+        "lockout": lockout_tracker.stats(),
+        "last_login_writes": last_login_writer.stats(),
+        "identifier_filter": identifier_index.stats(),
+        "rate_limiter": limiter.stats(),
+        "redis": redis_manager.stats(),
+        "logging": logging_system.stats(),
+        "email_outbox": outbox_worker.stats()
     }
 
 
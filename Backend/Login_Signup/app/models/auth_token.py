@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class AuthToken(Base):
+    """
+    Issued and revoked tokens (auth_tokens table, see Backend/Edit_Website_Database.sql).
+
+    Only hashes are stored:
+    - refresh: SHA-256 of the opaque refresh token; rotated on every use
+    - access: SHA-256 of a revoked access token's `jti` (rows exist only for revoked tokens)
+    - reset_password: reserved for password reset tokens
+    """
+    __tablename__ = "auth_tokens"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(255), nullable=False, index=True)
+    token_type = Column(
+        Enum("access", "refresh", "reset_password", name="auth_token_type"),
+        nullable=False,
+        default="access"
+    )
+    expires_at = Column(DateTime, nullable=False, index=True)
+    is_revoked = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<AuthToken(id={self.id}, user_id={self.user_id}, type='{self.token_type}', revoked={self.is_revoked})>"
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class EmailOutbox(Base):
+    """
+    Outgoing email waiting for delivery (email_outbox table).
+
+    Rows are written in the same transaction as the change that triggers the
+    email (signup, password reset request) and delivered by the outbox worker
+    (app/core/email_outbox.py), so requests never wait on the mail server.
+
+    - status: pending until delivered (sent) or out of attempts (failed)
+    - next_attempt_at: when the row is next due; a worker claiming a row moves
+      it forward by a lease, so a crashed worker's rows become due again
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    category = Column(String(50), nullable=False, default="general")  # e.g. verify_email, reset_password
+    status = Column(
+        Enum("pending", "sent", "failed", name="email_outbox_status"),
+        nullable=False,
+        default="pending"
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+    last_error = Column(String(500), nullable=True)
+    created_at = Column(DateTime, server_default=func.current_timestamp())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The worker's claim query: due pending rows in order
+        Index("ix_email_outbox_due", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox(id={self.id}, recipient='{self.recipient}', status='{self.status}', attempts={self.attempts})>"
@@ -44,14 +44,15 @@ class User(Base):
     is_verified = Column(Boolean, default=False, nullable=False)  # Using existing column name
     
     # Token fields (existing columns - maintained for future use)
-    verification_token = Column(String(255), nullable=True)
-    reset_token = Column(String(255), nullable=True)
+    verification_token = Column(String(255), nullable=True, index=True)  # SHA-256 of the emailed token
+    reset_token = Column(String(255), nullable=True, index=True)  # SHA-256 of the emailed token
     reset_token_expires = Column(DateTime, nullable=True)
     
     # Timestamp fields (matching existing schema)
     last_login = Column(DateTime, nullable=True)
     failed_login_attempts = Column(Integer, default=0, nullable=False)
     account_locked_until = Column(DateTime, nullable=True)  # Using existing column name
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)  # Bumped to invalidate issued tokens
     created_at = Column(DateTime, server_default=func.current_timestamp())
     updated_at = Column(DateTime, server_default=func.current_timestamp(), server_onupdate=func.current_timestamp())
     
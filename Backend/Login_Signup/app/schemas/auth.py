@@ -1,7 +1,9 @@
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+from app.core.config import settings
+
 
 class LoginRequest(BaseModel):
     """Schema for login request"""
@@ -28,9 +30,21 @@ class LoginResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
     expires_in: int  # Token expiration in seconds
+    refresh_token: Optional[str] = None
+    refresh_expires_in: Optional[int] = None  # Refresh token expiration in seconds
     user: dict
 
 
+class RefreshRequest(BaseModel):
+    """Schema for refresh token exchange"""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """Schema for logout (refresh token to revoke, optional)"""
+    refresh_token: Optional[str] = None
+
+
 class SignupRequest(BaseModel):
     """Schema for signup request"""
     first_name: str
@@ -103,4 +117,43 @@ class TokenValidationResponse(BaseModel):
     user_id: Optional[int] = None
     username: Optional[str] = None
     role: Optional[str] = None
-    message: str 
\ No newline at end of file
+    message: str 
+
+
+class BatchTokenValidationRequest(BaseModel):
+    """Schema for batch token validation requests"""
+    tokens: List[str]
+    
+    @field_validator('tokens')
+    @classmethod
+    def validate_tokens(cls, v):
+        if not v:
+            raise ValueError('At least one token is required')
+        if len(v) > settings.TOKEN_VALIDATION_BATCH_MAX:
+            raise ValueError(f'At most {settings.TOKEN_VALIDATION_BATCH_MAX} tokens per request')
+        return v
+
+
+class BatchTokenValidationResponse(BaseModel):
+    """Schema for batch token validation responses (one result per token, in request order)"""
+    results: List[TokenValidationResponse]
+
+
+class ResetPasswordRequest(BaseModel):
+    """Schema for completing a password reset"""
+    token: str
+    new_password: str
+    
+    @field_validator('new_password')
+    @classmethod
+    def validate_new_password(cls, v):
+        if not v or len(v) == 0:
+            raise ValueError('Password is required')
+        if len(v) < 6:
+            raise ValueError('Password must be at least 6 characters')
+        return v
+
+
+class VerifyEmailRequest(BaseModel):
+    """Schema for email verification requests"""
+    token: str
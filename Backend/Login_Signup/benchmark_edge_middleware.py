@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Edge middleware benchmark.
+
+Measures the per-request overhead of the request-edge middleware stack by
+calling the ASGI application directly (no server, no network): a bare endpoint,
+the previous stack (@app.middleware("http") security headers and logging on top
+of two CORSMiddleware instances) and EdgeMiddleware configured the same way.
+Simple GET requests and CORS preflights are measured separately.
+
+Usage:
+    python benchmark_edge_middleware.py
+    python benchmark_edge_middleware.py --requests 20000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+
+from app.middleware.edge import EdgeMiddleware
+
+ORIGIN = "http://localhost:3000"
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Content-Security-Policy": "default-src 'self'",
+}
+
+# Log records are created and formatted as in the service, but not written anywhere
+logger = logging.getLogger("benchmark_edge")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+logger.addHandler(logging.NullHandler())
+logging.getLogger("app.middleware.edge").handlers = logger.handlers
+logging.getLogger("app.middleware.edge").setLevel(logging.INFO)
+logging.getLogger("app.middleware.edge").propagate = False
+
+
+def add_endpoint(app: FastAPI) -> FastAPI:
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    return app
+
+
+def bare_app() -> FastAPI:
+    return add_endpoint(FastAPI())
+
+
+def legacy_app() -> FastAPI:
+    """The stack used before EdgeMiddleware."""
+    app = add_endpoint(FastAPI())
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[ORIGIN, "http://localhost:8080"],
+        allow_credentials=True,
+        allow_methods=["GET", "POST"],
+        allow_headers=["*"],
+        expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[ORIGIN],
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "OPTIONS", "PUT", "DELETE"],
+        allow_headers=["Authorization", "Content-Type", "Accept"],
+    )
+
+    @app.middleware("http")
+    async def security_headers_middleware(request: Request, call_next):
+        start_time = time.time()
+        client_ip = request.client.host if request.client else "127.0.0.1"
+        logger.info(f"Request: {request.method} {request.url.path} from IP: {client_ip}")
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS.items():
+            response.headers[name] = value
+        process_time = time.time() - start_time
+        response.headers["X-Process-Time"] = str(process_time)
+        logger.info(f"Response: {response.status_code} in {process_time:.4f}s")
+        return response
+
+    return app
+
+
+def edge_app() -> FastAPI:
+    app = add_endpoint(FastAPI())
+    app.add_middleware(
+        EdgeMiddleware,
+        security_headers=SECURITY_HEADERS,
+        cors_origins=[ORIGIN, "http://localhost:8080"],
+        cors_allow_credentials=True,
+        cors_allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        cors_allow_headers=["*"],
+        cors_expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
+        log_requests=True,
+    )
+    return app
+
+
+def make_scope(method: str, headers):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8002),
+    }
+
+
+GET_HEADERS = [(b"host", b"localhost"), (b"origin", ORIGIN.encode()), (b"accept", b"application/json")]
+PREFLIGHT_HEADERS = [
+    (b"host", b"localhost"),
+    (b"origin", ORIGIN.encode()),
+    (b"access-control-request-method", b"POST"),
+    (b"access-control-request-headers", b"content-type"),
+]
+
+
+async def run(app, method: str, headers, requests: int) -> float:
+    """Return the mean time per request in microseconds."""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    status = []
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    # Warm up (route compilation, middleware stack build)
+    for _ in range(200):
+        await app(make_scope(method, list(headers)), receive, send)
+    if status[-1] >= 400:
+        raise RuntimeError(f"{method} returned {status[-1]}")
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(method, list(headers)), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request edge middleware overhead")
+    parser.add_argument("--requests", type=int, default=10000, help="requests per measurement")
+    parser.add_argument("--rounds", type=int, default=3, help="measurements per stack (best is reported)")
+    args = parser.parse_args()
+
+    stacks = {"bare": bare_app(), "legacy": legacy_app(), "edge": edge_app()}
+    cases = {"GET": ("GET", GET_HEADERS), "preflight": ("OPTIONS", PREFLIGHT_HEADERS)}
+
+    print("\nEdge Middleware Benchmark")
+    print("-" * 60)
+    print(f"Requests per round: {args.requests}, rounds: {args.rounds} (best round reported)\n")
+    print(f"{'request':<12}{'stack':<10}{'us/request':>12}{'overhead us':>14}")
+
+    for case, (method, headers) in cases.items():
+        results = {}
+        for name, app in stacks.items():
+            if name == "bare" and method == "OPTIONS":
+                continue
+            results[name] = min(
+                asyncio.run(run(app, method, headers, args.requests)) for _ in range(args.rounds)
+            )
+        baseline = results.get("bare", 0.0)
+        for name, micros in results.items():
+            overhead = f"{micros - baseline:>14.1f}" if baseline else f"{'-':>14}"
+            print(f"{case:<12}{name:<10}{micros:>12.1f}{overhead}")
+        if "legacy" in results and "edge" in results:
+            print(f"{'':<12}{'saved':<10}{results['legacy'] - results['edge']:>12.1f}"
+                  f"  ({results['legacy'] / results['edge']:.1f}x faster)")
+
+    print("-" * 60)
+    print("Note: timings exclude the server and network; the saving applies to every")
+    print("request, including those rejected by rate limiting or authentication.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Password hashing benchmark.
+
+Reports verification latency (p50 / p99) for each hashing scheme and cost so that
+PASSWORD_HASH_SCHEMES / PASSWORD_HASH_COSTS can be chosen to fit the login p99
+budget. Schemes whose backend is not installed (e.g. argon2 needs argon2-cffi)
+are skipped.
+
+Usage:
+    python benchmark_password_hashing.py
+    python benchmark_password_hashing.py --budget-ms 250 --samples 20
+    python benchmark_password_hashing.py --scheme bcrypt:10,11,12,13 --scheme argon2:2,3,4
+"""
+
+import argparse
+import time
+
+from passlib.registry import get_crypt_handler
+from passlib.exc import MissingBackendError
+
+# Scheme -> costs (passlib rounds) benchmarked by default
+DEFAULT_SCHEMES = {
+    "bcrypt": [10, 11, 12, 13, 14],
+    "argon2": [2, 3, 4, 6],
+    "scrypt": [14, 15, 16, 17],
+    "pbkdf2_sha256": [29000, 100000, 300000, 600000],
+}
+
+PASSWORD = "Benchmark-Password-1234"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark(scheme: str, cost: int, samples: int):
+    """Return a list of verification times in milliseconds, or None if the scheme is unavailable."""
+    try:
+        handler = get_crypt_handler(scheme).using(rounds=cost)
+        hashed = handler.hash(PASSWORD)
+    except (MissingBackendError, KeyError, ValueError) as e:
+        print(f"  {scheme}: skipped ({e})")
+        return None
+
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.verify(PASSWORD, hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def parse_scheme(value: str):
+    scheme, _, costs = value.partition(":")
+    if not costs:
+        return scheme, DEFAULT_SCHEMES.get(scheme, [])
+    return scheme, [int(c) for c in costs.split(",") if c]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password hash verification latency")
+    parser.add_argument("--scheme", action="append", type=parse_scheme,
+                        help="scheme[:cost,cost,...] (repeatable); defaults to a built-in set")
+    parser.add_argument("--samples", type=int, default=10, help="verifications per scheme/cost")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="login p99 budget for verification")
+    args = parser.parse_args()
+
+    schemes = dict(args.scheme) if args.scheme else DEFAULT_SCHEMES
+
+    print("\nPassword Hashing Benchmark")
+    print("-" * 60)
+    print(f"Samples per cost: {args.samples}, p99 budget: {args.budget_ms:.0f} ms\n")
+    print(f"{'scheme':<16}{'cost':>10}{'p50 ms':>10}{'p99 ms':>10}  within budget")
+
+    recommendations = {}
+    for scheme, costs in schemes.items():
+        for cost in costs:
+            timings = benchmark(scheme, cost, args.samples)
+            if timings is None:
+                break
+            p50, p99 = percentile(timings, 50), percentile(timings, 99)
+            ok = p99 <= args.budget_ms
+            if ok:
+                recommendations[scheme] = cost
+            print(f"{scheme:<16}{cost:>10}{p50:>10.1f}{p99:>10.1f}  {'yes' if ok else 'no'}")
+
+    print("-" * 60)
+    print("Highest cost within budget (PASSWORD_HASH_COSTS):")
+    for scheme, cost in recommendations.items():
+        print(f"  {scheme}: {cost}")
+    print("\nNote: the hashing pool runs one verification per core; under load the")
+    print("login p99 also includes queueing time, so leave headroom below the budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -89,6 +89,85 @@ def index_exists(cursor, table_name, index_name):
     return count > 0
 
 
+def unique_index_exists(cursor, table_name, column_name):
+    """Check if a single-column unique index exists on a column."""
+    query = """
+    SELECT COUNT(*)
+    FROM information_schema.STATISTICS s
+    WHERE s.TABLE_SCHEMA = %s
+    AND s.TABLE_NAME = %s
+    AND s.COLUMN_NAME = %s
+    AND s.NON_UNIQUE = 0
+    AND s.SEQ_IN_INDEX = 1
+    AND NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS o
+        WHERE o.TABLE_SCHEMA = s.TABLE_SCHEMA
+        AND o.TABLE_NAME = s.TABLE_NAME
+        AND o.INDEX_NAME = s.INDEX_NAME
+        AND o.SEQ_IN_INDEX > 1
+    )
+    """
+    cursor.execute(query, (settings.DATABASE_NAME, table_name, column_name))
+    count = cursor.fetchone()[0]
+    return count > 0
+
+
+def normalize_login_identifiers(cursor):
+    """
+    Lowercase and trim emails and usernames so login lookups are exact matches.
+    
+    Rows whose normalized value would collide with another row are left as they
+    are and reported; they must be resolved by hand before the unique indexes
+    can be created.
+    """
+    changes = 0
+    for column_name in ("email", "username"):
+        cursor.execute(f"""
+        SELECT LOWER(TRIM({column_name})) AS normalized, COUNT(*)
+        FROM users
+        GROUP BY normalized
+        HAVING COUNT(*) > 1
+        """)
+        duplicates = [row[0] for row in cursor.fetchall()]
+        if duplicates:
+            logger.warning(f"⚠️  {len(duplicates)} {column_name} value(s) differ only by case/whitespace: "
+                           f"{', '.join(duplicates[:10])}")
+        
+        query = f"""
+        UPDATE users
+        SET {column_name} = LOWER(TRIM({column_name}))
+        WHERE BINARY {column_name} <> BINARY LOWER(TRIM({column_name}))
+        """
+        params = ()
+        if duplicates:
+            placeholders = ", ".join(["%s"] * len(duplicates))
+            query += f" AND LOWER(TRIM({column_name})) NOT IN ({placeholders})"
+            params = tuple(duplicates)
+        cursor.execute(query, params)
+        if cursor.rowcount > 0:
+            logger.info(f"✅ Normalized {cursor.rowcount} {column_name} value(s)")
+            changes += 1
+    return changes
+
+
+def add_unique_index_if_not_exists(cursor, table_name, index_name, column_name):
+    """Add a unique index on a column if the column has none and its values allow it."""
+    if unique_index_exists(cursor, table_name, column_name):
+        logger.info(f"⏭️  Unique index on {column_name} already exists")
+        return False
+    
+    cursor.execute(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM {table_name} GROUP BY {column_name} HAVING COUNT(*) > 1) d"
+    )
+    if cursor.fetchone()[0] > 0:
+        logger.error(f"❌ Cannot add {index_name}: duplicate {column_name} values must be resolved first")
+        return False
+    
+    cursor.execute(f"CREATE UNIQUE INDEX {index_name} ON {table_name}({column_name})")
+    logger.info(f"✅ Added unique index: {index_name}")
+    return True
+
+
 def add_column_if_not_exists(cursor, table_name, column_name, column_definition):
     """Add a column to a table if it doesn't already exist."""
     if not column_exists(cursor, table_name, column_name):
@@ -150,7 +229,8 @@ def migrate_users_table():
             ("locked_until", "DATETIME NULL"),
             ("last_failed_login", "DATETIME NULL"),
             ("password_changed_at", "DATETIME DEFAULT CURRENT_TIMESTAMP"),
-            ("email_verified", "BOOLEAN DEFAULT FALSE NOT NULL")
+            ("email_verified", "BOOLEAN DEFAULT FALSE NOT NULL"),
+            ("token_version", "INT DEFAULT 0 NOT NULL")
         ]
         
         logger.info("🔧 Adding new columns...")
@@ -180,13 +260,30 @@ def migrate_users_table():
         indexes_to_add = [
             ("idx_users_email", "email"),
             ("idx_users_username", "username"),
-            ("idx_users_active", "is_active")
+            ("idx_users_active", "is_active"),
+            # Password reset and email verification look users up by token hash
+            ("idx_users_reset_token", "reset_token"),
+            ("idx_users_verification_token", "verification_token")
         ]
         
         for index_name, columns in indexes_to_add:
             if add_index_if_not_exists(cursor, "users", index_name, columns):
                 changes_made += 1
         
+        # Login looks users up by exact email or username: store them normalized
+        # and make each lookup a single unique-index probe
+        logger.info("🔑 Normalizing login identifiers...")
+        changes_made += normalize_login_identifiers(cursor)
+        
+        unique_indexes_to_add = [
+            ("uq_users_email", "email"),
+            ("uq_users_username", "username")
+        ]
+        
+        for index_name, column_name in unique_indexes_to_add:
+            if add_unique_index_if_not_exists(cursor, "users", index_name, column_name):
+                changes_made += 1
+        
         # Commit all changes
         connection.commit()
         
@@ -168,6 +168,23 @@ PREPARE stmt FROM @sql;
 EXECUTE stmt;
 DEALLOCATE PREPARE stmt;
 
+-- Check if token_version column exists, if not add it
+-- (bumped on role change/deactivation/password change to invalidate issued tokens)
+SET @sql = (
+    SELECT IF(
+        COUNT(*) = 0,
+        'ALTER TABLE users ADD COLUMN token_version INT DEFAULT 0 NOT NULL',
+        'SELECT "token_version column already exists" as message'
+    )
+    FROM information_schema.COLUMNS 
+    WHERE TABLE_SCHEMA = 'svtemple_2' 
+    AND TABLE_NAME = 'users' 
+    AND COLUMN_NAME = 'token_version'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
 -- Update existing users to have default values for first_name and last_name
 -- Only update if the columns exist and are empty
 UPDATE users 
@@ -228,6 +245,95 @@ PREPARE stmt FROM @sql;
 EXECUTE stmt;
 DEALLOCATE PREPARE stmt;
 
+-- Index for reset_token (password reset looks users up by token hash)
+SET @sql = (
+    SELECT IF(
+        COUNT(*) = 0,
+        'CREATE INDEX idx_users_reset_token ON users(reset_token)',
+        'SELECT "idx_users_reset_token already exists" as message'
+    )
+    FROM information_schema.STATISTICS 
+    WHERE TABLE_SCHEMA = 'svtemple_2' 
+    AND TABLE_NAME = 'users' 
+    AND INDEX_NAME = 'idx_users_reset_token'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Index for verification_token (email verification looks users up by token hash)
+SET @sql = (
+    SELECT IF(
+        COUNT(*) = 0,
+        'CREATE INDEX idx_users_verification_token ON users(verification_token)',
+        'SELECT "idx_users_verification_token already exists" as message'
+    )
+    FROM information_schema.STATISTICS 
+    WHERE TABLE_SCHEMA = 'svtemple_2' 
+    AND TABLE_NAME = 'users' 
+    AND INDEX_NAME = 'idx_users_verification_token'
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Login identifiers: store emails and usernames normalized (lowercase, trimmed)
+-- so login lookups are exact matches on a unique index.
+-- Rows that would collide after normalization are left untouched; resolve them by
+-- hand (see migrate_users_table.py, which reports them) before the unique indexes
+-- below can be created.
+UPDATE users u
+LEFT JOIN (
+    SELECT LOWER(TRIM(email)) AS normalized FROM users
+    GROUP BY normalized HAVING COUNT(*) > 1
+) d ON d.normalized = LOWER(TRIM(u.email))
+SET u.email = LOWER(TRIM(u.email))
+WHERE BINARY u.email <> BINARY LOWER(TRIM(u.email)) AND d.normalized IS NULL;
+
+UPDATE users u
+LEFT JOIN (
+    SELECT LOWER(TRIM(username)) AS normalized FROM users
+    GROUP BY normalized HAVING COUNT(*) > 1
+) d ON d.normalized = LOWER(TRIM(u.username))
+SET u.username = LOWER(TRIM(u.username))
+WHERE BINARY u.username <> BINARY LOWER(TRIM(u.username)) AND d.normalized IS NULL;
+
+-- Unique index for email (skipped if one already exists)
+SET @sql = (
+    SELECT IF(
+        COUNT(*) = 0,
+        'CREATE UNIQUE INDEX uq_users_email ON users(email)',
+        'SELECT "unique index on email already exists" as message'
+    )
+    FROM information_schema.STATISTICS 
+    WHERE TABLE_SCHEMA = 'svtemple_2' 
+    AND TABLE_NAME = 'users' 
+    AND COLUMN_NAME = 'email'
+    AND NON_UNIQUE = 0
+    AND SEQ_IN_INDEX = 1
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Unique index for username (skipped if one already exists)
+SET @sql = (
+    SELECT IF(
+        COUNT(*) = 0,
+        'CREATE UNIQUE INDEX uq_users_username ON users(username)',
+        'SELECT "unique index on username already exists" as message'
+    )
+    FROM information_schema.STATISTICS 
+    WHERE TABLE_SCHEMA = 'svtemple_2' 
+    AND TABLE_NAME = 'users' 
+    AND COLUMN_NAME = 'username'
+    AND NON_UNIQUE = 0
+    AND SEQ_IN_INDEX = 1
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
 -- Show final table structure
 DESCRIBE users;
 
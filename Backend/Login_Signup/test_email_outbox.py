@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Test the email outbox: staging, background delivery and retries.
+
+Runs the outbox worker against the service database and a local SMTP
+stand-in (no real mail is sent) and checks that:
+- staging an email is a plain INSERT that does not wait on the mail server
+- a claimed batch is delivered and its rows are marked sent
+- a rejected message is rescheduled with backoff, then marked failed
+The test's workers only claim rows of the test's own category, so other
+pending emails in the outbox are left alone. Rows created by the test are
+deleted afterwards.
+"""
+
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the app directory to Python path
+sys.path.append(str(Path(__file__).parent / "app"))
+
+try:
+    from app.core.database import SessionLocal, init_db
+    from app.core.email_outbox import OutboxWorker
+    from app.core.mailer import Mailer
+    from app.crud.email_outbox import enqueue_email
+    from app.models.email_outbox import EmailOutbox
+    from dotenv import load_dotenv
+
+    # Load environment variables
+    load_dotenv("env")
+
+    TEST_DOMAIN = "outbox-test.example.invalid"
+    # Test workers only claim this category, so real pending emails are never touched
+    TEST_CATEGORY = "outbox_test"
+
+    class SMTPStandIn(socketserver.ThreadingTCPServer):
+        """Minimal SMTP server that records messages; can be slow or reject recipients."""
+        allow_reuse_address = True
+        daemon_threads = True
+
+        def __init__(self, delay=0.0, reject=False):
+            super().__init__(("127.0.0.1", 0), SMTPHandler)
+            self.delay = delay
+            self.reject = reject
+            self.received = []
+
+    class SMTPHandler(socketserver.StreamRequestHandler):
+        def reply(self, line):
+            self.wfile.write(f"{line}\r\n".encode())
+
+        def handle(self):
+            time.sleep(self.server.delay)
+            self.reply("220 localhost stand-in")
+            recipients = []
+            while True:
+                line = self.rfile.readline().decode(errors="replace").strip()
+                if not line:
+                    return
+                command = line.split(" ", 1)[0].upper()
+                if command in ("EHLO", "HELO"):
+                    self.reply("250 localhost")
+                elif command == "MAIL":
+                    recipients = []
+                    self.reply("250 OK")
+                elif command == "RCPT":
+                    if self.server.reject:
+                        self.reply("550 Mailbox unavailable")
+                    else:
+                        recipients.append(line)
+                        self.reply("250 OK")
+                elif command == "DATA":
+                    self.reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while True:
+                        chunk = self.rfile.readline().decode(errors="replace")
+                        if chunk.rstrip("\r\n") == ".":
+                            break
+                        data.append(chunk)
+                    self.server.received.append((recipients, "".join(data)))
+                    self.reply("250 Queued")
+                elif command == "RSET":
+                    recipients = []
+                    self.reply("250 OK")
+                elif command == "QUIT":
+                    self.reply("221 Bye")
+                    return
+                else:
+                    self.reply("250 OK")
+
+    def start_server(**kwargs):
+        server = SMTPStandIn(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def make_worker(server, **kwargs):
+        mailer = Mailer("127.0.0.1", port=server.server_address[1], use_tls=False, timeout=5)
+        return OutboxWorker(mailer, categories=(TEST_CATEGORY,), **kwargs)
+
+    def stage(count, tag):
+        """Commit `count` test messages and return their IDs."""
+        db = SessionLocal()
+        try:
+            messages = [
+                enqueue_email(db, f"{tag}-{i}@{TEST_DOMAIN}", f"Outbox test {tag} {i}", "Test body\n", category=TEST_CATEGORY)
+                for i in range(count)
+            ]
+            db.commit()
+            return [message.id for message in messages]
+        finally:
+            db.close()
+
+    def load(ids):
+        db = SessionLocal()
+        try:
+            return db.query(EmailOutbox).filter(EmailOutbox.id.in_(ids)).order_by(EmailOutbox.id).all()
+        finally:
+            db.close()
+
+    def drain(worker, ids, rounds=10):
+        """Run the worker until none of the given rows is due."""
+        for _ in range(rounds):
+            if not worker.run_once():
+                break
+        return load(ids)
+
+    def cleanup():
+        db = SessionLocal()
+        try:
+            db.query(EmailOutbox).filter(EmailOutbox.category == TEST_CATEGORY).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def test_staging_is_fast():
+        """Staging must not touch the (slow) mail server."""
+        print("\n🔍 Staging emails while the mail server is slow...")
+        server = start_server(delay=2.0)
+        try:
+            started = time.perf_counter()
+            stage(5, "fast")
+            elapsed = time.perf_counter() - started
+            print(f"   Staged 5 emails in {elapsed * 1000:.1f}ms (SMTP handshake takes 2000ms)")
+            if elapsed >= 1.0:
+                print("❌ Staging waited on the mail server")
+                return False
+            print("✅ Staging does not wait on SMTP")
+            return True
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_delivery():
+        print("\n🔍 Delivering a batch...")
+        server = start_server()
+        try:
+            ids = stage(5, "deliver")
+            worker = make_worker(server, batch_size=50)
+            rows = drain(worker, ids)
+            delivered = sum(1 for recipients, _ in server.received if TEST_DOMAIN in " ".join(recipients))
+            if any(row.status != "sent" or row.sent_at is None for row in rows):
+                print(f"❌ Rows not marked sent: {[(row.id, row.status) for row in rows]}")
+                return False
+            if delivered < len(ids):
+                print(f"❌ SMTP stand-in received {delivered} of {len(ids)} messages")
+                return False
+            print(f"✅ {len(ids)} messages delivered and marked sent ({worker.stats()['batches']} batch(es))")
+            return True
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_retry_and_failure():
+        print("\n🔍 Retrying rejected messages...")
+        server = start_server(reject=True)
+        try:
+            ids = stage(1, "retry")
+            worker = make_worker(server, batch_size=50, max_attempts=2, backoff_base=60)
+            rows = drain(worker, ids)
+            row = rows[0]
+            if row.status != "pending" or row.attempts != 1 or not row.last_error:
+                print(f"❌ Expected a pending retry, got status={row.status} attempts={row.attempts}")
+                return False
+            delay = (row.next_attempt_at - datetime.utcnow()).total_seconds()
+            if not 20 <= delay <= 61:
+                print(f"❌ Retry scheduled {delay:.0f}s ahead, expected 30-60s")
+                return False
+            print(f"✅ Rejected message rescheduled {delay:.0f}s ahead: {row.last_error[:60]}")
+
+            # Make it due again; the second failure reaches max_attempts
+            db = SessionLocal()
+            try:
+                db.query(EmailOutbox).filter(EmailOutbox.id == row.id).update({"next_attempt_at": datetime.utcnow()})
+                db.commit()
+            finally:
+                db.close()
+            row = drain(worker, ids)[0]
+            if row.status != "failed" or row.attempts != 2:
+                print(f"❌ Expected failed after 2 attempts, got status={row.status} attempts={row.attempts}")
+                return False
+            print("✅ Message marked failed after max attempts")
+            return True
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def main():
+        print("📧 Email Outbox Test")
+        print("=" * 50)
+
+        init_db()
+        cleanup()
+        try:
+            results = [
+                test_staging_is_fast(),
+                test_delivery(),
+                test_retry_and_failure(),
+            ]
+        finally:
+            cleanup()
+
+        print("\n" + "=" * 50)
+        if all(results):
+            print("✅ All email outbox tests passed")
+            return 0
+        print("❌ Email outbox tests failed")
+        return 1
+
+    if __name__ == "__main__":
+        exit(main())
+
+except ImportError as e:
+    print(f"❌ Import error: {e}")
+    print("💡 Make sure you're in the Login_Signup directory and dependencies are installed")
+    print("   Run: pip install -r requirements.txt")
+    exit(1)